@@ -0,0 +1,68 @@
+"""asyncio helpers for the monitor pipeline.
+
+* ``AsyncStorage`` exposes ``StorageBackend`` calls as coroutines.  The GCS
+  client (and ``requests``) are blocking, so each call runs in a worker
+  thread via ``asyncio.to_thread``; several calls can then overlap.
+* ``run_sync(coro)`` runs a coroutine on one long-lived event loop in a
+  background thread.  Async clients such as ``AsyncOpenAI`` keep their
+  connection pool bound to the loop that first used them, so reusing one
+  loop lets warm instances reuse those connections.  It is safe to call
+  from any thread, including several request threads at once.
+"""
+import asyncio
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background event loop, starting it on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-io-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coro, timeout: float = None):
+    """Run ``coro`` on the background loop and wait for its result."""
+    loop = get_loop()
+    if _running_loop() is loop:
+        coro.close()
+        raise RuntimeError("run_sync() would block the background loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class AsyncStorage:
+    """Coroutine wrappers around a ``StorageBackend``."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def download_text(self, file_name: str) -> str:
+        return await asyncio.to_thread(self.backend.download_text, file_name)
+
+    async def upload_text(self, file_name: str, content: str, **kwargs):
+        return await asyncio.to_thread(self.backend.upload_text, file_name, content, **kwargs)
+
+    async def download_json(self, file_name: str):
+        return await asyncio.to_thread(self.backend.download_json, file_name)
+
+    async def download_json_with_generation(self, file_name: str):
+        return await asyncio.to_thread(self.backend.download_json_with_generation, file_name)
+
+    async def upload_json(self, file_name: str, data, **kwargs):
+        return await asyncio.to_thread(self.backend.upload_json, file_name, data, **kwargs)
+
+    async def update_json(self, file_name: str, mutate, **kwargs):
+        return await asyncio.to_thread(self.backend.update_json, file_name, mutate, **kwargs)
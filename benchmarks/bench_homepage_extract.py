@@ -0,0 +1,58 @@
+"""Micro-benchmark: streaming top-story extraction vs full BeautifulSoup parse.
+
+Usage:
+    python benchmarks/bench_homepage_extract.py
+    python benchmarks/bench_homepage_extract.py --pad 10 saved_homepage.html ...
+
+``--pad`` repeats the page's <main> content N times so the small saved
+fixture approaches the size of the real multi-hundred-KB homepage.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+from extractors import extract_top_story  # noqa: E402
+
+DEFAULT_FIXTURES = [os.path.join(ROOT, 'tests', 'fixtures', 'guardian_international.html')]
+
+
+def pad_page(html: str, factor: int) -> str:
+    if factor <= 1 or '<main>' not in html or '</main>' not in html:
+        return html
+    start = html.index('<main>') + len('<main>')
+    end = html.index('</main>')
+    return html[:end] + html[start:end] * (factor - 1) + html[end:]
+
+
+def bs4_top_story(html: str):
+    soup = BeautifulSoup(html, 'html.parser')
+    a = soup.select_one('a[data-link-name="article"]')
+    return (a.get('href'), a.get_text(strip=True)) if a else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pages', nargs='*', default=DEFAULT_FIXTURES)
+    parser.add_argument('--pad', type=int, default=8)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'page':40} {'size':>9} {'bs4 ms':>9} {'stream ms':>10} {'speedup':>8}")
+    for path in args.pages:
+        with open(path, 'r', encoding='utf-8') as fh:
+            html = pad_page(fh.read(), args.pad)
+        assert extract_top_story(html) == bs4_top_story(html), f"results differ for {path}"
+        t_bs4 = timeit.timeit(lambda: bs4_top_story(html), number=args.number) / args.number
+        t_fast = timeit.timeit(lambda: extract_top_story(html), number=args.number) / args.number
+        print(f"{os.path.basename(path)[:40]:40} {len(html):>9} {t_bs4 * 1000:>9.2f} "
+              f"{t_fast * 1000:>10.2f} {t_bs4 / t_fast:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Size and parse-time comparison of the published news formats.
+
+Usage:
+    python benchmarks/bench_news_formats.py            # 10k synthetic items
+    python benchmarks/bench_news_formats.py --items 100000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_format import decode_msgpack, encode_json, encode_msgpack, gzip_bytes, msgpack_available  # noqa: E402
+from synthetic_news import make_news_list  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    data = make_news_list(args.items)
+    pretty = encode_json(data, compact=False).encode('utf-8')
+    compact = encode_json(data, compact=True).encode('utf-8')
+    formats = [
+        ("json indent=2 (old)", pretty, lambda b: json.loads(b)),
+        ("json minified", compact, lambda b: json.loads(b)),
+        ("json indent=2 + gzip", gzip_bytes(pretty), lambda b: json.loads(gzip.decompress(b))),
+        ("json minified + gzip", gzip_bytes(compact), lambda b: json.loads(gzip.decompress(b))),
+    ]
+    if msgpack_available():
+        packed = encode_msgpack(data)
+        formats.append(("msgpack", packed, decode_msgpack))
+        formats.append(("msgpack + gzip", gzip_bytes(packed), lambda b: decode_msgpack(gzip.decompress(b))))
+    else:
+        print("(msgpack not installed; skipping MessagePack rows)")
+
+    base = len(pretty)
+    print(f"{args.items} items")
+    print(f"{'format':24} {'bytes':>12} {'vs old':>8} {'parse ms':>10}")
+    for name, payload, parse in formats:
+        assert parse(payload) == data
+        t = timeit.timeit(lambda: parse(payload), number=args.number) / args.number
+        print(f"{name:24} {len(payload):>12} {len(payload) / base:>7.0%} {t * 1000:>10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
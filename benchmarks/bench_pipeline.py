@@ -0,0 +1,251 @@
+"""Offline end-to-end benchmark of the monitor pipeline with a regression gate.
+
+Usage:
+    python benchmarks/bench_pipeline.py                         # 1k, 10k, 100k items
+    python benchmarks/bench_pipeline.py --sizes 1000 --repeat 3 --llm-latency 0.2
+    python benchmarks/bench_pipeline.py --save-baseline baseline.json
+    python benchmarks/bench_pipeline.py --baseline baseline.json --tolerance 0.25
+
+Everything runs locally:
+
+* homepage / article HTML is replayed from ``tests/fixtures`` through the
+  pooled session (each repeat gets a fresh headline so it is not deduped),
+* OpenAI is ``tests/fake_openai_server.py`` with configurable latency,
+* storage is the local ``StorageBackend`` in a temporary directory, seeded
+  with a synthetic ``news.json`` of N items (and the news store migrated
+  from it).
+
+For each size it reports wall time (best of ``--repeat``) and peak Python
+memory (tracemalloc, separate pass) of ``process_breaking_news``,
+``parse_json_safely`` and ``assign_incremental_id``, plus the per-stage
+breakdown from ``tracing``.  The exit status is 1 when a result exceeds
+``benchmarks/thresholds.json`` (absolute ms / MiB ceilings) or is more than
+``--tolerance`` slower than ``--baseline``.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+import breaking_monitor  # noqa: E402
+import tracing  # noqa: E402
+from fake_openai_server import FakeOpenAIServer  # noqa: E402
+from fetcher import get_session  # noqa: E402
+from news_store import NewsStore  # noqa: E402
+from synthetic_news import make_news_list  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+HOMEPAGE_URL = "https://www.theguardian.com/international"
+TOP_HREF = "/world/2026/jan/03/earthquake-strikes-off-coast-of-japan-tsunami-warning-issued"
+TOP_TITLE = "Earthquake strikes off coast of Japan"
+LLM_REPLY = json.dumps([{
+    "date": "2026-01-03T00:00:00Z", "title": "【突發】日本東北對開海域發生強烈地震", "summary": "日本發出海嘯警告。",
+    "articleDetail": "日本東北對開海域周六發生強烈地震。\n當局向多個縣發出海嘯警告。",
+    "region": "國際", "category": "突發", "imageUrl": "", "citations": [""],
+}], ensure_ascii=False)
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as fh:
+        return fh.read()
+
+
+class FixtureResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = 200
+        self.headers = {}
+
+
+class FixtureReplay:
+    """Stands in for ``Session.get``; ``next_story()`` gives the homepage a new headline."""
+
+    def __init__(self):
+        self.homepage = _read_fixture('guardian_international.html')
+        self.article = _read_fixture('guardian_article.html')
+        self.run = 0
+
+    def next_story(self):
+        self.run += 1
+
+    def get(self, url, headers=None, timeout=None):
+        if url == HOMEPAGE_URL:
+            suffix = f"-bench-{self.run}"
+            return FixtureResponse(self.homepage.replace(TOP_HREF, TOP_HREF + suffix)
+                                   .replace(TOP_TITLE, f"{TOP_TITLE} {suffix}"))
+        return FixtureResponse(self.article)
+
+
+@contextlib.contextmanager
+def offline_environment(workdir: str, llm_latency: float, chunk_delay: float):
+    """Point breaking_monitor's singletons at local storage, fixtures and a fake OpenAI."""
+    from openai import AsyncOpenAI, OpenAI
+
+    backend = breaking_monitor.StorageBackend("bench-bucket", local_dir=workdir, local_only=True)
+    replay = FixtureReplay()
+    session = get_session()
+    saved = {name: getattr(breaking_monitor, name) for name in
+             ("storage_backend", "news_store", "feed_materializer", "fetcher", "dedup_index",
+              "translation_cache", "search_index", "client", "async_client")}
+    saved_get = session.__dict__.get('get')
+    saved_log = tracing.LOG_SPANS
+    saved_thumbnails = os.environ.get("THUMBNAILS")
+    with FakeOpenAIServer([LLM_REPLY], first_token_delay=llm_latency, chunk_delay=chunk_delay) as server:
+        try:
+            for name in saved:
+                setattr(breaking_monitor, name, None)
+            breaking_monitor.storage_backend = backend
+            breaking_monitor.client = OpenAI(api_key="bench", base_url=server.base_url)
+            breaking_monitor.async_client = AsyncOpenAI(api_key="bench", base_url=server.base_url)
+            session.get = replay.get
+            tracing.LOG_SPANS = False
+            os.environ["THUMBNAILS"] = "0"  # the fixture's og:image is not replayed
+            yield backend, replay
+        finally:
+            for name, value in saved.items():
+                setattr(breaking_monitor, name, value)
+            if saved_get is None:
+                session.__dict__.pop('get', None)
+            else:
+                session.get = saved_get
+            tracing.LOG_SPANS = saved_log
+            if saved_thumbnails is None:
+                os.environ.pop("THUMBNAILS", None)
+            else:
+                os.environ["THUMBNAILS"] = saved_thumbnails
+
+
+def measure(func, repeat: int, before=None):
+    """Best wall time (ms) over ``repeat`` runs, then peak traced memory (MiB) of one more run."""
+    best = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(best, 2), round(peak / 2 ** 20, 2)
+
+
+def bench_size(n: int, args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, \
+            offline_environment(workdir, args.llm_latency, args.chunk_delay) as (backend, replay):
+        news = make_news_list(n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            backend.upload_json("news.json", news, compact=True)
+            NewsStore(backend).migrate_from_list(news)
+        news_text = json.dumps(news, ensure_ascii=False)
+        del news
+        current = backend.download_json("news.json")
+
+        stages = {}
+
+        def run_pipeline():
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = breaking_monitor.process_breaking_news()
+            for stage, s in summary["stages"].items():
+                stages[stage] = min(stages.get(stage, s["total_ms"]), s["total_ms"])
+
+        results["process_breaking_news"] = measure(run_pipeline, args.repeat, before=replay.next_story)
+        published = NewsStore(backend).load_head()[0]
+        assert published["title"] == json.loads(LLM_REPLY)[0]["title"], "pipeline did not publish"
+
+        noisy = "以下是翻譯結果：\n" + LLM_REPLY + "\n完成。"
+        results["parse_json_safely[reply]"] = measure(lambda: breaking_monitor.parse_json_safely(noisy),
+                                                      max(args.repeat, 20))
+        results["parse_json_safely[news.json]"] = measure(lambda: breaking_monitor.parse_json_safely(news_text),
+                                                          args.repeat)
+        results["assign_incremental_id"] = measure(
+            lambda: breaking_monitor.assign_incremental_id({"title": "x"}, current), args.repeat)
+    return {"results": results, "stages": {k: round(v, 2) for k, v in stages.items()}}
+
+
+def check(report: dict, thresholds: dict, baseline: dict, tolerance: float) -> list:
+    """Return a list of human-readable threshold violations."""
+    failures = []
+    for size, entry in report.items():
+        for name, (ms, mib) in entry["results"].items():
+            key = f"{size}:{name}"
+            limit = thresholds.get(key) or thresholds.get(name) or {}
+            if "max_ms" in limit and ms > limit["max_ms"]:
+                failures.append(f"{key}: {ms:.1f} ms > {limit['max_ms']} ms")
+            if "max_mib" in limit and mib > limit["max_mib"]:
+                failures.append(f"{key}: {mib:.1f} MiB > {limit['max_mib']} MiB")
+            base = baseline.get(key)
+            if base and ms > base[0] * (1 + tolerance):
+                failures.append(f"{key}: {ms:.1f} ms is more than {tolerance:.0%} slower than baseline {base[0]:.1f} ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default="1000,10000,100000", help='comma-separated news.json sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='fake OpenAI time to first token (s)')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='fake OpenAI delay between chunks (s)')
+    parser.add_argument('--thresholds', default=THRESHOLDS_FILE, help='absolute ceilings ("" to disable)')
+    parser.add_argument('--baseline', help='JSON written by --save-baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs the baseline')
+    parser.add_argument('--save-baseline', help='write flat results to this file')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = {}
+    for n in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        report[str(n)] = bench_size(n, args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for size, entry in report.items():
+            print(f"\n{size} items")
+            print(f"  {'benchmark':32} {'best ms':>10} {'peak MiB':>10}")
+            for name, (ms, mib) in entry["results"].items():
+                print(f"  {name:32} {ms:>10.2f} {mib:>10.2f}")
+            print(f"  {'stage (process_breaking_news)':32} {'ms':>10}")
+            for stage, ms in sorted(entry["stages"].items(), key=lambda kv: -kv[1]):
+                print(f"    {stage:30} {ms:>10.2f}")
+
+    flat = {f"{size}:{name}": value for size, entry in report.items()
+            for name, value in entry["results"].items()}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as fh:
+            json.dump(flat, fh, indent=2)
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, 'r', encoding='utf-8') as fh:
+            thresholds = json.load(fh)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh:
+            baseline = json.load(fh)
+
+    failures = check(report, thresholds, baseline, args.tolerance)
+    for failure in failures:
+        print(f"[REGRESSION] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
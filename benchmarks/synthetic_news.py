@@ -0,0 +1,35 @@
+"""Synthetic translated news items shaped like the real news.json entries."""
+import random
+from datetime import datetime, timedelta
+
+REGIONS = ["雪梨", "墨爾本", "布里斯班", "珀斯", "阿德萊德", "坎培拉", "澳洲", "國際"]
+CATEGORIES = ["突發", "社會", "政治", "經濟", "體育", "天氣"]
+PHRASES = [
+    "當局表示正密切監察事態發展", "警方呼籲市民保持警惕", "多名目擊者向記者講述事發經過",
+    "事件引起社區廣泛關注", "政府發言人拒絕評論", "專家指出情況可能持續數日",
+    "消防處派出多輛消防車到場", "受影響居民已獲安排暫住", "交通一度嚴重擠塞",
+    "有關部門正調查事件原因", "天文台發出強烈警告", "議員要求當局盡快交代",
+]
+
+
+def make_item(i: int, rng: random.Random, start: datetime) -> dict:
+    paragraphs = ["，".join(rng.choice(PHRASES) for _ in range(rng.randint(3, 6))) + "。"
+                  for _ in range(rng.randint(3, 8))]
+    return {
+        "date": (start + timedelta(minutes=17 * i)).isoformat() + "Z",
+        "title": f"【突發】{rng.choice(PHRASES)}（{i}）",
+        "summary": "，".join(rng.choice(PHRASES) for _ in range(2)) + "。",
+        "articleDetail": "\n".join(paragraphs),
+        "region": rng.choice(REGIONS),
+        "category": rng.choice(CATEGORIES),
+        "imageUrl": f"https://i.guim.co.uk/img/media/{i:08x}/master/1000.jpg",
+        "citations": [f"https://www.theguardian.com/world/2025/story-{i}"],
+        "id": i,
+    }
+
+
+def make_news_list(n: int, seed: int = 42) -> list:
+    """``n`` items, newest first, with ids 1..n."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [make_item(i, rng, start) for i in range(n, 0, -1)]
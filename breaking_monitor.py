@@ -1,226 +1,771 @@
-import requests
-from bs4 import BeautifulSoup
+# 重型套件 (google-cloud-storage / openai / bs4 / requests) 都在第一次使用時才載入，
+# clients 亦只建立一次並在 warm instance 之間重用，以減少 cold start 時間。
+from sources import GuardianSource, fetch_all_stories
+import tracing
+import asyncio
 import json
-from datetime import datetime
 import os
-import uuid
+
+# 每次處理首頁最前的 N 則不同新聞 (預設 1，只處理頭條)；N > 1 時未見過的新聞一次過翻譯及發布
+TOP_STORIES = max(1, int(os.environ.get("TOP_STORIES", "1")))
+
 
 def get_guardian_breaking_story():
     """Fetch the top headline from The Guardian International homepage."""
-    url = "https://www.theguardian.com/international"
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    return GuardianSource().fetch_story(get_fetcher())
+
+
+def last_url_file(source_name: str) -> str:
+    """Name of the per-source 'last processed URL' marker object."""
+    if source_name == GuardianSource.name:
+        return "last_breaking_url.txt"
+    return f"last_breaking_url_{source_name}.txt"
+
+def process_breaking_news(persist_idle_metrics: bool = True) -> dict:
+    """Run the pipeline once and return the run summary (see ``tracing``).
+
+    Synchronous entry point for ``main.py``, ``cloud_function.py`` and the
+    watch mode; the work itself runs in ``process_breaking_news_async`` on
+    the shared background event loop.
+
+    ``persist_idle_metrics=False`` skips storing the summary of runs in which
+    no homepage changed (used by the high-frequency ``watch`` mode).
+    """
+    return run_sync(process_breaking_news_async(persist_idle_metrics))
+
+
+async def process_breaking_news_async(persist_idle_metrics: bool = True) -> dict:
+    fetcher = get_fetcher()
+    fetcher.reset_stats()
+    # 每次 run 使用自己的 tracer (ContextVar)：同一 process 內同時進行的 runs 不會混在一起
+    tracing.start_run()
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        print(f"[DEBUG] Guardian status code: {response.status_code}")
-        print(f"[DEBUG] Guardian content length: {len(response.text)}")
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # The top headline is usually in a <a> with data-link-name="article"
-        top_story = soup.select_one('a[data-link-name="article"]')
-        if not top_story:
-            print("[DEBUG] No top story found on The Guardian homepage.")
-            return None
-
-
-        link = top_story.get('href')
-        # Ensure the link is absolute
-        from urllib.parse import urljoin
-        link = urljoin(url, link) if link else url
-        title = top_story.get_text(strip=True)
-        print(f"[DEBUG] Guardian top story title: {title}")
-        print(f"[DEBUG] Guardian top story link: {link}")
-
-        # Fetch article content and image
-        full_content = ""
-        image_url = ""
-        article_soup = None
-        try:
-            if link:
-                article_response = requests.get(link, headers=headers, timeout=10)
-                print(f"[DEBUG] Article status code: {article_response.status_code}")
-                article_soup = BeautifulSoup(article_response.text, 'html.parser')
-        except Exception as e:
-            print(f"[DEBUG] Article fetch failed: {e}")
-            article_soup = None
-
-        # Try to get paragraphs
-        paragraphs = []
-        if article_soup:
-            for psel in ['.article-body-commercial-selector p', 'article p', 'p']:
-                paragraphs = article_soup.select(psel)
-                print(f"[DEBUG] Article selector '{psel}' found {len(paragraphs)} paragraphs")
-                if paragraphs:
-                    break
-        if paragraphs:
-            full_content = "\n\n".join([p.get_text(strip=True) for p in paragraphs])
-
-        # Try to get image from meta tags or main article image
-        if article_soup:
-            meta_img = article_soup.select_one('meta[property="og:image"]') or article_soup.select_one('meta[name="og:image"]')
-            if meta_img and meta_img.get('content'):
-                image_url = meta_img.get('content')
-            if not image_url:
-                # Try to find main image in figure or img tags commonly used for lead images
-                main_img = article_soup.select_one('figure img') or article_soup.select_one('img')
-                if main_img and main_img.get('src'):
-                    image_url = main_img.get('src')
-                    # If image_url is relative, make it absolute
-                    from urllib.parse import urljoin
-                    image_url = urljoin(link, image_url)
-
-        print(f"[DEBUG] Guardian image_url: {image_url}")
-        print(f"[DEBUG] Guardian full_content length: {len(full_content)}")
-        return {
-            "title": title or "",
-            "url": link or url,
-            "content": full_content,
-            "publishedAt": datetime.utcnow().isoformat() + "Z",
-            "imageUrl": image_url or ""
-        }
+        with tracing.span("run"):
+            await _process_breaking_news()
+    finally:
+        # 未成功處理的首頁不記錄 ETag，下次會重新下載
+        fetcher.discard()
+        tracing.log("fetch stats", stats=fetcher.summary())
+        await asyncio.to_thread(_flush_translation_cache)
+        summary = await asyncio.to_thread(_finish_run_trace, persist_idle_metrics)
+    return summary
+
+
+def _flush_translation_cache():
+    """Write the batched last-used times of translation cache hits (if any)."""
+    if translation_cache is None:
+        return
+    try:
+        translation_cache.flush()
     except Exception as e:
-        print(f"[ERROR] Scaping The Guardian failed: {e}")
-    return None
+        tracing.log(f"Translation cache index update failed: {e}", severity="WARNING")
+
+
+def _finish_run_trace(persist_idle: bool = True) -> dict:
+    """Log the run summary and persist it for p50/p95 charts (metrics/recent.json)."""
+    summary = tracing.current().summary()
+    tracing.log("run summary", summary=summary)
+    if not persist_idle and not summary["counters"].get("http_changed"):
+        return summary
+    try:
+        tracing.persist_summary(get_storage_backend(), summary)
+    except Exception as e:
+        tracing.log(f"Could not persist run metrics: {e}", severity="WARNING")
+    return summary
 
-def process_breaking_news():
-    # 1. 檢查有無突發
-    breaking_story = get_guardian_breaking_story()
-    if not breaking_story:
+
+async def _process_breaking_news():
+    # 1. 同時檢查所有來源有無突發 (每個來源一個 thread，整體有時限)
+    # 已發布過的 URL / 標題在抓取文章內容之前就會被略過
+    dedup_index = get_dedup_index()
+    with tracing.span("dedup_load"):
+        await asyncio.to_thread(dedup_index.load)
+    with tracing.span("fetch_sources"):
+        stories = await asyncio.to_thread(fetch_all_stories, get_fetcher(), is_seen=dedup_index.contains,
+                                          top_n=TOP_STORIES)
+    tracing.incr("stories_found", len(stories))
+    if TOP_STORIES > 1:
+        await _process_batch(stories)
         return
+    # 各來源的新聞同時處理 (發布以 generation precondition 保護)；全部完成後才回報第一個錯誤
+    results = await asyncio.gather(*(_process_story(story) for story in stories), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        raise errors[0]
+
 
+async def _process_story(breaking_story: dict):
     # 2. 檢查是否處理過 (防止重複發布)
-    # 建議在 GCS 存一個 'last_breaking_url.txt'
-    last_url = download_text_from_gcs("last_breaking_url.txt")
+    # dedup_index 記錄最近發布過的 URL 及標題；每個來源仍保留 'last_breaking_url.txt'
+    fetcher = get_fetcher()
+    dedup_index = get_dedup_index()
+    marker = last_url_file(breaking_story.get('source', GuardianSource.name))
+    homepage = breaking_story.get('homepageUrl')
+    if breaking_story.get('duplicate'):
+        tracing.log("No new breaking news.")
+        await asyncio.to_thread(fetcher.commit, [homepage])
+        return
+    last_url = await download_text_from_gcs_async(marker)
     if breaking_story['url'] == last_url:
-        print("[INFO] No new breaking news.")
+        tracing.log("No new breaking news.")
+        dedup_index.add(breaking_story['url'], breaking_story['title'])
+        await asyncio.to_thread(dedup_index.save)
+        await asyncio.to_thread(fetcher.commit, [homepage])
         return
 
-    # 3. 呼叫您的 LLM 翻譯 (使用我們之前修好的 parse_json_safely)
-    translated_item = translate_breaking_story(breaking_story) 
-    # 注意：這裡翻譯出來應該是一個 Dict
-    
-    if translated_item:
-        # 4. 下載現有的 news.json
-        current_news_list = download_json_from_gcs("news.json")
+    # 同時運行的其他 instance 可能正在處理同一則新聞：先原子地「認領」它 (短期租約，發布後才記錄為已見)
+    if not await asyncio.to_thread(dedup_index.claim, breaking_story['url'], breaking_story['title']):
+        tracing.log("Story already claimed by another run.", url=breaking_story['url'])
+        await asyncio.to_thread(fetcher.commit, [homepage])
+        return
+
+    # 翻譯期間預先讀取 head 及 manifest；若發布時已過時，CAS 會失敗並重新讀取
+    news_store = get_news_store()
+    prefetch = asyncio.ensure_future(asyncio.to_thread(news_store.snapshot))
+    # 縮圖與翻譯同時進行 (需要 Pillow；THUMBNAILS=0 可關閉)
+    thumbnails = asyncio.ensure_future(_prepare_thumbnails(breaking_story.get('imageUrl')))
+    try:
+        # 3. 呼叫您的 LLM 翻譯 (使用我們之前修好的 parse_json_safely)
+        with tracing.span("translate", source=breaking_story.get('source')):
+            translated_item = await translate_breaking_story_async(breaking_story)
+        # 注意：這裡翻譯出來應該是一個 Dict
+        if not translated_item:
+            tracing.incr("stories_failed")
+            await asyncio.to_thread(dedup_index.release, breaking_story['url'], breaking_story['title'])
+            return
+
+        # 4. 只讀取 head 及 manifest，不再下載整個 news.json
+        # 5. 由 manifest 的 last_id 計數器分配遞增 id (O(1))
+        # 6. 插入到最前面 (index 0)，舊的新聞會被封存到 segments (不再限制只保留最新 50 條)
+        # 7. 以 generation precondition 上傳回 GCS；若被其他 instance 搶先便重新讀取再試
+        apply_manifest(translated_item[0], await thumbnails)
+        try:
+            snapshot = await prefetch
+        except Exception as e:
+            tracing.log(f"News store prefetch failed: {e}", severity="WARNING")
+            snapshot = None
+        with tracing.span("publish"):
+            await asyncio.to_thread(news_store.publish, translated_item[0], snapshot=snapshot)
+    except Exception:
+        await asyncio.to_thread(dedup_index.release, breaking_story['url'], breaking_story['title'])
+        raise
+    finally:
+        thumbnails.cancel()
+        if not prefetch.done():
+            prefetch.cancel()
+        elif not prefetch.cancelled():
+            prefetch.exception()  # 標記錯誤已處理，避免 "exception was never retrieved"
+    # 8. 認領轉為「已發布」；更新分頁及地區/類別索引、URL 標記及 ETag 互不相依，同時進行
+    await asyncio.gather(
+        asyncio.to_thread(dedup_index.confirm, breaking_story['url'], breaking_story['title']),
+        _apply_feed(translated_item[0]),
+        _apply_search([translated_item[0]]),
+        upload_text_to_gcs_async(marker, breaking_story['url']),
+        asyncio.to_thread(fetcher.commit, [homepage]),
+    )
+    tracing.incr("stories_published")
+    tracing.log(f"Breaking News posted: {translated_item[0]['title']}", severity="NOTICE",
+                id=translated_item[0].get('id'), url=breaking_story['url'])
+
+
+async def _process_batch(stories: list):
+    """Top-N mode: translate all unseen stories in one chat completion and
+    publish them with a single news store write."""
+    fetcher = get_fetcher()
+    dedup_index = get_dedup_index()
+    homepages = {story.get('homepageUrl') for story in stories}
+    markers = {}
+    for story in stories:
+        marker = last_url_file(story.get('source', GuardianSource.name))
+        if marker not in markers:
+            markers[marker] = await download_text_from_gcs_async(marker)
+
+    # 2. 略過已發布或已被其他 instance 認領的新聞
+    fresh = []
+    for story in stories:
+        if story.get('duplicate'):
+            continue
+        if story['url'] == markers[last_url_file(story.get('source', GuardianSource.name))]:
+            dedup_index.add(story['url'], story['title'])
+            await asyncio.to_thread(dedup_index.save)
+            continue
+        if not await asyncio.to_thread(dedup_index.claim, story['url'], story['title']):
+            tracing.log(f"Story already claimed by another run: {story['title']}", url=story['url'])
+            continue
+        fresh.append(story)
+    if not fresh:
+        tracing.log("No new breaking news.")
+        await asyncio.to_thread(fetcher.commit, list(homepages))
+        return
+
+    news_store = get_news_store()
+    prefetch = asyncio.ensure_future(asyncio.to_thread(news_store.snapshot))
+    thumbnails = [asyncio.ensure_future(_prepare_thumbnails(story.get('imageUrl'))) for story in fresh]
+    published, failed = [], []
+    try:
+        # 3. 一次過翻譯所有新聞 (一個 chat completion 回傳多元素 array)
+        with tracing.span("translate", stories=len(fresh)):
+            translations = await translate_breaking_stories_async(fresh)
+        for story, translated, thumbnail in zip(fresh, translations, thumbnails):
+            if translated:
+                published.append((story, apply_manifest(translated[0], await thumbnail)))
+            else:
+                failed.append(story)
+        if failed:
+            tracing.incr("stories_failed", len(failed))
+        for story in failed:
+            await asyncio.to_thread(dedup_index.release, story['url'], story['title'])
+        if not published:
+            return
+
+        # 4-7. 首頁次序 (最重要的在前) 一次寫入 head
+        try:
+            snapshot = await prefetch
+        except Exception as e:
+            tracing.log(f"News store prefetch failed: {e}", severity="WARNING")
+            snapshot = None
+        with tracing.span("publish", stories=len(published)):
+            await asyncio.to_thread(news_store.publish_many, [item for _, item in published], snapshot=snapshot)
+    except Exception:
+        for story in fresh:
+            if story not in failed:
+                await asyncio.to_thread(dedup_index.release, story['url'], story['title'])
+        raise
+    finally:
+        for thumbnail in thumbnails:
+            thumbnail.cancel()
+        if not prefetch.done():
+            prefetch.cancel()
+        elif not prefetch.cancelled():
+            prefetch.exception()
+
+    # 8. 分頁由舊到新更新；每個來源的 URL 標記記錄其最前的新聞；有翻譯失敗的首頁不記錄 ETag
+    async def apply_feeds():
+        for _, item in reversed(published):
+            await _apply_feed(item)
+
+    latest = {}
+    for story, _ in published:
+        latest.setdefault(last_url_file(story.get('source', GuardianSource.name)), story['url'])
+    retry = {story.get('homepageUrl') for story in failed}
+    await asyncio.gather(
+        asyncio.to_thread(dedup_index.confirm_many, [(story['url'], story['title']) for story, _ in published]),
+        apply_feeds(),
+        _apply_search([item for _, item in published]),
+        *(upload_text_to_gcs_async(marker, url) for marker, url in latest.items()),
+        asyncio.to_thread(fetcher.commit, [h for h in homepages if h not in retry]),
+    )
+    tracing.incr("stories_published", len(published))
+    for _, item in published:
+        tracing.log(f"Breaking News posted: {item['title']}", severity="NOTICE", id=item.get('id'))
+
+
+async def _prepare_thumbnails(image_url: str):
+    """Thumbnail manifest for the lead image, or None (never raises)."""
+    if not image_url or not thumbnails_enabled():
+        return None
+    try:
+        with tracing.span("thumbnails"):
+            return await asyncio.to_thread(get_thumbnail_store().process, image_url)
+    except Exception as e:
+        tracing.log(f"Thumbnail generation failed: {e}", severity="WARNING", url=image_url)
+        return None
 
-        # Assign an incremental integer id based on existing items
-        assign_incremental_id(translated_item[0], current_news_list)
 
-        # 5. 插入到最前面 (index 0)
-        current_news_list.insert(0, translated_item[0])
-        
-        # 6. 不再限制只保留最新 50 條
-        # 7. 上傳回 GCS
-        upload_json_to_gcs("news.json", current_news_list)
-        upload_text_to_gcs("last_breaking_url.txt", breaking_story['url'])
-        print(f"[SUCCESS] Breaking News posted: {translated_item[0]['title']}")
+async def _apply_feed(item: dict):
+    try:
+        with tracing.span("feed"):
+            await asyncio.to_thread(get_feed_materializer().apply, item)
+    except Exception as e:
+        tracing.log(f"Feed materialization failed: {e}", severity="ERROR", id=item.get('id'))
 
 
+async def _apply_search(items: list):
+    try:
+        with tracing.span("search_index"):
+            await asyncio.to_thread(get_search_index().apply_many, items)
+    except Exception as e:
+        tracing.log(f"Search index update failed: {e}", severity="ERROR", ids=[it.get('id') for it in items])
+
 
-from google.cloud import storage
+import socket
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+# google.api_core.exceptions 本身很輕量；google.cloud.storage 延遲到 StorageBackend 建立時才載入
+from google.api_core.exceptions import NotFound, NotModified, PreconditionFailed
+from news_store import NewsStore, CAS_MAX_ATTEMPTS, cas_backoff
+from news_format import IMMUTABLE_CACHE_CONTROL, encode_json, gzip_bytes
+from object_cache import DEFAULT_MAX_BYTES as DEFAULT_CACHE_BYTES, ObjectCache
+from feed_materializer import FeedMaterializer
+from search_index import SearchIndex
+from fetcher import ConditionalFetcher
+from dedup_index import DedupIndex
+from translation_cache import TranslationCache, cache_key
+from async_io import AsyncStorage, run_sync
+from thumbnails import ThumbnailStore, apply_manifest, thumbnails_enabled
 
 BUCKET_NAME = "lahsing-news-contents" # 請替換為您的 Bucket 名稱
+# 本機 lock 檔只在一次寫入期間存在；超過此時間即視為被中斷的 process 遺留
+LOCAL_LOCK_STALE_SECONDS = 30
 
 
 class StorageBackend:
-    """Wraps Google Cloud Storage with a local-filesystem fallback."""
-    def __init__(self, bucket_name: str):
+    """Wraps Google Cloud Storage with a local-filesystem fallback.
+
+    Downloads go through an in-process ``ObjectCache`` (see
+    ``object_cache.py``); ``cache_bytes=0`` turns it off.
+    """
+    def __init__(self, bucket_name: str, local_dir: str = None, local_only: bool = False,
+                 cache_bytes: int = DEFAULT_CACHE_BYTES):
         self.bucket_name = bucket_name
         self.use_local = False
-        self.local_dir = os.path.join(os.path.dirname(__file__), "local_storage")
+        self.local_dir = local_dir or os.path.join(os.path.dirname(__file__), "local_storage")
+        self.cache = ObjectCache(cache_bytes) if cache_bytes else None
+        if local_only:
+            self.use_local = True
+            os.makedirs(self.local_dir, exist_ok=True)
+            return
         try:
+            from google.cloud import storage
             self.client = storage.Client()
             self.bucket = self.client.bucket(bucket_name)
         except Exception as e:
-            print(f"[WARN] GCS client init failed ({e}); using local storage at {self.local_dir}.")
+            tracing.log(f"GCS client init failed ({e}); using local storage at {self.local_dir}.", severity="WARNING")
             self.use_local = True
             os.makedirs(self.local_dir, exist_ok=True)
 
     def _local_path(self, file_name: str) -> str:
-        return os.path.join(self.local_dir, file_name)
+        # Object names may contain "/" (e.g. news/segments/000001.json)
+        path = os.path.join(self.local_dir, *file_name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    # ------------------------------------------------------------------
+    # Generations (compare-and-swap)
+    # ------------------------------------------------------------------
+    # GCS object generations are used as-is. Locally the file's mtime in
+    # nanoseconds plays the same role; 0 means "does not exist" in both.
+
+    def _local_generation(self, path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @contextmanager
+    def _local_lock(self, path: str):
+        """Serialize check-and-write on ``path`` with a lock file.
+
+        The lock file records the holder's pid, host and time; a lock left
+        behind by a killed process (dead pid on this host, or older than
+        ``LOCAL_LOCK_STALE_SECONDS``) is broken instead of blocking every
+        later write.
+        """
+        lock_path = path + '.lock'
+        owner = json.dumps({"pid": os.getpid(), "host": socket.gethostname(), "time": time.time()})
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, 'w') as fh:
+                    fh.write(owner)
+                break
+            except FileExistsError:
+                if self._break_stale_lock(lock_path):
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {lock_path}")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    @staticmethod
+    def _break_stale_lock(lock_path: str) -> bool:
+        """Remove ``lock_path`` if its holder is gone; True if it was removed."""
+        try:
+            with open(lock_path, encoding='utf-8') as fh:
+                content = fh.read()
+            mtime = os.stat(lock_path).st_mtime
+        except FileNotFoundError:
+            return True
+        try:
+            holder = json.loads(content)
+            since = float(holder["time"])
+        except (ValueError, KeyError, TypeError):
+            # 尚未寫入內容 (剛建立) 或舊版的空 lock 檔：以 mtime 判斷
+            holder, since = {}, mtime
+        stale = time.time() - since > LOCAL_LOCK_STALE_SECONDS
+        if not stale and holder.get("host") == socket.gethostname():
+            try:
+                os.kill(int(holder["pid"]), 0)
+            except ProcessLookupError:
+                stale = True
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        if not stale:
+            return False
+        # 先改名再核對內容，避免兩個等待者同時清理時誤刪別人剛取得的新 lock
+        aside = f"{lock_path}.{os.getpid()}.{time.monotonic_ns()}.stale"
+        try:
+            os.rename(lock_path, aside)
+        except FileNotFoundError:
+            return True
+        with open(aside, encoding='utf-8') as fh:
+            replaced = fh.read() != content
+        if replaced:
+            try:
+                os.link(aside, lock_path)
+            except FileExistsError:
+                pass
+        else:
+            tracing.log(f"Removed stale lock {lock_path} ({content or 'empty'})", severity="WARNING")
+        os.remove(aside)
+        return True
+
+    def _write_local(self, file_name: str, data, if_generation_match: int = None) -> int:
+        """Atomically replace a local object with ``data`` (str or bytes).
+
+        The data is written to a temp file in the same directory, fsynced
+        and renamed over the target, so readers and a crash mid-write never
+        see a half-written file.  Returns the new generation.
+        """
+        path = self._local_path(file_name)
+        with self._local_lock(path) if if_generation_match is not None else nullcontext():
+            current = self._local_generation(path)
+            if if_generation_match is not None and current != if_generation_match:
+                raise PreconditionFailed(
+                    f"{path}: generation {current} does not match {if_generation_match}")
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                            dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    fh.write(data.encode('utf-8') if isinstance(data, str) else data)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                generation = self._local_generation(tmp_path)
+                # Make sure the generation moves even on coarse mtime clocks
+                # (the mtime survives the rename)
+                if generation <= current:
+                    generation = current + 1
+                    os.utime(tmp_path, ns=(generation, generation))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return generation
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _read(self, file_name: str):
+        """Return ``(text, generation)``; a missing object is ``("", 0)``.
+
+        One round trip: the body is requested directly (NotFound means
+        missing) and, when a copy is cached, only if the generation changed.
+        """
+        cached = self.cache.get(file_name) if self.cache else None
+        if cached and cached.immutable:
+            self.cache.record_hit(cached)
+            return cached.text, cached.generation
+        immutable = False
+        if self.use_local:
+            try:
+                fh = open(self._local_path(file_name), 'r', encoding='utf-8')
+            except FileNotFoundError:
+                self._invalidate(file_name)
+                return "", 0
+            with fh:
+                # fstat the open file so data and generation always match
+                generation = os.fstat(fh.fileno()).st_mtime_ns
+                if cached and cached.generation == generation:
+                    self.cache.record_hit(cached)
+                    return cached.text, generation
+                text = fh.read()
+        else:
+            blob = self.bucket.blob(file_name)
+            try:
+                if cached:
+                    text = blob.download_as_text(if_generation_not_match=cached.generation)
+                else:
+                    text = blob.download_as_text()
+            except NotModified:
+                self.cache.record_hit(cached)
+                return cached.text, cached.generation
+            except NotFound:
+                self._invalidate(file_name)
+                return "", 0
+            # generation / Cache-Control come from the download's response headers
+            generation = blob.generation
+            immutable = 'immutable' in (blob.cache_control or '')
+        tracing.incr("storage_bytes_downloaded", len(text.encode('utf-8')))
+        if self.cache:
+            self.cache.record_miss()
+            self.cache.put(file_name, generation, text, immutable=immutable)
+        return text, generation
 
+    def _cache_written(self, file_name: str, generation: int, text: str, cache_control: str = None):
+        if self.cache:
+            self.cache.put(file_name, generation, text,
+                           immutable=cache_control == IMMUTABLE_CACHE_CONTROL)
+
+    def _invalidate(self, file_name: str):
+        if self.cache:
+            self.cache.invalidate(file_name)
+
+    @tracing.timed("storage_download")
     def download_text(self, file_name: str) -> str:
+        text, _ = self._read(file_name)
+        return text.strip()
+
+    @tracing.timed("storage_upload")
+    def upload_text(self, file_name: str, content: str, if_generation_match: int = None):
+        """Upload text; with ``if_generation_match`` the write only succeeds if
+        the object is still at that generation (raises PreconditionFailed)."""
+        tracing.incr("storage_bytes_uploaded", len(content.encode('utf-8')))
+        self._invalidate(file_name)
         if self.use_local:
-            path = self._local_path(file_name)
-            if not os.path.exists(path):
-                return ""
-            with open(path, 'r', encoding='utf-8') as fh:
-                return fh.read().strip()
+            generation = self._write_local(file_name, content, if_generation_match)
+            self._cache_written(file_name, generation, content)
+            tracing.log(f"Uploaded {file_name} to local storage.", severity="DEBUG", object=file_name)
+            return
         blob = self.bucket.blob(file_name)
-        if not blob.exists():
-            return ""
-        return blob.download_as_text().strip()
+        blob.upload_from_string(content, content_type='text/plain',
+                                if_generation_match=if_generation_match)
+        self._cache_written(file_name, blob.generation, content)
+        tracing.log(f"Uploaded {file_name} to GCS.", severity="DEBUG", object=file_name)
+
+    @tracing.timed("storage_download")
+    def download_json(self, file_name: str) -> list:
+        """Parsed object; missing reads as ``[]``, and so does an unreadable
+        one (logged — writes that must not clobber it use
+        ``download_json_with_generation``)."""
+        try:
+            text, _ = self._read(file_name)
+            return json.loads(text) if text else []
+        except Exception as e:
+            tracing.log(f"Could not read {file_name}: {e}", severity="ERROR", object=file_name)
+            return []
+
+    @tracing.timed("storage_download")
+    def download_json_with_generation(self, file_name: str):
+        """Return ``(data, generation)``; a missing object is ``([], 0)``.
 
-    def upload_text(self, file_name: str, content: str):
+        Unlike ``download_json`` a corrupt object raises instead of reading
+        as empty, so a compare-and-swap never overwrites it with new data.
+        """
+        text, generation = self._read(file_name)
+        if not generation:
+            return [], 0
+        return json.loads(text), generation
+
+    @tracing.timed("storage_upload")
+    def upload_json(self, file_name: str, data: list, if_generation_match: int = None,
+                    compact: bool = False, cache_control: str = None):
+        """Upload JSON; ``if_generation_match=0`` means "create only".
+
+        ``compact`` writes minified JSON, gzip-encoded on GCS
+        (``Content-Encoding: gzip``). ``cache_control`` sets the object's
+        Cache-Control header (ignored locally).
+        """
+        json_data = encode_json(data, compact=compact)
+        self._invalidate(file_name)
         if self.use_local:
-            path = self._local_path(file_name)
-            with open(path, 'w', encoding='utf-8') as fh:
-                fh.write(content)
-            print(f"[INFO] Uploaded {file_name} to local storage.")
+            tracing.incr("storage_bytes_uploaded", len(json_data.encode('utf-8')))
+            generation = self._write_local(file_name, json_data, if_generation_match)
+            self._cache_written(file_name, generation, json_data, cache_control)
+            tracing.log(f"Saved {file_name} to local storage.", severity="DEBUG", object=file_name)
             return
         blob = self.bucket.blob(file_name)
-        blob.upload_from_string(content, content_type='text/plain')
-        print(f"[INFO] Uploaded {file_name} to GCS.")
+        if cache_control:
+            blob.cache_control = cache_control
+        payload = json_data.encode('utf-8')
+        if compact:
+            blob.content_encoding = 'gzip'
+            payload = gzip_bytes(payload)
+        tracing.incr("storage_bytes_uploaded", len(payload))
+        blob.upload_from_string(payload, content_type='application/json; charset=utf-8',
+                                if_generation_match=if_generation_match)
+        self._cache_written(file_name, blob.generation, json_data, cache_control)
+        tracing.log(f"Updated {file_name} on GCS.", severity="DEBUG", object=file_name)
 
-    def download_json(self, file_name: str) -> list:
+    @tracing.timed("storage_download")
+    def download_bytes(self, file_name: str) -> bytes:
+        """Raw object bytes (not cached); ``b""`` if the object does not exist."""
         try:
             if self.use_local:
-                path = self._local_path(file_name)
-                if not os.path.exists(path):
-                    return []
-                with open(path, 'r', encoding='utf-8') as fh:
-                    return json.load(fh)
-            blob = self.bucket.blob(file_name)
-            if not blob.exists():
-                return []
-            data = blob.download_as_text()
-            return json.loads(data)
-        except Exception:
-            return []
+                with open(self._local_path(file_name), 'rb') as fh:
+                    data = fh.read()
+            else:
+                data = self.bucket.blob(file_name).download_as_bytes()
+        except (FileNotFoundError, NotFound):
+            return b""
+        tracing.incr("storage_bytes_downloaded", len(data))
+        return data
 
-    def upload_json(self, file_name: str, data: list):
+    @tracing.timed("storage_upload")
+    def upload_bytes(self, file_name: str, payload: bytes, content_type: str,
+                     cache_control: str = None):
+        tracing.incr("storage_bytes_uploaded", len(payload))
+        self._invalidate(file_name)
         if self.use_local:
-            path = self._local_path(file_name)
-            with open(path, 'w', encoding='utf-8') as fh:
-                json.dump(data, fh, ensure_ascii=False, indent=2)
-            print(f"[INFO] Saved {file_name} to local storage.")
+            self._write_local(file_name, payload)
+            tracing.log(f"Saved {file_name} to local storage.", severity="DEBUG", object=file_name)
             return
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
         blob = self.bucket.blob(file_name)
-        blob.upload_from_string(json_data, content_type='application/json')
-        print(f"[INFO] Successfully updated {file_name} on GCS.")
+        if cache_control:
+            blob.cache_control = cache_control
+        blob.upload_from_string(payload, content_type=content_type)
+        tracing.log(f"Updated {file_name} on GCS.", severity="DEBUG", object=file_name)
+
+    def update_json(self, file_name: str, mutate, max_attempts: int = CAS_MAX_ATTEMPTS, **upload_kwargs):
+        """Optimistic read-modify-write of a JSON object.
+
+        ``mutate(data)`` returns the new value and may be called several
+        times; the write is retried with jittered backoff whenever another
+        writer got in first. ``upload_kwargs`` are passed to ``upload_json``.
+        """
+        for attempt in range(max_attempts):
+            data, generation = self.download_json_with_generation(file_name)
+            new_data = mutate(data)
+            try:
+                self.upload_json(file_name, new_data, if_generation_match=generation, **upload_kwargs)
+                return new_data
+            except PreconditionFailed:
+                tracing.log(f"Concurrent update of {file_name}; retrying ({attempt + 1}/{max_attempts}).",
+                            object=file_name)
+                cas_backoff(attempt)
+        raise PreconditionFailed(f"Gave up updating {file_name} after {max_attempts} attempts")
+
+    def delete(self, file_name: str):
+        self._invalidate(file_name)
+        if self.use_local:
+            path = self._local_path(file_name)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        try:
+            self.bucket.blob(file_name).delete()
+        except NotFound:
+            pass
 
 
-storage_backend = StorageBackend(BUCKET_NAME)
+# Module-level singletons, created on first use and reused by warm instances.
+storage_backend = None
+news_store = None
+feed_materializer = None
+fetcher = None
+dedup_index = None
+translation_cache = None
+thumbnail_store = None
+search_index = None
+
+
+def get_storage_backend() -> StorageBackend:
+    global storage_backend
+    if storage_backend is None:
+        storage_backend = StorageBackend(BUCKET_NAME)
+    return storage_backend
+
+
+def get_news_store() -> NewsStore:
+    global news_store
+    if news_store is None:
+        # PUBLISH_MSGPACK=1 額外輸出 news/head.msgpack (需要安裝 msgpack)
+        news_store = NewsStore(get_storage_backend(), emit_msgpack=os.environ.get("PUBLISH_MSGPACK") == "1")
+    return news_store
+
+
+def get_feed_materializer() -> FeedMaterializer:
+    global feed_materializer
+    if feed_materializer is None:
+        feed_materializer = FeedMaterializer(get_storage_backend())
+    return feed_materializer
+
+
+def get_search_index() -> SearchIndex:
+    global search_index
+    if search_index is None:
+        search_index = SearchIndex(get_storage_backend())
+    return search_index
+
+
+def get_fetcher() -> ConditionalFetcher:
+    global fetcher
+    if fetcher is None:
+        fetcher = ConditionalFetcher(get_storage_backend())
+    return fetcher
+
+
+def get_dedup_index() -> DedupIndex:
+    global dedup_index
+    if dedup_index is None:
+        dedup_index = DedupIndex(get_storage_backend())
+    return dedup_index
+
+
+def get_thumbnail_store() -> ThumbnailStore:
+    global thumbnail_store
+    if thumbnail_store is None:
+        thumbnail_store = ThumbnailStore(get_storage_backend())
+    return thumbnail_store
+
+
+def get_async_storage() -> AsyncStorage:
+    return AsyncStorage(get_storage_backend())
+
+
+def get_translation_cache() -> TranslationCache:
+    global translation_cache
+    if translation_cache is None:
+        translation_cache = TranslationCache(get_storage_backend())
+    return translation_cache
 
 def download_text_from_gcs(file_name: str) -> str:
     """從 GCS 下載純文字檔案 (用於讀取最後處理的 URL)"""
     try:
-        return storage_backend.download_text(file_name)
+        return get_storage_backend().download_text(file_name)
     except Exception as e:
-        print(f"[ERROR] download_text_from_gcs failed: {e}")
+        tracing.log(f"download_text_from_gcs failed: {e}", severity="ERROR", object=file_name)
         return ""
 
 def upload_text_to_gcs(file_name: str, content: str):
     """將純文字上傳到 GCS (用於記錄最後處理的 URL)"""
     try:
-        storage_backend.upload_text(file_name, content)
+        get_storage_backend().upload_text(file_name, content)
     except Exception as e:
-        print(f"[ERROR] upload_text_to_gcs failed: {e}")
+        tracing.log(f"upload_text_to_gcs failed: {e}", severity="ERROR", object=file_name)
+
+async def download_text_from_gcs_async(file_name: str) -> str:
+    try:
+        return await get_async_storage().download_text(file_name)
+    except Exception as e:
+        tracing.log(f"download_text_from_gcs failed: {e}", severity="ERROR", object=file_name)
+        return ""
+
+async def upload_text_to_gcs_async(file_name: str, content: str):
+    try:
+        await get_async_storage().upload_text(file_name, content)
+    except Exception as e:
+        tracing.log(f"upload_text_to_gcs failed: {e}", severity="ERROR", object=file_name)
 
 def download_json_from_gcs(file_name: str) -> list:
     """從 GCS 下載 news.json 並轉換為 Python List"""
     try:
-        return storage_backend.download_json(file_name)
+        return get_storage_backend().download_json(file_name)
     except Exception as e:
-        print(f"[ERROR] download_json_from_gcs failed: {e}")
+        tracing.log(f"download_json_from_gcs failed: {e}", severity="ERROR", object=file_name)
         return []
 
 def upload_json_to_gcs(file_name: str, data: list):
     """將 Python List 轉為 JSON 並上傳到 GCS"""
     try:
-        storage_backend.upload_json(file_name, data)
+        get_storage_backend().upload_json(file_name, data)
     except Exception as e:
-        print(f"[ERROR] upload_json_to_gcs failed: {e}")
+        tracing.log(f"upload_json_to_gcs failed: {e}", severity="ERROR", object=file_name)
 
 
 def assign_incremental_id(item: dict, current_list: list):
@@ -247,18 +792,211 @@ def assign_incremental_id(item: dict, current_list: list):
     return item
 
 
-import os
-from openai import OpenAI
+import llm_stream
+from llm_stream import translate_streaming, translate_streaming_async
+from chunked_translation import SINGLE_CALL_TOKENS, estimate_tokens, needs_chunking, translate_chunked
 
 # 初始化 OpenAI 客戶端
 # 建議在雲端環境變數中設定 OPENAI_API_KEY
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "您的_OPENAI_API_KEY"))
+client = None
+
+
+def get_openai_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "您的_OPENAI_API_KEY"))
+    return client
+
+
+# AsyncOpenAI 的連線池綁定在第一次使用它的 event loop (async_io 的背景 loop)
+async_client = None
+
+
+def get_async_openai_client():
+    global async_client
+    if async_client is None:
+        from openai import AsyncOpenAI
+        async_client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY", "您的_OPENAI_API_KEY"))
+    return async_client
+
+
+# 預設使用串流翻譯；設定 LLM_STREAMING=0 可改回一次過的呼叫
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "1") != "0"
+# 最近一次翻譯的 time-to-first-token / 總延遲
+last_llm_metrics = {}
+
+# 合併翻譯每個 chat completion 最多的新聞數及內容 token 數；較大的批次會分拆並同時送出
+BATCH_MAX_STORIES = max(2, int(os.environ.get("LLM_BATCH_MAX_STORIES", "4")))
+BATCH_MAX_TOKENS = 2 * SINGLE_CALL_TOKENS
+
+# Prompt 有修改時請更新版本號，舊的翻譯快取便不會再被使用
+PROMPT_VERSION = "mary-v1"
+
+
+def refresh_copied_fields(items: list, breaking_data: dict) -> list:
+    """Overwrite the fields the prompt copies verbatim from the input
+    (date / imageUrl / citations) so a cached translation matches the new URL."""
+    for item in items:
+        if isinstance(item, dict):
+            item['date'] = breaking_data['publishedAt']
+            item['imageUrl'] = breaking_data['imageUrl']
+            item['citations'] = [breaking_data['url']]
+    return items
+
 
 def translate_breaking_story(breaking_data: dict):
     """
-    將抓取的 9News 數據發送給 OpenAI gpt-4o-mini，獲取翻譯後的 JSON 陣列。
+    將抓取的突發新聞數據 (Guardian / ABC / SMH / 9News 等來源) 發送給 OpenAI gpt-4o-mini，獲取翻譯後的 JSON 陣列。
+
+    相同標題及內容的新聞 (例如只是 URL 改變) 會直接使用翻譯快取，不再呼叫 OpenAI。
     """
-    
+    key, cached = _cached_translation(breaking_data)
+    if cached:
+        return cached
+    result = _translate_with_openai(breaking_data)
+    _store_translation(key, result)
+    return result
+
+
+async def translate_breaking_story_async(breaking_data: dict):
+    """translate_breaking_story 的 asyncio 版本：短文章使用 AsyncOpenAI，長文章的分段翻譯在 thread 中並行。"""
+    key, cached = await asyncio.to_thread(_cached_translation, breaking_data)
+    if cached:
+        return cached
+    if needs_chunking(breaking_data.get('content', '')):
+        result = await asyncio.to_thread(translate_chunked, breaking_data, _translate_single, _translate_paragraphs)
+    else:
+        result = await _translate_single_async(breaking_data)
+    await asyncio.to_thread(_store_translation, key, result)
+    return result
+
+
+async def translate_breaking_stories_async(stories: list) -> list:
+    """Translate several stories; returns one item list (or None) per story.
+
+    Cached stories are reused and the remaining short stories share chat
+    completions whose JSON array has one element per story (at most
+    ``BATCH_MAX_STORIES`` stories / ``BATCH_MAX_TOKENS`` content tokens each;
+    the batches run concurrently).  Long stories (chunked translation) and
+    anything the batch reply does not cover are translated one by one.
+    """
+    lookups = await asyncio.gather(*(asyncio.to_thread(_cached_translation, s) for s in stories))
+    results = [cached for _, cached in lookups]
+    batch = [i for i, story in enumerate(stories)
+             if not results[i] and not needs_chunking(story.get('content', ''))]
+    groups = [group for group in _batch_groups(batch, stories) if len(group) > 1]
+    replies = await asyncio.gather(*(_translate_batch_async([stories[i] for i in group]) for group in groups))
+    for group, items in zip(groups, replies):
+        for i, item in zip(group, items):
+            if item:
+                results[i] = refresh_copied_fields([item], stories[i])
+                await asyncio.to_thread(_store_translation, lookups[i][0], results[i])
+    pending = [i for i, result in enumerate(results) if not result]
+    if pending:
+        singles = await asyncio.gather(*(translate_breaking_story_async(stories[i]) for i in pending))
+        for i, result in zip(pending, singles):
+            results[i] = result
+    return results
+
+
+def _batch_groups(indexes: list, stories: list) -> list:
+    """Split story indexes into batches bounded by story count and content tokens."""
+    groups, size = [], 0
+    for i in indexes:
+        tokens = estimate_tokens(stories[i].get('content', ''))
+        if not groups or len(groups[-1]) >= BATCH_MAX_STORIES or size + tokens > BATCH_MAX_TOKENS:
+            groups.append([])
+            size = 0
+        groups[-1].append(i)
+        size += tokens
+    return groups
+
+
+async def _translate_batch_async(stories: list) -> list:
+    """One chat completion for ``stories``; returns an item (or None) per story.
+
+    The reply is about as long as the input, so the time budget grows with
+    the batch's content (a single-call story gets ``LLM_TIME_BUDGET``).
+    """
+    tokens = sum(estimate_tokens(story.get('content', '')) for story in stories)
+    budget = llm_stream.DEFAULT_BUDGET * max(1.0, tokens / SINGLE_CALL_TOKENS)
+    items = await _complete_json_async(*_batch_prompt(stories), budget=budget)
+    if not isinstance(items, list):
+        return [None] * len(stories)
+    tracing.incr("llm_batched_stories", len(stories))
+    # 以 citations 配對；模型未保留輸入次序時仍能對應，否則按次序
+    by_url = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get('citations'), list) and item['citations']:
+            by_url.setdefault(item['citations'][0], item)
+    if all(story['url'] in by_url for story in stories):
+        return [by_url[story['url']] for story in stories]
+    if len(items) != len(stories):
+        tracing.log(f"Batch translation returned {len(items)} items for {len(stories)} stories.",
+                    severity="WARNING")
+        return [None] * len(stories)
+    return [item if isinstance(item, dict) else None for item in items]
+
+
+def _cached_translation(breaking_data: dict):
+    """Return ``(cache key, cached items or None)``."""
+    key = cache_key(breaking_data['title'], breaking_data['content'], PROMPT_VERSION)
+    translation_cache = get_translation_cache()
+    try:
+        cached = translation_cache.get(key)
+    except Exception as e:
+        tracing.log(f"Translation cache read failed: {e}", severity="WARNING")
+        cached = None
+    if cached:
+        tracing.log("Translation cache hit.", stats=dict(translation_cache.stats))
+        return key, refresh_copied_fields(cached, breaking_data)
+    return key, None
+
+
+def _store_translation(key: str, result):
+    if isinstance(result, list) and result:
+        try:
+            get_translation_cache().put(key, result)
+        except Exception as e:
+            tracing.log(f"Translation cache write failed: {e}", severity="WARNING")
+
+
+def _translate_with_openai(breaking_data: dict):
+    """長文章分段並行翻譯，短文章維持單一呼叫。"""
+    if needs_chunking(breaking_data.get('content', '')):
+        return translate_chunked(breaking_data, _translate_single, _translate_paragraphs)
+    return _translate_single(breaking_data)
+
+
+def _translate_paragraphs(text: str):
+    """將一段英文段落翻譯成繁體中文純文字 (用於長文章的分段翻譯)。"""
+    system_prompt = "你是一位住在悉尼的資深香港新聞記者 Mary。你負責將英文突發新聞翻譯為繁體中文（香港書面語）。"
+    user_content = (
+        "將以下英文新聞段落完整翻譯為繁體中文（香港書面語）。每段譯文佔一行，保持原有分段次序。"
+        "內容中請用單引號 '。只輸出譯文，不要任何說明。\n\n" + text
+    )
+    try:
+        with tracing.span("openai", mode="chunk"):
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.3,
+                timeout=llm_stream.DEFAULT_BUDGET,
+            )
+        text = response.choices[0].message.content.strip()
+        tracing.record_llm_usage(getattr(response, 'usage', None), system_prompt + user_content, text)
+        return text
+    except Exception as e:
+        tracing.log(f"OpenAI chunk translation failed: {e}", severity="ERROR")
+        return None
+
+
+def _story_prompt(breaking_data: dict):
+    """Return ``(system_prompt, user_content)`` for a full-story translation."""
     # 這是我們精心調校的「Mary」新聞記者 Prompt
     system_prompt = "你是一位住在悉尼的資深香港新聞記者 Mary。你負責將英文突發新聞轉換為繁體中文（香港書面語）的 JSON 數據。"
     
@@ -286,27 +1024,125 @@ def translate_breaking_story(breaking_data: dict):
     - 輸出必須是且僅是一個 JSON array。
     - 嚴禁使用 Markdown 代碼塊標記 (不要出現 ```json)。
     """
+    return system_prompt, user_content
+
+
+def _batch_prompt(stories: list):
+    """Return ``(system_prompt, user_content)`` translating ``stories`` in one reply."""
+    system_prompt = "你是一位住在悉尼的資深香港新聞記者 Mary。你負責將英文突發新聞轉換為繁體中文（香港書面語）的 JSON 數據。"
+    inputs = "\n".join(
+        f"""
+    [{n}]
+    - publishedAt: {story['publishedAt']}
+    - title: {story['title']}
+    - content: {story['content']}
+    - url: {story['url']}
+    - urlToImage: {story['imageUrl']}"""
+        for n, story in enumerate(stories, 1))
+
+    user_content = f"""
+    **任務：** 生成一個符合規範的 JSON array，共 {len(stories)} 個元素 [{{...}}, ...]，依輸入次序每則新聞一個元素。
 
+    **輸入數據：**
+    {inputs}
+
+    **每個元素的輸出欄位要求：**
+    1. date: 使用該則新聞的 publishedAt。
+    2. title: 以 **【突發】** 開頭，撰寫吸睛標題。
+    3. summary: 簡短摘要。
+    4. articleDetail: 完整翻譯內容並保持分段 (用 \\n 分隔)。內容中請用單引號 '。
+    5. region: 選擇最貼切的澳洲主要城市，例如「雪梨」、「墨爾本」等。如果新聞涉及全澳洲,使用「澳洲」。如果是國際新聞，使用「國際」。(繁體中文)。
+    6. category: "突發"。
+    7. imageUrl: 直接複製該則新聞的 urlToImage，嚴禁 Markdown 格式。
+    8. citations: 將該則新聞的 url 放入單元素陣列 ["..."]。
+
+    **【強制格式】**
+    - 輸出必須是且僅是一個 JSON array，元素數目必須等於輸入新聞數目。
+    - 嚴禁使用 Markdown 代碼塊標記 (不要出現 ```json)。
+    """
+    return system_prompt, user_content
+
+
+def _translate_single(breaking_data: dict):
+    system_prompt, user_content = _story_prompt(breaking_data)
+    try:
+        if LLM_STREAMING:
+            # 串流模式：邊收邊檢查 JSON 格式，格式錯誤即中止並以更嚴格的指示重試
+            with tracing.span("openai", mode="stream"):
+                result = translate_streaming(get_openai_client(), system_prompt, user_content, model="gpt-4o-mini")
+            return _parse_stream_result(result, system_prompt, user_content)
+
+        with tracing.span("openai", mode="blocking"):
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4o-mini", # 使用效能與速度平衡的 mini 模型
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.3, # 降低隨機性，確保格式穩定
+            )
+        return _parse_completion(response, system_prompt, user_content)
+
+    except Exception as e:
+        tracing.log(f"OpenAI API call failed: {e}", severity="ERROR")
+        return None
+
+
+async def _translate_single_async(breaking_data: dict):
+    return await _complete_json_async(*_story_prompt(breaking_data))
+
+
+async def _complete_json_async(system_prompt: str, user_content: str, budget: float = None):
+    """Send one translation prompt with AsyncOpenAI and parse the JSON array reply.
+
+    ``budget`` defaults to ``LLM_TIME_BUDGET`` seconds.
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini", # 使用效能與速度平衡的 mini 模型
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ],
-            temperature=0.3, # 降低隨機性，確保格式穩定
-        )
-        
-        raw_text = response.choices[0].message.content.strip()
-        
-        # 使用我們之前寫好的 parse_json_safely 進行解析
-        return parse_json_safely(raw_text)
+        if LLM_STREAMING:
+            with tracing.span("openai", mode="stream"):
+                result = await translate_streaming_async(get_async_openai_client(), system_prompt, user_content,
+                                                         model="gpt-4o-mini", budget=budget)
+            return _parse_stream_result(result, system_prompt, user_content)
+
+        with tracing.span("openai", mode="blocking"):
+            response = await get_async_openai_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.3,
+                timeout=budget if budget is not None else llm_stream.DEFAULT_BUDGET,
+            )
+        return _parse_completion(response, system_prompt, user_content)
 
     except Exception as e:
-        print(f"[ERROR] OpenAI API call failed: {e}")
+        tracing.log(f"OpenAI API call failed: {e}", severity="ERROR")
         return None
 
 
+def _parse_stream_result(result, system_prompt: str, user_content: str):
+    tracing.record_llm_usage(result.usage, system_prompt + user_content, result.text)
+    last_llm_metrics.clear()
+    last_llm_metrics.update(result.metrics)
+    ttft = result.metrics.get('ttft')
+    tracing.log(f"LLM latency: ttft={ttft if ttft is None else round(ttft, 3)}s "
+                f"total={result.metrics['total']:.3f}s", ttft=ttft, total=result.metrics['total'],
+                attempts=result.metrics['attempts'], ok=result.ok)
+    if not result.text:
+        tracing.log(f"OpenAI streaming failed: {result.error}", severity="ERROR")
+        return None
+    return parse_json_safely(result.text)
+
+
+def _parse_completion(response, system_prompt: str, user_content: str):
+    raw_text = response.choices[0].message.content.strip()
+    tracing.record_llm_usage(getattr(response, 'usage', None), system_prompt + user_content, raw_text)
+
+    # 使用我們之前寫好的 parse_json_safely 進行解析
+    return parse_json_safely(raw_text)
+
+
 def parse_json_safely(raw_text: str):
     """Try to extract and parse a JSON array from possibly noisy LLM output.
 
@@ -336,5 +1172,5 @@ def parse_json_safely(raw_text: str):
     except Exception:
         pass
 
-    print("[WARN] parse_json_safely: failed to parse JSON from LLM output")
-    return None
\ No newline at end of file
+    tracing.log("parse_json_safely: failed to parse JSON from LLM output", severity="WARNING")
+    return None
@@ -0,0 +1,108 @@
+"""Chunked, parallel translation for long articles.
+
+Long articles (especially when the body selector falls back to bare ``p``)
+make a single prompt slow and can truncate ``articleDetail``.  Here the
+paragraphs are split into token-bounded chunks:
+
+* the first chunk goes through the normal JSON call, which also produces
+  title / summary / region / category (the original headline plus the
+  lead paragraphs carry the facts those fields need; news copy puts them
+  first);
+* the remaining chunks are translated as plain text in parallel;
+* ``articleDetail`` is reassembled in paragraph order.
+
+A failed chunk is retried (``CHUNK_ATTEMPTS``); if it still fails the whole
+translation fails (returns None) rather than publishing, and caching, an
+article with paragraphs missing.
+
+End-to-end latency is then bounded by the slowest chunk, not the article
+length.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+CHUNK_TOKENS = 900          # upper bound per chunk
+SINGLE_CALL_TOKENS = 1500   # articles up to this size use one call
+MAX_PARALLEL = 4
+CHUNK_ATTEMPTS = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 ASCII chars per token, ~1 token per CJK char."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def split_paragraphs(content: str) -> list:
+    return [p.strip() for p in (content or "").split("\n\n") if p.strip()]
+
+
+def chunk_paragraphs(paragraphs: list, max_tokens: int = CHUNK_TOKENS) -> list:
+    """Group paragraphs into chunks of at most ``max_tokens`` (a single
+    oversized paragraph becomes its own chunk)."""
+    chunks, current, size = [], [], 0
+    for p in paragraphs:
+        n = estimate_tokens(p)
+        if current and size + n > max_tokens:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(p)
+        size += n
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def needs_chunking(content: str, threshold: int = SINGLE_CALL_TOKENS) -> bool:
+    return estimate_tokens(content or "") > threshold
+
+
+def translate_chunked(breaking_data: dict, translate_meta, translate_chunk,
+                      max_tokens: int = CHUNK_TOKENS, max_workers: int = MAX_PARALLEL,
+                      attempts: int = CHUNK_ATTEMPTS):
+    """Translate ``breaking_data`` in chunks; None if any part failed.
+
+    ``translate_meta(data)`` is the regular JSON translation (returns the
+    parsed list); ``translate_chunk(text)`` returns the translated text of
+    a few paragraphs, or None on failure.
+    """
+    chunks = chunk_paragraphs(split_paragraphs(breaking_data['content']), max_tokens)
+    lead = dict(breaking_data, content="\n\n".join(chunks[0]) if chunks else "")
+    rest = ["\n\n".join(c) for c in chunks[1:]]
+    tracing.log(f"Translating long article in {len(chunks)} chunks (max {max_workers} in parallel).",
+                chunks=len(chunks))
+    translate_meta, translate_chunk = tracing.propagate(translate_meta), tracing.propagate(translate_chunk)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rest) + 1))) as pool:
+        meta_future = pool.submit(translate_meta, lead)
+        chunk_futures = [pool.submit(translate_chunk, text) for text in rest]
+        items = meta_future.result()
+        translated = [_chunk_result(future) for future in chunk_futures]
+        if not items or not isinstance(items, list) or not isinstance(items[0], dict):
+            return items
+        for attempt in range(1, attempts):
+            failed = [i for i, text in enumerate(translated) if text is None]
+            if not failed:
+                break
+            tracing.log(f"Retrying {len(failed)} failed chunks (attempt {attempt + 1}/{attempts}).",
+                        severity="WARNING")
+            retries = {i: pool.submit(translate_chunk, rest[i]) for i in failed}
+            for i, future in retries.items():
+                translated[i] = _chunk_result(future)
+
+    if any(t is None for t in translated):
+        # 缺少任何一段都會令全文不完整：整篇翻譯視為失敗，不發布亦不快取
+        tracing.log("Chunk translation failed after retries; dropping the partial translation.", severity="ERROR")
+        return None
+    parts = [items[0].get('articleDetail', '')] + [t.strip() for t in translated]
+    items[0]['articleDetail'] = "\n".join(p for p in parts if p)
+    return items
+
+
+def _chunk_result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        tracing.log(f"Chunk translation failed: {e}", severity="WARNING")
+        return None
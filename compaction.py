@@ -0,0 +1,199 @@
+"""Retention tiering: compact cold news segments into monthly archives.
+
+The head and the newest ``keep_segments`` segments stay as they are (the hot
+window).  Every older segment is folded into gzip-compressed monthly archives::
+
+    news/archive/<YYYY-MM>/<min_id>-<max_id>.json.gz   items of one month, newest first
+
+Months come from the item ``date``; items without one go to ``undated``.  A
+month that already has an archive is merged into a new object (archives are
+keyed by id range and never overwritten).
+
+Steps:
+
+1. read the cold segments (threads) and check them against their manifest
+   entries,
+2. build, upload and re-read every month's archive in a process pool
+   (JSON encoding and gzip are CPU bound),
+3. verify that the archives hold exactly the ids of the cold segments plus
+   the archives they replace,
+4. swap the manifest with a compare-and-swap: compacted segments are
+   replaced by archive entries, segments sealed meanwhile are kept,
+5. delete the compacted segments and replaced archives.
+
+Nothing is swapped or deleted if a check fails, and ``dry_run`` stops after
+step 2 without uploading, reporting the expected byte savings.
+"""
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import tracing
+from news_format import IMMUTABLE_CACHE_CONTROL, MUTABLE_CACHE_CONTROL, encode_json, gzip_bytes
+from news_store import NewsStore
+
+HOT_SEGMENTS = 10
+UNDATED = "undated"
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}")
+
+
+class CompactionError(RuntimeError):
+    """A consistency check failed; the manifest was not changed."""
+
+
+def month_of(item: dict) -> str:
+    date = item.get('date') if isinstance(item, dict) else None
+    if isinstance(date, str) and _MONTH_RE.match(date):
+        return date[:7]
+    return UNDATED
+
+
+def _stored_size(text: str, gzipped: bool) -> int:
+    payload = text.encode('utf-8')
+    return len(gzip_bytes(payload)) if gzipped else len(payload)
+
+
+# ----------------------------------------------------------------------
+# Process pool worker
+# ----------------------------------------------------------------------
+_worker_store = None
+
+
+def _init_worker(bucket_name: str, local_dir: str, local_only: bool, prefix: str):
+    global _worker_store
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(bucket_name, local_dir=local_dir, local_only=local_only, cache_bytes=0)
+    _worker_store = NewsStore(backend, prefix=prefix)
+
+
+def compact_month(month: str, items: list, previous: list, dry_run: bool = False, store: NewsStore = None) -> dict:
+    """Build (and unless ``dry_run`` upload and re-read) the archive of one month.
+
+    ``previous`` are existing archive entries of the month to merge.
+    Returns the new manifest entry plus ``ids`` and ``raw_bytes``.
+    """
+    store = store or _worker_store
+    merged = list(items)
+    for entry in previous:
+        merged.extend(store.load_archive(entry))
+    merged.sort(key=lambda it: it['id'], reverse=True)
+    ids = [it['id'] for it in merged]
+    if len(set(ids)) != len(ids):
+        raise CompactionError(f"{month}: duplicate ids")
+
+    text = encode_json(merged, compact=True)
+    payload = gzip_bytes(text.encode('utf-8'))
+    entry = {"month": month, "key": store.archive_key(month, ids[-1], ids[0]),
+             "count": len(merged), "min_id": ids[-1], "max_id": ids[0], "bytes": len(payload)}
+    if not dry_run:
+        store.backend.upload_bytes(entry["key"], payload, content_type='application/gzip',
+                                   cache_control=IMMUTABLE_CACHE_CONTROL)
+        written = store.load_archive(entry)
+        if [it.get('id') for it in written] != ids:
+            raise CompactionError(f"{entry['key']}: read-back does not match what was written")
+    return {"entry": entry, "ids": ids, "raw_bytes": len(text.encode('utf-8'))}
+
+
+def _compact_month_task(args):
+    return compact_month(*args)
+
+
+# ----------------------------------------------------------------------
+# Job
+# ----------------------------------------------------------------------
+def compact(store: NewsStore, keep_segments: int = HOT_SEGMENTS, workers: int = None,
+            dry_run: bool = False, delete_sources: bool = True) -> dict:
+    """Compact every segment older than the newest ``keep_segments``; returns a report."""
+    backend = store.backend
+    manifest = store.load_manifest()
+    segments = sorted(manifest["segments"], key=lambda s: s["seq"])
+    cold = segments[:max(0, len(segments) - keep_segments)]
+    report = {"dry_run": dry_run, "segments": len(cold), "items": 0, "months": {},
+              "source_objects": len(cold), "source_bytes": 0, "archive_objects": 0, "archive_bytes": 0,
+              "manifest_bytes_before": len(encode_json(manifest).encode('utf-8'))}
+    if not cold:
+        tracing.log("Nothing to compact.")
+        return report
+
+    # 1. 讀取冷區 segments，並與 manifest 記錄核對
+    gzipped = store.compact and not backend.use_local
+
+    def load(seg):
+        items = store.load_segment(seg["seq"])
+        ids = [it.get('id') for it in items if isinstance(it, dict)]
+        if not ids or not all(isinstance(i, int) for i in ids):
+            raise CompactionError(f"segment {seg['seq']} is missing or has items without an integer id")
+        if len(ids) != seg["count"] or ("min_id" in seg and (min(ids), max(ids)) != (seg["min_id"], seg["max_id"])):
+            raise CompactionError(f"segment {seg['seq']} does not match its manifest entry")
+        return items, _stored_size(encode_json(items, compact=store.compact), gzipped)
+
+    by_month = {}
+    source_ids = set()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for items, size in pool.map(load, cold):
+            report["source_bytes"] += size
+            for item in items:
+                by_month.setdefault(month_of(item), []).append(item)
+                source_ids.add(item['id'])
+    report["items"] = len(source_ids)
+
+    previous = {}
+    for entry in manifest["archives"]:
+        if entry["month"] in by_month:
+            previous.setdefault(entry["month"], []).append(entry)
+    replaced = [entry for entries in previous.values() for entry in entries]
+    report["source_objects"] += len(replaced)
+    report["source_bytes"] += sum(entry.get("bytes", 0) for entry in replaced)
+
+    # 2. 每月一個工作，在 process pool 中並行
+    tasks = [(month, items, previous.get(month, []), dry_run) for month, items in sorted(by_month.items())]
+    spec = (backend.bucket_name, backend.local_dir, backend.use_local, store.prefix)
+    with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1),
+                             initializer=_init_worker, initargs=spec) as pool:
+        results = list(pool.map(_compact_month_task, tasks))
+
+    # 3. 核對：新 archives 的 ids 必須正好等於冷區 segments 加上被取代的 archives
+    expected = len(source_ids) + sum(entry["count"] for entry in replaced)
+    archived = [i for result in results for i in result["ids"]]
+    if len(archived) != expected or len(set(archived)) != expected or not source_ids <= set(archived):
+        raise CompactionError(f"archives hold {len(archived)} items, expected {expected}")
+    new_entries = [result["entry"] for result in results]
+    for result in results:
+        entry = result["entry"]
+        report["months"][entry["month"]] = {"items": entry["count"], "raw_bytes": result["raw_bytes"],
+                                            "archive_bytes": entry["bytes"]}
+    report["archive_objects"] = len(new_entries)
+    report["archive_bytes"] = sum(entry["bytes"] for entry in new_entries)
+
+    cold_seqs = {seg["seq"] for seg in cold}
+    replaced_keys = {entry["key"] for entry in replaced}
+
+    def swap(data):
+        current = store._normalize_manifest(data)
+        if not cold_seqs <= {s["seq"] for s in current["segments"]} or \
+                not replaced_keys <= {a["key"] for a in current["archives"]}:
+            raise CompactionError("the manifest changed underneath the compaction (another run?)")
+        current["segments"] = [s for s in current["segments"] if s["seq"] not in cold_seqs]
+        current["archives"] = sorted([a for a in current["archives"] if a["key"] not in replaced_keys]
+                                     + new_entries, key=lambda a: a["max_id"])
+        current["last_seq"] = max([current.get("last_seq", 0)] + list(cold_seqs))
+        return current
+
+    after = swap(json.loads(json.dumps(manifest)))
+    report["manifest_bytes_after"] = len(encode_json(after).encode('utf-8'))
+    report["saved_bytes"] = report["source_bytes"] - report["archive_bytes"]
+    if dry_run:
+        return report
+
+    # 4. 以 compare-and-swap 更新 manifest (期間新封存的 segments 會保留)
+    backend.update_json(store.manifest_key, swap, compact=store.compact, cache_control=MUTABLE_CACHE_CONTROL)
+    tracing.log(f"Compacted {len(cold)} segments into {len(new_entries)} monthly archives.")
+
+    # 5. 刪除已被取代的物件
+    if delete_sources:
+        for seq in sorted(cold_seqs):
+            backend.delete(store.segment_key(seq))
+        for key in replaced_keys:
+            backend.delete(key)
+    return report
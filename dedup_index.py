@@ -0,0 +1,235 @@
+"""Persisted index of recently published stories for deduplication.
+
+Replaces the single ``last_breaking_url.txt`` comparison: a story is a
+duplicate when either its normalized URL or its normalized title has been
+seen within the TTL.  Keys are 64-bit truncated SHA-1 digests, so the index
+is a compact hash set with O(1) lookups and a bounded size.
+
+``claim`` does not mark a story as seen: it takes a short lease
+(``DEFAULT_LEASE_TTL``) owned by this instance, and ``confirm`` turns the
+lease into a seen entry once the story is published.  A run that crashes or
+times out in between only holds the story back until the lease expires.
+
+Stored through ``StorageBackend`` as::
+
+    {"version": 2,
+     "entries": {"u:<hex>": <unix ts>, "t:<hex>": <unix ts>},
+     "leases": {"u:<hex>": {"owner": "<id>", "expires": <unix ts>}}}
+"""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+
+DEDUP_INDEX_FILE = "dedup_index.json"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+# 認領後須在此時間內發布 (翻譯、縮圖、上傳)，否則其他 run 可以重新認領
+DEFAULT_LEASE_TTL = 10 * 60
+
+
+def normalize_url(url: str) -> str:
+    """Lower-case scheme/host, drop query string, fragment and trailing slash."""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, '', ''))
+
+
+def normalize_title(title: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace."""
+    text = unicodedata.normalize('NFKC', title or "").casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class DedupIndex:
+    """URL / title hash set with TTL eviction and a size cap.
+
+    One instance is shared by the concurrently processed stories of a run
+    (``asyncio.to_thread`` workers), so ``entries`` is guarded by a lock and
+    the compare-and-swap writes are built from the stored document, never
+    from another thread's pending keys.
+    """
+
+    def __init__(self, backend=None, file_name: str = DEDUP_INDEX_FILE,
+                 ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 lease_ttl: float = DEFAULT_LEASE_TTL, owner: str = None):
+        self.backend = backend
+        self.file_name = file_name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lease_ttl = lease_ttl
+        self.owner = owner or uuid.uuid4().hex[:12]
+        self.entries = None
+        self.leases = {}
+        self._lock = threading.RLock()
+
+    def _keys(self, url: str = None, title: str = None) -> list:
+        keys = []
+        if url:
+            keys.append("u:" + _digest(normalize_url(url)))
+        norm_title = normalize_title(title)
+        if norm_title:
+            keys.append("t:" + _digest(norm_title))
+        return keys
+
+    def load(self) -> dict:
+        data = self.backend.download_json(self.file_name) if self.backend else {}
+        with self._lock:
+            self.entries = _stored_entries(data)
+            self.leases = _active_leases(data)
+            self.evict()
+            return self.entries
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self.entries is None:
+                self.load()
+
+    def contains(self, url: str = None, title: str = None) -> bool:
+        """True if the URL or the title was seen within the TTL or is leased."""
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            return any(self.entries.get(k, 0) > now - self.ttl
+                       or self.leases.get(k, {}).get("expires", 0) > now
+                       for k in self._keys(url, title))
+
+    def add(self, url: str = None, title: str = None, now: float = None):
+        self._ensure_loaded()
+        now = time.time() if now is None else now
+        with self._lock:
+            for k in self._keys(url, title):
+                self.entries[k] = now
+
+    def evict(self, now: float = None):
+        """Drop expired entries, then the oldest ones beyond ``max_entries``."""
+        with self._lock:
+            self.entries = self._evicted(self.entries, now)
+
+    def _evicted(self, entries: dict, now: float = None) -> dict:
+        now = time.time() if now is None else now
+        cutoff = now - self.ttl
+        entries = {k: ts for k, ts in entries.items() if ts > cutoff}
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda kv: kv[1], reverse=True)
+            entries = dict(newest[:self.max_entries])
+        return entries
+
+    def _payload(self, entries: dict, leases: dict) -> dict:
+        now = time.time()
+        return {"version": 2,
+                "entries": {k: int(ts) for k, ts in self._evicted(entries, now).items()},
+                "leases": {k: lease for k, lease in leases.items() if lease["expires"] > now}}
+
+    def _merge(self, data) -> dict:
+        """Merge the stored entries into ours and return the payload to store."""
+        with self._lock:
+            for k, ts in _stored_entries(data).items():
+                self.entries[k] = max(self.entries.get(k, 0), ts)
+            self.evict()
+            self.leases = _active_leases(data)
+            return self._payload(self.entries, self.leases)
+
+    def save(self):
+        """Persist with a compare-and-swap merge so parallel runs keep each other's entries."""
+        self._ensure_loaded()
+        self.evict()
+        if self.backend:
+            self.backend.update_json(self.file_name, self._merge)
+
+    def claim(self, url: str = None, title: str = None) -> bool:
+        """Atomically take a lease on a story.
+
+        Returns False when the story was already seen or another lease on it
+        is still active, so only one of several parallel instances goes on
+        to publish.  Follow with ``confirm`` after publishing, or ``release``.
+        """
+        self._ensure_loaded()
+        keys = self._keys(url, title)
+        if self.contains(url, title):
+            return False
+        if not self.backend:
+            with self._lock:
+                if self.contains(url, title):
+                    return False
+                self._take_lease(self.leases, keys, time.time())
+                return True
+        claimed = []
+
+        def mutate(data):
+            # 只根據已儲存的內容判斷：CAS 失敗後 mutate 會重跑，
+            # 本次先前的嘗試及其他 thread 尚未寫入的 keys 都不能算在內
+            entries, leases = _stored_entries(data), _active_leases(data)
+            now = time.time()
+            taken = any(entries.get(k, 0) > now - self.ttl or k in leases for k in keys)
+            claimed[:] = [not taken]
+            if not taken:
+                self._take_lease(leases, keys, now)
+            return self._payload(entries, leases)
+
+        self.backend.update_json(self.file_name, mutate)
+        if claimed[0]:
+            with self._lock:
+                self._take_lease(self.leases, keys, time.time())
+        return claimed[0]
+
+    def _take_lease(self, leases: dict, keys: list, now: float):
+        for k in keys:
+            leases[k] = {"owner": self.owner, "expires": int(now + self.lease_ttl)}
+
+    def confirm(self, url: str = None, title: str = None):
+        """Turn our lease into a seen entry (the story was published)."""
+        self.confirm_many([(url, title)])
+
+    def confirm_many(self, stories: list):
+        """``confirm`` several ``(url, title)`` pairs with one write."""
+        keys = [k for url, title in stories for k in self._keys(url, title)]
+        self._settle(keys, seen=True)
+
+    def release(self, url: str = None, title: str = None):
+        """Drop our lease on a story (e.g. the translation failed)."""
+        self._settle(self._keys(url, title), seen=False)
+
+    def _settle(self, keys: list, seen: bool):
+        """Remove our leases on ``keys``; with ``seen`` record the keys as published."""
+        self._ensure_loaded()
+
+        def apply(entries, leases, now):
+            for k in keys:
+                if leases.get(k, {}).get("owner") == self.owner:
+                    del leases[k]
+                if seen:
+                    entries[k] = now
+
+        with self._lock:
+            apply(self.entries, self.leases, time.time())
+        if not self.backend:
+            return
+
+        def mutate(data):
+            entries, leases = _stored_entries(data), _active_leases(data)
+            apply(entries, leases, time.time())
+            return self._payload(entries, leases)
+
+        self.backend.update_json(self.file_name, mutate)
+
+
+def _stored_entries(data) -> dict:
+    entries = data.get("entries", {}) if isinstance(data, dict) else {}
+    return {k: float(v) for k, v in entries.items()}
+
+
+def _active_leases(data) -> dict:
+    """Unexpired leases of a stored document (version 1 documents have none)."""
+    leases = data.get("leases", {}) if isinstance(data, dict) else {}
+    now = time.time()
+    return {k: dict(lease) for k, lease in leases.items()
+            if isinstance(lease, dict) and float(lease.get("expires", 0)) > now}
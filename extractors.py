@@ -0,0 +1,77 @@
+"""Fast homepage extraction without building a full BeautifulSoup tree.
+
+Finding the top story only needs the first ``a[data-link-name="article"]``,
+so ``ArticleLinkParser`` feeds the page to ``html.parser.HTMLParser`` in
+chunks and stops as soon as enough matching anchors have been closed.
+Callers should fall back to BeautifulSoup when nothing is found.
+
+With ``distinct=True`` the same story linked several times (headline,
+image, "live" kicker) is collected once, which is what top-N ingestion
+needs.
+"""
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 16 * 1024
+
+
+class ArticleLinkParser(HTMLParser):
+    """Collect ``(href, text)`` for anchors whose attribute matches."""
+
+    def __init__(self, limit: int = 1, attr: str = "data-link-name", value: str = "article",
+                 distinct: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.distinct = distinct
+        self._seen = set()
+        self.attr = attr
+        self.value = value
+        self.links = []
+        self._href = None
+        self._parts = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.links) >= self.limit
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a' or self._parts is not None or self.done:
+            return
+        attrs = dict(attrs)
+        if attrs.get(self.attr) == self.value:
+            self._href = attrs.get('href')
+            self._parts = []
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._parts is not None:
+            # Same joining rule as BeautifulSoup's get_text(strip=True)
+            text = "".join(p.strip() for p in self._parts if p.strip())
+            if not self.distinct:
+                self.links.append((self._href, text))
+            elif self._href and text and self._href not in self._seen:
+                # Skip repeats and text-less (image) anchors of the same story
+                self._seen.add(self._href)
+                self.links.append((self._href, text))
+            self._href = None
+            self._parts = None
+
+    def handle_data(self, data):
+        if self._parts is not None:
+            self._parts.append(data)
+
+
+def extract_article_links(html: str, limit: int = 1, distinct: bool = False) -> list:
+    """Return up to ``limit`` ``(href, title)`` pairs, stopping early."""
+    parser = ArticleLinkParser(limit=limit, distinct=distinct)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.links[:limit]
+
+
+def extract_top_story(html: str):
+    """Return ``(href, title)`` for the first article anchor, or None."""
+    links = extract_article_links(html, limit=1)
+    return links[0] if links else None
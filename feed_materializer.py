@@ -0,0 +1,166 @@
+"""Paginated and per-region / per-category feeds for clients.
+
+Layout in ``StorageBackend``::
+
+    feed/index.json                 {"page_size", "latest_page", "count", "regions", "categories"}
+    feed/page-0001.json             items with id 1..PAGE_SIZE, newest first
+    feed/page-0002.json             items with id PAGE_SIZE+1..2*PAGE_SIZE, ...
+    feed/region/<region>.json       latest FACET_SIZE items of one region
+    feed/category/<category>.json   latest FACET_SIZE items of one category
+
+Pages are bucketed by item id, so a new story only ever lands on the latest
+page; older pages are never rewritten.  Clients read ``feed/index.json`` and
+then ``page-<latest_page>`` (plus the one before it when the latest page is
+not yet full), or fetch e.g. ``feed/region/雪梨.json`` for the first items
+of one region in a single small request.
+"""
+import tracing
+from news_format import MUTABLE_CACHE_CONTROL
+
+FEED_PREFIX = "feed"
+PAGE_SIZE = 20
+FACET_SIZE = 100
+
+
+class FeedMaterializer:
+    """Keeps feed pages and facet indexes in sync with published items."""
+
+    def __init__(self, backend, prefix: str = FEED_PREFIX, page_size: int = PAGE_SIZE,
+                 facet_size: int = FACET_SIZE):
+        self.backend = backend
+        self.prefix = prefix
+        self.page_size = page_size
+        self.facet_size = facet_size
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}/index.json"
+
+    def page_number(self, item_id: int) -> int:
+        return (int(item_id) - 1) // self.page_size + 1
+
+    def page_key(self, page: int) -> str:
+        return f"{self.prefix}/page-{page:04d}.json"
+
+    def facet_key(self, facet: str, value: str) -> str:
+        safe = str(value).replace('/', '_').strip() or "未分類"
+        return f"{self.prefix}/{facet}/{safe}.json"
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+    def apply(self, item: dict):
+        """Add one published item; touches one page, two facet files and the index."""
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            tracing.log("Feed materializer skipped an item without an integer id.", severity="WARNING")
+            return
+        page = self.page_number(item['id'])
+        self._update_list(self.page_key(page), item, limit=None)
+        facets = {}
+        for facet in ("region", "category"):
+            value = item.get(facet)
+            if value:
+                self._update_list(self.facet_key(facet, value), item, limit=self.facet_size)
+                facets[facet] = value
+        self._update_index(page, facets)
+
+    def remove(self, item: dict):
+        """Take a published item back out of its page, facet files and the index."""
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            return
+        self._update_list(self.page_key(self.page_number(item['id'])), item, remove=True)
+        facets = {}
+        for facet in ("region", "category"):
+            value = item.get(facet)
+            if value:
+                self._update_list(self.facet_key(facet, value), item, remove=True)
+                facets[facet] = value
+
+        def mutate(data):
+            index = self._normalize_index(data)
+            index["count"] = max(0, index["count"] - 1)
+            for facet, value in facets.items():
+                counts = index["regions" if facet == "region" else "categories"]
+                if counts.get(value, 0) > 1:
+                    counts[value] -= 1
+                else:
+                    counts.pop(value, None)
+            return index
+
+        self.backend.update_json(self.index_key, mutate, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+
+    def _update_list(self, key: str, item: dict, limit: int = None, remove: bool = False):
+        def mutate(data):
+            items = [it for it in (data if isinstance(data, list) else [])
+                     if not (isinstance(it, dict) and it.get('id') == item['id'])]
+            if remove:
+                return items
+            items.append(item)
+            items.sort(key=lambda it: it.get('id', 0) if isinstance(it, dict) else 0, reverse=True)
+            return items[:limit] if limit else items
+
+        self.backend.update_json(key, mutate, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+
+    def _update_index(self, page: int, facets: dict):
+        def mutate(data):
+            index = self._normalize_index(data)
+            index["latest_page"] = max(index["latest_page"], page)
+            index["count"] += 1
+            for facet, value in facets.items():
+                counts = index["regions" if facet == "region" else "categories"]
+                counts[value] = counts.get(value, 0) + 1
+            return index
+
+        self.backend.update_json(self.index_key, mutate, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+
+    def _normalize_index(self, data) -> dict:
+        index = data if isinstance(data, dict) else {}
+        index.setdefault("page_size", self.page_size)
+        index.setdefault("facet_size", self.facet_size)
+        index.setdefault("latest_page", 0)
+        index.setdefault("count", 0)
+        index.setdefault("regions", {})
+        index.setdefault("categories", {})
+        return index
+
+    # ------------------------------------------------------------------
+    # Full rebuild
+    # ------------------------------------------------------------------
+    def rebuild(self, items) -> dict:
+        """Rewrite every page, facet file and the index from ``items``.
+
+        Used for the initial backfill; items without an integer id are
+        skipped.
+        """
+        pages = {}
+        facets = {"region": {}, "category": {}}
+        index = self._normalize_index({})
+        skipped = 0
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+                skipped += 1
+                continue
+            pages.setdefault(self.page_number(item['id']), []).append(item)
+            index["count"] += 1
+            for facet, counts in (("region", index["regions"]), ("category", index["categories"])):
+                value = item.get(facet)
+                if value:
+                    facets[facet].setdefault(value, []).append(item)
+                    counts[value] = counts.get(value, 0) + 1
+
+        def newest_first(lst):
+            return sorted(lst, key=lambda it: it['id'], reverse=True)
+
+        for page, page_items in pages.items():
+            self.backend.upload_json(self.page_key(page), newest_first(page_items),
+                                     compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+        for facet, values in facets.items():
+            for value, facet_items in values.items():
+                self.backend.upload_json(self.facet_key(facet, value),
+                                         newest_first(facet_items)[:self.facet_size],
+                                         compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+        index["latest_page"] = max(pages) if pages else 0
+        self.backend.upload_json(self.index_key, index, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+        if skipped:
+            tracing.log(f"Skipped {skipped} items without an integer id.", severity="WARNING")
+        return index
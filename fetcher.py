@@ -0,0 +1,181 @@
+"""Shared HTTP fetch layer for the scrapers.
+
+* One pooled ``requests.Session`` per process so repeated runs on a warm
+  instance reuse TCP/TLS connections.
+* ``ConditionalFetcher`` remembers ``ETag`` / ``Last-Modified`` validators and
+  a SHA-256 of the last body per URL, persisted through ``StorageBackend``.
+  A ``304`` or an identical body lets the caller skip parsing entirely.
+
+``stats`` keeps the two savings apart: ``bytes_saved`` counts bytes a ``304``
+did not download, ``bytes_parse_skipped`` counts bytes of an identical ``200``
+body that were downloaded but not parsed.
+
+Validators are only persisted on ``commit()`` so a run that fails after the
+fetch (e.g. the OpenAI call) will download the page again next time.
+"""
+import hashlib
+import time
+
+import tracing
+
+FETCH_STATE_FILE = "fetch_state.json"
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_session = None
+
+
+def get_session():
+    """Return the process-wide pooled ``requests.Session``, creating it on first use."""
+    global _session
+    if _session is None:
+        # Imported here so a cold start does not pay for requests until the first fetch.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+        _session.headers.update(DEFAULT_HEADERS)
+    return _session
+
+
+class FetchResult:
+    """Outcome of a conditional fetch."""
+
+    def __init__(self, url, status_code, text="", not_modified=False, unchanged=False,
+                 elapsed=0.0, nbytes=0):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.not_modified = not_modified   # server answered 304
+        self.unchanged = unchanged         # 200 but same body hash as last time
+        self.elapsed = elapsed
+        self.nbytes = nbytes
+
+    @property
+    def skip(self) -> bool:
+        """True when the content is known to be identical to the last commit."""
+        return self.not_modified or self.unchanged
+
+
+class ConditionalFetcher:
+    """Conditional GETs with validators persisted via a StorageBackend."""
+
+    def __init__(self, backend=None, state_file: str = FETCH_STATE_FILE):
+        self.backend = backend
+        self.state_file = state_file
+        self._state = None
+        self._pending = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "not_modified": 0, "unchanged": 0, "changed": 0,
+                      "bytes_downloaded": 0, "bytes_saved": 0, "bytes_parse_skipped": 0,
+                      "latency_saved": 0.0}
+
+    def _load_state(self) -> dict:
+        if self._state is None:
+            data = self.backend.download_json(self.state_file) if self.backend else {}
+            self._state = data if isinstance(data, dict) else {}
+        return self._state
+
+    def get(self, url: str, headers: dict = None, timeout: float = 10):
+        """Plain GET through the pooled session."""
+        self.stats["requests"] += 1
+        response = get_session().get(url, headers=headers, timeout=timeout)
+        nbytes = len(_body_bytes(response))
+        self.stats["bytes_downloaded"] += nbytes
+        tracing.incr("http_requests")
+        tracing.incr("http_bytes_downloaded", nbytes)
+        return response
+
+    def fetch(self, url: str, headers: dict = None, timeout: float = 10) -> FetchResult:
+        """Conditional GET of ``url`` using the last committed validators."""
+        previous = self._load_state().get(url, {})
+        req_headers = dict(headers or {})
+        if previous.get("etag"):
+            req_headers['If-None-Match'] = previous["etag"]
+        if previous.get("last_modified"):
+            req_headers['If-Modified-Since'] = previous["last_modified"]
+
+        start = time.perf_counter()
+        response = get_session().get(url, headers=req_headers, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        self.stats["requests"] += 1
+        tracing.incr("http_requests")
+
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            tracing.incr("http_not_modified")
+            self._record_saving(previous, elapsed)
+            tracing.incr("http_bytes_saved", int(previous.get("length", 0)))
+            return FetchResult(url, 304, not_modified=True, elapsed=elapsed)
+
+        body = _body_bytes(response)
+        self.stats["bytes_downloaded"] += len(body)
+        tracing.incr("http_bytes_downloaded", len(body))
+        digest = hashlib.sha256(body).hexdigest()
+        resp_headers = getattr(response, 'headers', None) or {}
+        self._pending[url] = {
+            "etag": resp_headers.get('ETag', ''),
+            "last_modified": resp_headers.get('Last-Modified', ''),
+            "sha256": digest,
+            "length": len(body),
+            "elapsed": round(elapsed, 4),
+        }
+
+        unchanged = response.status_code == 200 and digest == previous.get("sha256")
+        if unchanged:
+            self.stats["unchanged"] += 1
+            self.stats["bytes_parse_skipped"] += len(body)
+            tracing.incr("http_bytes_parse_skipped", len(body))
+        else:
+            self.stats["changed"] += 1
+            tracing.incr("http_changed")
+        return FetchResult(url, response.status_code, text=response.text, unchanged=unchanged,
+                           elapsed=elapsed, nbytes=len(body))
+
+    def _record_saving(self, previous: dict, elapsed: float):
+        self.stats["bytes_saved"] += int(previous.get("length", 0))
+        self.stats["latency_saved"] += max(0.0, float(previous.get("elapsed", 0.0)) - elapsed)
+
+    def commit(self, urls=None):
+        """Persist validators gathered since the last commit.
+
+        ``urls`` limits the commit to those pages; other pending validators
+        stay pending (and are dropped by ``discard()``).
+        """
+        if urls is None:
+            urls = list(self._pending)
+        updates = {u: self._pending.pop(u) for u in urls if u in self._pending}
+        if not updates:
+            return
+        state = self._load_state()
+        state.update(updates)
+        if self.backend:
+            # Merge with validators committed by other instances meanwhile
+            def mutate(data):
+                merged = data if isinstance(data, dict) else {}
+                merged.update(updates)
+                return merged
+            self._state = self.backend.update_json(self.state_file, mutate)
+
+    def discard(self):
+        """Forget validators gathered in this run (e.g. after a failed publish)."""
+        self._pending = {}
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"requests={s['requests']} not_modified={s['not_modified']} unchanged={s['unchanged']} "
+                f"changed={s['changed']} "
+                f"downloaded={s['bytes_downloaded']}B saved={s['bytes_saved']}B "
+                f"parse_skipped={s['bytes_parse_skipped']}B "
+                f"latency_saved={s['latency_saved']:.3f}s")
+
+
+def _body_bytes(response) -> bytes:
+    content = getattr(response, 'content', None)
+    if isinstance(content, bytes):
+        return content
+    return (getattr(response, 'text', '') or '').encode('utf-8')
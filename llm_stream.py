@@ -0,0 +1,254 @@
+"""Streaming chat completions with incremental JSON-array validation.
+
+``JsonArrayValidator`` checks the completion as tokens arrive: the first
+non-blank character must be ``[`` and brackets/strings must stay balanced.
+As soon as the output cannot become a valid JSON array (e.g. the model
+starts with prose or a Markdown fence) the stream is closed and the request
+is retried once with a stricter instruction.  The stream is also closed as
+soon as the top-level array is complete.
+
+Every attempt runs under one overall time budget so the call fits inside
+the Cloud Function timeout; time-to-first-token and total latency are
+returned in ``StreamResult.metrics``.  ``stream_json_array_async`` and
+``translate_streaming_async`` do the same for an ``AsyncOpenAI`` client.
+"""
+import os
+import time
+
+import tracing
+
+DEFAULT_BUDGET = float(os.environ.get('LLM_TIME_BUDGET', '45'))
+RETRY_INSTRUCTION = ("上一次的輸出格式錯誤。請只輸出 JSON array：第一個字元必須是 [，最後一個字元必須是 ]，"
+                     "不要任何說明文字或 Markdown。")
+
+
+class JsonArrayValidator:
+    """Incremental, prefix-only validity check for a top-level JSON array."""
+
+    def __init__(self):
+        self.started = False
+        self.complete = False
+        self.invalid = None      # reason string once the prefix is invalid
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str):
+        for ch in text:
+            if self.invalid:
+                return
+            if self.complete:
+                if not ch.isspace():
+                    self.invalid = "trailing data after array"
+                continue
+            if not self.started:
+                if ch.isspace():
+                    continue
+                if ch != '[':
+                    self.invalid = f"output starts with {ch!r}, expected '['"
+                    continue
+                self.started = True
+                self._stack.append(']')
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in '[{':
+                self._stack.append(']' if ch == '[' else '}')
+            elif ch in ']}':
+                if not self._stack or self._stack.pop() != ch:
+                    self.invalid = f"unbalanced {ch!r}"
+                elif not self._stack:
+                    self.complete = True
+
+
+class StreamResult:
+    def __init__(self, text="", ok=False, error=None, metrics=None, usage=None):
+        self.text = text
+        self.ok = ok
+        self.error = error
+        self.metrics = metrics or {}
+        # Token usage when the API sent it (only on streams read to the end)
+        self.usage = usage
+
+
+class _StreamCollector:
+    """Validates one streamed completion chunk by chunk (shared by the sync
+    and async variants)."""
+
+    def __init__(self, start: float, deadline: float):
+        self.start = start
+        self.deadline = deadline
+        self.validator = JsonArrayValidator()
+        self.parts = []
+        self.error = None
+        self.usage = None
+        self.metrics = {"ttft": None, "total": None, "chunks": 0}
+
+    def feed(self, chunk) -> bool:
+        """Consume one chunk; True means stop reading the stream."""
+        self.usage = getattr(chunk, 'usage', None) or self.usage
+        if not chunk.choices:
+            return False
+        delta = chunk.choices[0].delta.content or ""
+        if not delta:
+            return False
+        if self.metrics["ttft"] is None:
+            self.metrics["ttft"] = time.monotonic() - self.start
+        self.metrics["chunks"] += 1
+        self.parts.append(delta)
+        self.validator.feed(delta)
+        if self.validator.invalid:
+            self.error = self.validator.invalid
+            return True
+        if self.validator.complete:
+            return True
+        if time.monotonic() > self.deadline:
+            self.error = "time budget exhausted"
+            return True
+        return False
+
+    def result(self) -> StreamResult:
+        self.metrics["total"] = time.monotonic() - self.start
+        error = self.error
+        if error is None and not self.validator.complete:
+            error = "stream ended before the array was complete"
+        return StreamResult("".join(self.parts).strip(), ok=error is None, error=error,
+                            metrics=self.metrics, usage=self.usage)
+
+
+def _start(deadline: float = None):
+    start = time.monotonic()
+    return start, (deadline if deadline is not None else start + DEFAULT_BUDGET)
+
+
+def stream_json_array(client, messages: list, model: str, temperature: float = 0.3,
+                      deadline: float = None) -> StreamResult:
+    """Run one streaming completion, validating the JSON array on the fly."""
+    start, deadline = _start(deadline)
+    remaining = deadline - start
+    if remaining <= 0:
+        return StreamResult(error="time budget exhausted", metrics={"ttft": None, "total": None, "chunks": 0})
+
+    collector = _StreamCollector(start, deadline)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        timeout=remaining,
+    )
+    try:
+        for chunk in stream:
+            if collector.feed(chunk):
+                break
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+    return collector.result()
+
+
+async def stream_json_array_async(client, messages: list, model: str, temperature: float = 0.3,
+                                  deadline: float = None) -> StreamResult:
+    """``stream_json_array`` for an ``AsyncOpenAI`` client."""
+    start, deadline = _start(deadline)
+    remaining = deadline - start
+    if remaining <= 0:
+        return StreamResult(error="time budget exhausted", metrics={"ttft": None, "total": None, "chunks": 0})
+
+    collector = _StreamCollector(start, deadline)
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        timeout=remaining,
+    )
+    try:
+        async for chunk in stream:
+            if collector.feed(chunk):
+                break
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            await close()
+    return collector.result()
+
+
+def _messages(system_prompt: str, user_content: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def _finish(result, start: float, first_ttft, attempts: int) -> StreamResult:
+    if result is None:
+        result = StreamResult(error="time budget exhausted")
+    result.metrics = {
+        "ttft": first_ttft,
+        "total": time.monotonic() - start,
+        "attempts": attempts,
+        "ok": result.ok,
+    }
+    return result
+
+
+def translate_streaming(client, system_prompt: str, user_content: str, model: str = "gpt-4o-mini",
+                        temperature: float = 0.3, budget: float = None) -> StreamResult:
+    """Stream a translation, retrying once with a tighter instruction.
+
+    The returned result carries the text of the last attempt (even when
+    invalid, so the caller can still try ``parse_json_safely``) and
+    aggregated metrics: ``ttft`` of the first attempt, ``total`` wall time
+    and the number of ``attempts``.
+    """
+    start = time.monotonic()
+    deadline = start + (budget if budget is not None else DEFAULT_BUDGET)
+    messages = _messages(system_prompt, user_content)
+    result = None
+    first_ttft = None
+    attempts = 0
+    for attempt in range(2):
+        if time.monotonic() >= deadline:
+            break
+        attempts += 1
+        result = stream_json_array(client, messages, model, temperature, deadline=deadline)
+        if first_ttft is None:
+            first_ttft = result.metrics.get("ttft")
+        if result.ok:
+            break
+        tracing.log(f"LLM stream attempt {attempt + 1} rejected: {result.error}", severity="WARNING")
+        messages = messages + [{"role": "user", "content": RETRY_INSTRUCTION}]
+    return _finish(result, start, first_ttft, attempts)
+
+
+async def translate_streaming_async(client, system_prompt: str, user_content: str, model: str = "gpt-4o-mini",
+                                    temperature: float = 0.3, budget: float = None) -> StreamResult:
+    """``translate_streaming`` for an ``AsyncOpenAI`` client."""
+    start = time.monotonic()
+    deadline = start + (budget if budget is not None else DEFAULT_BUDGET)
+    messages = _messages(system_prompt, user_content)
+    result = None
+    first_ttft = None
+    attempts = 0
+    for attempt in range(2):
+        if time.monotonic() >= deadline:
+            break
+        attempts += 1
+        result = await stream_json_array_async(client, messages, model, temperature, deadline=deadline)
+        if first_ttft is None:
+            first_ttft = result.metrics.get("ttft")
+        if result.ok:
+            break
+        tracing.log(f"LLM stream attempt {attempt + 1} rejected: {result.error}", severity="WARNING")
+        messages = messages + [{"role": "user", "content": RETRY_INSTRUCTION}]
+    return _finish(result, start, first_ttft, attempts)
@@ -1,11 +1,6 @@
 import functions_framework
-from google.cloud import storage
 import logging
 
-# 引入你之前寫好的邏輯
-# 確保 breaking_monitor.py 與 main.py 在同一個資料夾
-from breaking_monitor import process_breaking_news
-
 # 設定標準日誌紀錄，這在 Google Cloud Console 的 Log Explorer 中可以看到
 logging.basicConfig(level=logging.INFO)
 
@@ -18,6 +13,10 @@ def start_breaking_monitor(request):
     """
     logging.info("Breaking News Monitor triggered.")
 
+    # 引入你之前寫好的邏輯 (延遲到第一次觸發時才載入，permalink 的 cold start 不必付出這個成本)
+    # 確保 breaking_monitor.py 與 main.py 在同一個資料夾
+    from breaking_monitor import process_breaking_news
+
     try:
         # 執行核心邏輯：抓取、翻譯、更新 GCS
         # 注意：在雲端環境，不需要手動載入 JSON 金鑰，storage.Client() 會自動抓取權限
@@ -36,6 +35,89 @@ def start_breaking_monitor(request):
 # 本地測試用 (當你在 VS Code 直接執行 python main.py 時)
 # ---------------------------------------------------------
 
+PERMALINK_BATCH_MAX = 500
+PERMALINK_WORKERS = 10  # matches the GCS client's default HTTP pool size
+
+# 在 warm instance 之間重用同一個 GCS client (及其連線池)
+_storage_client = None
+
+
+def _get_bucket(bucket_name: str):
+    global _storage_client
+    if _storage_client is None:
+        from google.cloud import storage
+        _storage_client = storage.Client()
+    return _storage_client.bucket(bucket_name)
+
+
+def _check_uploader_auth(request):
+    """Return an error response if UPLOADER_SECRET is set and not matched, else None."""
+    from flask import jsonify
+    import os
+    expected = os.environ.get('UPLOADER_SECRET')
+    if expected:
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return (jsonify({'status': 'error', 'message': 'Missing Authorization header'}), 401)
+        token = auth.split(' ', 1)[1].strip()
+        if token != expected:
+            return (jsonify({'status': 'error', 'message': 'Forbidden'}), 403)
+    return None
+
+
+def _upload_permalink(bucket, data: dict) -> dict:
+    """Upload one snapshot to permalinks/{id}.json unless it already exists.
+
+    Uses if_generation_match=0 (create-only) instead of a separate exists()
+    round trip; an existing object is reported as skipped.
+    """
+    import json
+    import time
+    from google.api_core.exceptions import PreconditionFailed
+
+    start = time.perf_counter()
+    obj_id = str(data['id'])
+    object_name = f"permalinks/{obj_id}.json"
+    public_url = f"https://storage.googleapis.com/{bucket.name}/{object_name}"
+    result = {'id': obj_id, 'status': 'ok', 'public_url': public_url}
+    blob = bucket.blob(object_name)
+    try:
+        blob.upload_from_string(json.dumps(data, ensure_ascii=False), content_type='application/json',
+                                if_generation_match=0)
+        try:
+            blob.make_public()
+        except Exception:
+            logging.warning('make_public failed; continuing')
+    except PreconditionFailed:
+        result['status'] = 'skipped'
+        result['skipped'] = True
+    except Exception as e:
+        logging.exception('Permalink upload failed for %s', obj_id)
+        result = {'id': obj_id, 'status': 'error', 'message': str(e)}
+    result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def _latency_summary(results: list, total_ms: float) -> dict:
+    latencies = sorted(r['latency_ms'] for r in results)
+
+    def pct(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+    return {
+        'count': len(results),
+        'uploaded': sum(1 for r in results if r['status'] == 'ok'),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'errors': sum(1 for r in results if r['status'] == 'error'),
+        'total_ms': round(total_ms, 1),
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
 @functions_framework.http
 def permalink_handler(request):
     """POST /permalink
@@ -44,46 +126,121 @@ def permalink_handler(request):
     """
     from flask import jsonify
     import os
-    import json
     try:
-        # Auth check (optional)
-        expected = os.environ.get('UPLOADER_SECRET')
-        if expected:
-            auth = request.headers.get('Authorization', '')
-            if not auth.startswith('Bearer '):
-                return (jsonify({'status': 'error', 'message': 'Missing Authorization header'}), 401)
-            token = auth.split(' ', 1)[1].strip()
-            if token != expected:
-                return (jsonify({'status': 'error', 'message': 'Forbidden'}), 403)
+        denied = _check_uploader_auth(request)
+        if denied:
+            return denied
 
         data = request.get_json(silent=True)
         if not data or 'id' not in data:
             return (jsonify({'status': 'error', 'message': 'Missing id in payload'}), 400)
 
-        obj_id = str(data['id'])
-        object_name = f"permalinks/{obj_id}.json"
         bucket_name = os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents')
+        result = _upload_permalink(_get_bucket(bucket_name), data)
+        if result['status'] == 'error':
+            return (jsonify({'status': 'error', 'message': result['message']}), 500)
+        body = {'status': 'ok', 'public_url': result['public_url']}
+        if result.get('skipped'):
+            body['skipped'] = True
+        return (jsonify(body), 200)
+
+    except Exception as e:
+        logging.exception('Permalink upload failed')
+        return (jsonify({'status': 'error', 'message': str(e)}), 500)
 
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(object_name)
 
-        if blob.exists():
-            public_url = f"https://storage.googleapis.com/{bucket_name}/{object_name}"
-            return (jsonify({'status': 'ok', 'public_url': public_url, 'skipped': True}), 200)
+@functions_framework.http
+def permalink_batch_handler(request):
+    """POST /permalink/batch
+    Accepts a JSON array of snapshots (or {"snapshots": [...]}) and uploads
+    each to permalinks/{id}.json in parallel, skipping existing objects.
+    Returns per-item results and an aggregate latency summary.
+    Same Authorization rules as permalink_handler.
+    """
+    from flask import jsonify
+    from concurrent.futures import ThreadPoolExecutor
+    import os
+    import time
+    try:
+        denied = _check_uploader_auth(request)
+        if denied:
+            return denied
 
-        # Upload
-        blob.upload_from_string(json.dumps(data, ensure_ascii=False), content_type='application/json')
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('snapshots')
+        if not isinstance(data, list) or not data:
+            return (jsonify({'status': 'error', 'message': 'Expected a non-empty array of snapshots'}), 400)
+        if len(data) > PERMALINK_BATCH_MAX:
+            return (jsonify({'status': 'error',
+                             'message': f'At most {PERMALINK_BATCH_MAX} snapshots per batch'}), 413)
+
+        bucket_name = os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents')
+        bucket = _get_bucket(bucket_name)
+
+        start = time.perf_counter()
+        results = [None] * len(data)
+        jobs = []
+        for i, snapshot in enumerate(data):
+            if not isinstance(snapshot, dict) or 'id' not in snapshot:
+                results[i] = {'id': None, 'status': 'error', 'message': 'Missing id in payload', 'latency_ms': 0.0}
+            else:
+                jobs.append((i, snapshot))
+        with ThreadPoolExecutor(max_workers=min(PERMALINK_WORKERS, max(1, len(jobs)))) as pool:
+            for i, result in zip([i for i, _ in jobs],
+                                 pool.map(lambda job: _upload_permalink(bucket, job[1]), jobs)):
+                results[i] = result
+        summary = _latency_summary(results, (time.perf_counter() - start) * 1000)
+
+        status = 'ok' if summary['errors'] == 0 else 'partial'
+        return (jsonify({'status': status, 'results': results, 'summary': summary}), 200)
+
+    except Exception as e:
+        logging.exception('Permalink batch upload failed')
+        return (jsonify({'status': 'error', 'message': str(e)}), 500)
+
+SEARCH_LIMIT_MAX = 100
+
+# 搜尋用的 StorageBackend / NewsStore / SearchIndex，在 warm instance 之間重用
+_search = None
+
+
+def _get_search():
+    global _search
+    if _search is None:
+        import os
+        from breaking_monitor import StorageBackend
+        from news_store import NewsStore
+        from search_index import SearchIndex
+        backend = StorageBackend(os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+        _search = (SearchIndex(backend), NewsStore(backend))
+    return _search
+
+
+@functions_framework.http
+def search_handler(request):
+    """GET /search?q=<keywords>&limit=20
+    Keyword search over title / summary / articleDetail of the whole archive.
+    Reads only the search/ index shards of the query's tokens and the news
+    segments holding the matches; results are newest first.
+    """
+    from flask import jsonify
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return (jsonify({'status': 'error', 'message': 'Missing q parameter'}), 400)
         try:
-            blob.make_public()
-        except Exception:
-            logging.warning('make_public failed; continuing')
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return (jsonify({'status': 'error', 'message': 'limit must be an integer'}), 400)
+        limit = max(1, min(limit, SEARCH_LIMIT_MAX))
 
-        public_url = f"https://storage.googleapis.com/{bucket_name}/{object_name}"
-        return (jsonify({'status': 'ok', 'public_url': public_url}), 200)
+        index, news_store = _get_search()
+        results = index.search_items(query, news_store, limit=limit)
+        return (jsonify({'status': 'ok', 'query': query, 'count': len(results), 'results': results}), 200)
 
     except Exception as e:
-        logging.exception('Permalink upload failed')
+        logging.exception('Search failed')
         return (jsonify({'status': 'error', 'message': str(e)}), 500)
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+"""Wire formats for the objects clients download.
+
+* ``encode_json(data, compact=True)`` writes minified JSON (no indent, no
+  spaces after separators).  With Chinese text most of the old ``indent=2``
+  output was whitespace.
+* Compact objects are uploaded gzip-compressed with ``Content-Encoding:
+  gzip``; GCS still serves plain JSON to clients that do not accept gzip.
+* ``encode_msgpack`` produces an optional MessagePack sibling
+  (``head.msgpack``) next to the JSON, which stays the compatible default.
+  Requires the optional ``msgpack`` package.
+
+Cache-Control policy: mutable objects (head, manifest, feed pages) may be
+cached briefly and must then be revalidated against the GCS ``ETag``, which
+changes with every generation.  Sealed segments never change and are cached
+as immutable.
+"""
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+MUTABLE_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+GZIP_LEVEL = 6
+
+
+def encode_json(data, compact: bool = True) -> str:
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def gzip_bytes(payload: bytes) -> bytes:
+    # mtime=0 keeps the output deterministic for identical data
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def encode_msgpack(data) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed (pip install msgpack)")
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def decode_msgpack(payload: bytes):
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed (pip install msgpack)")
+    return msgpack.unpackb(payload, raw=False)
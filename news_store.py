@@ -0,0 +1,424 @@
+"""Sharded, append-only news store built on top of ``StorageBackend``.
+
+Instead of rewriting one ever-growing ``news.json`` on every post, the archive
+is split into these objects:
+
+    news/head.json              latest stories, newest first (what the app reads)
+    news/manifest.json          small index of sealed segments and counters
+    news/segments/000001.json   immutable blocks of SEGMENT_SIZE older stories
+    news/archive/2025-12/000101-000342.json.gz
+                                gzip-compressed monthly archives of compacted
+                                segments (see ``compaction.py``)
+
+Publishing one story (or a batch with ``publish_many``) reads and writes the
+head and the manifest; when the head overflows, its oldest SEGMENT_SIZE items
+are sealed into a new segment.  The number of bytes touched per publish is
+therefore bounded no matter how large the archive grows.
+
+A bucket that still only has the legacy ``news.json`` is migrated into the
+store by the first publish (see ``migrate_legacy``), so deploying before
+running ``scripts/migrate_news_store.py`` cannot restart the ids at 1.
+
+The manifest also carries ``last_id``, the persisted id counter, so id
+assignment does not depend on the archive size.
+
+Concurrent publishers are safe without a lock: ``head.json`` is the commit
+point and is written with ``if_generation_match`` (compare-and-swap).  The
+loser of a race re-reads the head and retries.  Segments are created with
+``if_generation_match=0`` and the manifest is updated afterwards with its own
+CAS loop; its updates (count + 1, max id, add segment) can be merged, so a
+retry never drops another writer's change.
+"""
+import gzip
+import json
+import random
+import time
+
+from google.api_core.exceptions import PreconditionFailed
+
+import tracing
+from news_format import IMMUTABLE_CACHE_CONTROL, MUTABLE_CACHE_CONTROL, encode_msgpack, msgpack_available
+
+HEAD_SIZE = 50
+SEGMENT_SIZE = 100
+NEWS_PREFIX = "news"
+LEGACY_KEY = "news.json"
+CAS_MAX_ATTEMPTS = 8
+
+
+def cas_backoff(attempt: int):
+    """Sleep before retrying a compare-and-swap that lost a race."""
+    time.sleep(min(2.0, 0.05 * (2 ** attempt)) * random.uniform(0.5, 1.5))
+
+
+class NewsStore:
+    """Head + manifest + immutable segments layout over a StorageBackend."""
+
+    def __init__(self, backend, prefix: str = NEWS_PREFIX,
+                 head_size: int = HEAD_SIZE, segment_size: int = SEGMENT_SIZE,
+                 compact: bool = True, emit_msgpack: bool = False, legacy_key: str = LEGACY_KEY):
+        self.backend = backend
+        self.prefix = prefix
+        self.legacy_key = legacy_key
+        self.head_size = head_size
+        self.segment_size = segment_size
+        # Minified + gzip-encoded JSON with Cache-Control for client objects
+        self.compact = compact
+        self.emit_msgpack = emit_msgpack
+        if emit_msgpack and not msgpack_available():
+            tracing.log("msgpack is not installed; skipping the MessagePack head.", severity="WARNING")
+            self.emit_msgpack = False
+
+    # ------------------------------------------------------------------
+    # Object names
+    # ------------------------------------------------------------------
+    @property
+    def head_key(self) -> str:
+        return f"{self.prefix}/head.json"
+
+    @property
+    def manifest_key(self) -> str:
+        return f"{self.prefix}/manifest.json"
+
+    def segment_key(self, seq: int) -> str:
+        return f"{self.prefix}/segments/{seq:06d}.json"
+
+    def archive_key(self, month: str, min_id: int, max_id: int) -> str:
+        # Keyed by id range, so re-compacting a month writes a new object
+        return f"{self.prefix}/archive/{month}/{min_id:06d}-{max_id:06d}.json.gz"
+
+    @property
+    def head_msgpack_key(self) -> str:
+        return f"{self.prefix}/head.msgpack"
+
+    def _upload(self, key: str, data, immutable: bool = False, **kwargs):
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL
+        self.backend.upload_json(key, data, compact=self.compact, cache_control=cache_control, **kwargs)
+
+    def _write_variants(self, head: list):
+        """Optional binary copy of the head for clients that support it."""
+        if self.emit_msgpack:
+            self.backend.upload_bytes(self.head_msgpack_key, encode_msgpack(head),
+                                      content_type='application/x-msgpack',
+                                      cache_control=MUTABLE_CACHE_CONTROL)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def load_manifest(self) -> dict:
+        return self._normalize_manifest(self.backend.download_json(self.manifest_key))
+
+    def _normalize_manifest(self, data) -> dict:
+        if not isinstance(data, dict):
+            data = {}
+        data.setdefault("version", 1)
+        data.setdefault("head_size", self.head_size)
+        data.setdefault("segment_size", self.segment_size)
+        data.setdefault("segments", [])
+        data.setdefault("archives", [])
+        data.setdefault("count", 0)
+        return data
+
+    def load_head(self) -> list:
+        data = self.backend.download_json(self.head_key)
+        return data if isinstance(data, list) else []
+
+    def load_segment(self, seq: int) -> list:
+        data = self.backend.download_json(self.segment_key(seq))
+        return data if isinstance(data, list) else []
+
+    def load_archive(self, entry: dict) -> list:
+        """Items of one monthly archive; raises if the object is missing."""
+        payload = self.backend.download_bytes(entry["key"])
+        if not payload:
+            raise FileNotFoundError(f"Archive {entry['key']} is missing")
+        return json.loads(gzip.decompress(payload).decode('utf-8'))
+
+    def iter_items(self):
+        """Yield every stored item, newest first, loading segments and
+        archives lazily."""
+        for item in self.load_head():
+            yield item
+        manifest = self.load_manifest()
+        for seg in sorted(manifest["segments"], key=lambda s: s["seq"], reverse=True):
+            for item in self.load_segment(seg["seq"]):
+                yield item
+        for entry in sorted(manifest["archives"], key=lambda a: a["max_id"], reverse=True):
+            for item in self.load_archive(entry):
+                yield item
+
+    def load_all(self) -> list:
+        return list(self.iter_items())
+
+    def load_items(self, ids) -> list:
+        """Items with the given ids, in the order of ``ids`` (missing ids are
+        skipped).  Reads the head and only the segments covering those ids."""
+        wanted = set(ids)
+        found = {}
+        for item in self.load_head():
+            if isinstance(item, dict) and item.get('id') in wanted:
+                found[item['id']] = item
+        missing = wanted - found.keys()
+        if missing:
+            manifest = self.load_manifest()
+            for seg in manifest["segments"] + manifest["archives"]:
+                if "min_id" not in seg or not any(seg["min_id"] <= i <= seg["max_id"] for i in missing):
+                    continue
+                items = self.load_archive(seg) if "key" in seg else self.load_segment(seg["seq"])
+                for item in items:
+                    if isinstance(item, dict) and item.get('id') in missing:
+                        found[item['id']] = item
+        return [found[i] for i in ids if i in found]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def next_id(self, manifest: dict, head: list) -> int:
+        """Next item id from the persisted counter.
+
+        The head always holds the newest (highest) ids, so it also covers a
+        manifest that lags behind the last committed head or predates the
+        counter.
+        """
+        return max(int(manifest.get("last_id", 0)), _max_id(head)) + 1
+
+    def snapshot(self) -> dict:
+        """Read the head (with its generation) and the manifest ahead of
+        ``publish``, e.g. while the story is still being translated."""
+        head, generation = self.backend.download_json_with_generation(self.head_key)
+        return {"head": head, "generation": generation, "manifest": self.load_manifest()}
+
+    def publish(self, item: dict, assign_id: bool = True, max_attempts: int = CAS_MAX_ATTEMPTS,
+                snapshot: dict = None) -> dict:
+        """Assign the next id to ``item`` and insert it at the front of the head.
+
+        Optimistic read-modify-write: if another publisher changed the head
+        in the meantime the whole step is retried on the fresh head.  A
+        ``snapshot()`` taken earlier saves the reads of the first attempt; if
+        it is stale the compare-and-swap fails and the head is read again.
+        """
+        return self.publish_many([item], assign_id, max_attempts, snapshot)[0]
+
+    def publish_many(self, items: list, assign_id: bool = True, max_attempts: int = CAS_MAX_ATTEMPTS,
+                     snapshot: dict = None) -> list:
+        """Publish several items (newest first, like the head) with one head write.
+
+        The last item gets the lowest new id, so the first one ends up on
+        top of the head.
+        """
+        legacy_checked = False
+        for attempt in range(max_attempts):
+            if snapshot is not None:
+                head, head_generation, manifest = snapshot["head"], snapshot["generation"], snapshot["manifest"]
+            else:
+                head, head_generation = self.backend.download_json_with_generation(self.head_key)
+                manifest = self.load_manifest()
+            if not head_generation and not legacy_checked:
+                # 尚未建立 head：先把舊的 news.json 遷移進來，避免 id 由 1 重新開始
+                legacy_checked = True
+                if self.migrate_legacy():
+                    snapshot = None
+                    continue
+            if not isinstance(head, list):
+                head = []
+            if assign_id:
+                first_id = self.next_id(manifest, head)
+                for offset, item in enumerate(reversed(items)):
+                    item['id'] = first_id + offset
+            head = list(items) + head
+
+            # Seal the oldest overflow first so sequence numbers follow publication order
+            segments = []
+            known = {"segments": list(manifest["segments"]), "last_seq": manifest.get("last_seq", 0)}
+            while len(head) >= self.head_size + self.segment_size:
+                sealed = head[-self.segment_size:]
+                del head[-self.segment_size:]
+                segment = self._seal_segment(known, sealed)
+                known["segments"].append(segment)
+                segments.append(segment)
+
+            try:
+                self._upload(self.head_key, head, if_generation_match=head_generation)
+            except PreconditionFailed:
+                tracing.log(f"{self.head_key} changed concurrently; retrying ({attempt + 1}/{max_attempts}).",
+                            object=self.head_key)
+                if snapshot is None:
+                    cas_backoff(attempt)
+                snapshot = None
+                continue
+            self._write_variants(head)
+            self._record_publish(items, segments)
+            return items
+        raise PreconditionFailed(f"Could not publish to {self.head_key} after {max_attempts} attempts")
+
+    def _seal_segment(self, manifest: dict, items: list) -> dict:
+        """Create the next segment object (create-only) and return its entry."""
+        # last_seq covers segments already compacted into archives
+        seq = max([s["seq"] for s in manifest["segments"]] + [manifest.get("last_seq", 0)]) + 1
+        while True:
+            try:
+                self._upload(self.segment_key(seq), items, immutable=True, if_generation_match=0)
+                break
+            except PreconditionFailed:
+                # Either our own earlier attempt already wrote these items, or
+                # the sequence number is taken (manifest lagging): try the next.
+                if self.load_segment(seq) == items:
+                    break
+                seq += 1
+        return _segment_entry(seq, items)
+
+    def _record_publish(self, items: list, segments: list = ()):
+        def mutate(data):
+            manifest = self._normalize_manifest(data)
+            manifest["count"] = int(manifest["count"]) + len(items)
+            manifest["last_id"] = max(int(manifest.get("last_id", 0)), _max_id(items))
+            known = {s["seq"] for s in manifest["segments"]}
+            for segment in segments:
+                if segment["seq"] not in known:
+                    manifest["segments"].append(segment)
+            return manifest
+
+        try:
+            self.backend.update_json(self.manifest_key, mutate, compact=self.compact,
+                                     cache_control=MUTABLE_CACHE_CONTROL)
+        except PreconditionFailed as e:
+            # The head is already committed; rebuild_counters() repairs this.
+            tracing.log(f"Manifest update failed after publish: {e}", severity="ERROR", object=self.manifest_key)
+
+    def migrate_from_list(self, items: list, force: bool = False) -> dict:
+        """Split a legacy newest-first ``news.json`` list into head + segments.
+
+        Segments are written oldest first so that sequence numbers follow
+        publication order.  Returns the resulting manifest.
+
+        Once the store exists ``news.json`` is stale, and migrating again
+        would drop every story published since: that raises
+        ``FileExistsError`` unless ``force`` is given.  The head and the
+        manifest are written with compare-and-swap, so a publish that lands
+        during the migration makes it fail instead of being overwritten.
+        """
+        _, manifest_generation = self.backend.download_json_with_generation(self.manifest_key)
+        if manifest_generation and not force:
+            raise FileExistsError(f"{self.manifest_key} already exists; the store was migrated before")
+        _, head_generation = self.backend.download_json_with_generation(self.head_key)
+        items = [it for it in (items or []) if isinstance(it, dict)]
+        manifest = {
+            "version": 1,
+            "head_size": self.head_size,
+            "segment_size": self.segment_size,
+            "segments": [],
+            "count": len(items),
+            "last_id": _max_id(items),
+        }
+        n_sealed = max(0, (len(items) - self.head_size) // self.segment_size) * self.segment_size
+        head = items[:len(items) - n_sealed]
+        older = items[len(items) - n_sealed:]
+        # `older` is newest first; seal from the oldest end.
+        for seq, end in enumerate(range(len(older), 0, -self.segment_size), start=1):
+            chunk = older[end - self.segment_size:end]
+            self._upload(self.segment_key(seq), chunk, immutable=True)
+            manifest["segments"].append(_segment_entry(seq, chunk))
+        self._upload(self.head_key, head, if_generation_match=head_generation)
+        self._write_variants(head)
+        self._upload(self.manifest_key, manifest, if_generation_match=manifest_generation)
+        return manifest
+
+    def migrate_legacy(self):
+        """Migrate ``legacy_key`` into a store that does not exist yet.
+
+        Returns the new manifest, or None when the store already exists,
+        there is no legacy list, or another process migrated it first.
+        """
+        _, manifest_generation = self.backend.download_json_with_generation(self.manifest_key)
+        if manifest_generation:
+            return None
+        items = self.backend.download_json(self.legacy_key)
+        if not isinstance(items, list) or not items:
+            return None
+        tracing.log(f"{self.manifest_key} is missing; migrating {len(items)} items from {self.legacy_key} "
+                    f"before the first publish.", severity="WARNING", object=self.legacy_key)
+        try:
+            return self.migrate_from_list(items)
+        except (FileExistsError, PreconditionFailed) as e:
+            tracing.log(f"{self.legacy_key} was migrated concurrently: {e}", object=self.legacy_key)
+            return None
+
+    def remove(self, item_id: int, max_attempts: int = CAS_MAX_ATTEMPTS):
+        """Take the item with ``item_id`` out of the head; returns it, or None
+        if the head does not hold it.
+
+        Sealed segments are immutable (and cached by clients as such), so
+        only items still in the head can be removed.
+        """
+        for attempt in range(max_attempts):
+            head, generation = self.backend.download_json_with_generation(self.head_key)
+            head = head if isinstance(head, list) else []
+            removed = [it for it in head if isinstance(it, dict) and it.get('id') == item_id]
+            if not removed:
+                return None
+            head = [it for it in head if not (isinstance(it, dict) and it.get('id') == item_id)]
+            try:
+                self._upload(self.head_key, head, if_generation_match=generation)
+            except PreconditionFailed:
+                tracing.log(f"{self.head_key} changed concurrently; retrying ({attempt + 1}/{max_attempts}).",
+                            object=self.head_key)
+                cas_backoff(attempt)
+                continue
+            self._write_variants(head)
+
+            def mutate(data):
+                manifest = self._normalize_manifest(data)
+                manifest["count"] = max(0, int(manifest["count"]) - len(removed))
+                return manifest
+
+            self.backend.update_json(self.manifest_key, mutate, compact=self.compact,
+                                     cache_control=MUTABLE_CACHE_CONTROL)
+            return removed[0]
+        raise PreconditionFailed(f"Could not update {self.head_key} after {max_attempts} attempts")
+
+    def rebuild_counters(self) -> dict:
+        """Recompute ``last_id`` / ``count`` (and segment id ranges) from the
+        stored data.  One-time repair for stores without a counter."""
+        head = self.load_head()
+
+        def mutate(data):
+            manifest = self._normalize_manifest(data)
+            last_id = _max_id(head)
+            count = len(head)
+            for i, seg in enumerate(manifest["segments"]):
+                items = self.load_segment(seg["seq"])
+                manifest["segments"][i] = _segment_entry(seg["seq"], items)
+                count += len(items)
+                last_id = max(last_id, _max_id(items))
+            # Archives were verified when they were written; trust their entries
+            for entry in manifest["archives"]:
+                count += entry["count"]
+                last_id = max(last_id, entry.get("max_id", 0))
+            manifest["last_id"] = last_id
+            manifest["count"] = count
+            return manifest
+
+        return self.backend.update_json(self.manifest_key, mutate, compact=self.compact,
+                                        cache_control=MUTABLE_CACHE_CONTROL)
+
+
+def _segment_entry(seq: int, items: list) -> dict:
+    entry = {"seq": seq, "count": len(items)}
+    ids = [it["id"] for it in items if isinstance(it, dict) and isinstance(it.get("id"), int)]
+    if ids:
+        entry["min_id"] = min(ids)
+        entry["max_id"] = max(ids)
+    return entry
+
+
+def _max_id(items: list) -> int:
+    """Largest integer id in ``items`` (0 if none); non-numeric ids are ignored."""
+    max_id = 0
+    for it in items or []:
+        if not isinstance(it, dict) or 'id' not in it:
+            continue
+        try:
+            max_id = max(max_id, int(it['id']))
+        except (TypeError, ValueError):
+            continue
+    return max_id
@@ -0,0 +1,85 @@
+"""In-process read-through cache for ``StorageBackend`` downloads.
+
+Entries are keyed by object name and tagged with the object generation they
+were read (or written) at.  ``StorageBackend`` revalidates an entry with a
+conditional download (``if_generation_not_match`` on GCS, one ``stat``
+locally): an unchanged object costs one round trip and no body, and is then
+served from memory.  Objects stored as immutable (sealed segments) are
+served without revalidation.
+
+The cache lives as long as the process, so warm instances keep it between
+invocations.  It holds at most ``max_bytes`` of payload (least recently used
+entries are evicted first); objects larger than ``max_entry_bytes`` are not
+cached.  ``stats`` (and the ``storage_cache_*`` tracing counters) count
+hits, misses, evictions and the bytes that did not have to be downloaded.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import tracing
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("STORAGE_CACHE_MB", "32")) * 2 ** 20)
+
+CacheEntry = namedtuple("CacheEntry", "generation text immutable size")
+
+
+class ObjectCache:
+    """Thread-safe LRU of ``name -> CacheEntry`` capped by payload bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entry_bytes: int = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4 if max_entry_bytes is None else max_entry_bytes
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_avoided": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Return the ``CacheEntry`` for ``name`` (or None) and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+            return entry
+
+    def record_hit(self, entry: CacheEntry):
+        self._count("hits")
+        self._count("bytes_avoided", entry.size)
+
+    def record_miss(self):
+        self._count("misses")
+
+    def put(self, name: str, generation: int, text: str, immutable: bool = False):
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            self._discard(name)
+            if not generation or size > self.max_entry_bytes:
+                return
+            self._entries[name] = CacheEntry(generation, text, immutable, size)
+            self.size += size
+            evicted = 0
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def invalidate(self, name: str):
+        with self._lock:
+            self._discard(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, name: str):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+        tracing.incr(f"storage_cache_{stat}", n)
@@ -0,0 +1,54 @@
+"""Compact old news segments into gzip-compressed monthly archives.
+
+Usage:
+    python scripts/compact_news.py --dry-run          # report the byte savings only
+    python scripts/compact_news.py                    # GCS (falls back to local_storage)
+    python scripts/compact_news.py --local --keep-segments 5 --workers 4
+
+The head and the newest --keep-segments segments are left alone; see
+compaction.py for the verification done before the manifest is swapped.
+Safe to run while the monitor is publishing.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compaction import HOT_SEGMENTS, compact  # noqa: E402
+from news_store import NewsStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--keep-segments', type=int, default=HOT_SEGMENTS,
+                        help='newest segments to keep uncompacted (hot window)')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per CPU)')
+    parser.add_argument('--dry-run', action='store_true', help='build the archives in memory and report only')
+    parser.add_argument('--keep-sources', action='store_true', help='do not delete the compacted segments')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    store = NewsStore(StorageBackend(args.bucket, local_only=args.local))
+    report = compact(store, keep_segments=args.keep_segments, workers=args.workers,
+                     dry_run=args.dry_run, delete_sources=not args.keep_sources)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{'Dry run: ' if args.dry_run else ''}{report['segments']} segments, {report['items']} items")
+    for month, row in sorted(report["months"].items()):
+        print(f"  {month:8} {row['items']:>6} items {row['raw_bytes']:>12} B raw {row['archive_bytes']:>10} B gzip")
+    if report["segments"]:
+        print(f"Objects: {report['source_objects']} -> {report['archive_objects']}")
+        print(f"Stored bytes: {report['source_bytes']} -> {report['archive_bytes']} (saves {report['saved_bytes']})")
+        print(f"Manifest bytes: {report['manifest_bytes_before']} -> {report['manifest_bytes_after']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
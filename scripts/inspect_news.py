@@ -1,14 +1,38 @@
-import json
-from google.cloud import storage
-KEY_PATH = r"C:\Users\felix\develop\flutter\projects\lahsing\lahsing-news-breaking\lahsing-480407-b9d3f83f4a49.json"
-BUCKET_NAME = "lahsing-news-contents"
-FILE_NAME = "news.json"
-
-client = storage.Client.from_service_account_json(KEY_PATH)
-bucket = client.bucket(BUCKET_NAME)
-blob = bucket.blob(FILE_NAME)
-text = blob.download_as_text()
-data = json.loads(text)
-print('Total items:', len(data))
-for i, item in enumerate(data[:10]):
-    print(i, item.get('title'))
+"""Print a summary of the news store and the latest stories.
+
+Usage:
+    python scripts/inspect_news.py              # GCS (falls back to local_storage)
+    python scripts/inspect_news.py --local --limit 20
+
+Reads only news/manifest.json and news/head.json.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_store import NewsStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--limit', type=int, default=10, help='number of head items to list')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    store = NewsStore(StorageBackend(args.bucket, local_only=args.local))
+    manifest = store.load_manifest()
+    head = store.load_head()
+    print('Total items:', manifest['count'])
+    print('Last id:', manifest.get('last_id'))
+    print(f"Head: {len(head)} items, segments: {len(manifest['segments'])}, archives: {len(manifest['archives'])}")
+    for item in head[:args.limit]:
+        print(item.get('id'), item.get('date', ''), item.get('title'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Print p50 / p95 latency per pipeline stage from persisted run summaries.
+
+Usage:
+    python scripts/latency_report.py                 # GCS (falls back to local_storage)
+    python scripts/latency_report.py --local --last 100
+    python scripts/latency_report.py --json          # machine-readable, for charts
+
+Reads ``metrics/recent.json`` written by ``process_breaking_news``.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracing import METRICS_PREFIX, latency_report  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--last', type=int, default=0, help='only the last N runs')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(args.bucket, local_only=args.local)
+    runs = backend.download_json(f"{METRICS_PREFIX}/recent.json")
+    runs = runs if isinstance(runs, list) else []
+    if args.last:
+        runs = runs[-args.last:]
+    report = latency_report(runs)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{len(runs)} runs")
+    print(f"{'stage':<20}{'runs':>6}{'p50 ms':>12}{'p95 ms':>12}")
+    for stage, row in sorted(report.items(), key=lambda kv: -kv[1]['p95_ms']):
+        print(f"{stage:<20}{row['runs']:>6}{row['p50_ms']:>12.1f}{row['p95_ms']:>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
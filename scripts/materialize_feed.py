@@ -0,0 +1,36 @@
+"""Rebuild the paginated feed and region/category indexes from the news store.
+
+Usage:
+    python scripts/materialize_feed.py            # GCS (falls back to local_storage)
+    python scripts/materialize_feed.py --local    # local_storage only
+
+Run once after deploying the feed, or to repair it; afterwards every publish
+updates the feed incrementally.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_materializer import FeedMaterializer  # noqa: E402
+from news_store import NewsStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(args.bucket, local_only=args.local)
+    index = FeedMaterializer(backend).rebuild(NewsStore(backend).iter_items())
+    print(f"Pages: {index['latest_page']}  items: {index['count']}")
+    print(f"Regions: {index['regions']}")
+    print(f"Categories: {index['categories']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Split the legacy news.json into the sharded news store layout.
+
+Usage:
+    python scripts/migrate_news_store.py            # GCS (falls back to local_storage)
+    python scripts/migrate_news_store.py --local    # local_storage only
+    python scripts/migrate_news_store.py --dry-run  # only print the plan
+
+The original news.json is left untouched, but the pipeline no longer updates
+it: once news/manifest.json exists, migrating again would overwrite every
+story published since.  That is refused unless --force is given.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_store import NewsStore, HEAD_SIZE, SEGMENT_SIZE  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--source', default='news.json', help='legacy object to split')
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--head-size', type=int, default=HEAD_SIZE)
+    parser.add_argument('--segment-size', type=int, default=SEGMENT_SIZE)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--force', action='store_true',
+                        help='replace an existing news store (stories published since the migration are lost)')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(args.bucket, local_only=args.local)
+    store = NewsStore(backend, head_size=args.head_size, segment_size=args.segment_size)
+
+    items = backend.download_json(args.source)
+    if not isinstance(items, list):
+        print(f"{args.source} is not a list; nothing to migrate.")
+        return 1
+
+    n_segments = max(0, (len(items) - args.head_size) // args.segment_size)
+    print(f"Total items: {len(items)}")
+    print(f"Head items: {len(items) - n_segments * args.segment_size}")
+    print(f"Segments: {n_segments} x {args.segment_size}")
+    existing = store.backend.download_json(store.manifest_key)
+    if existing:
+        print(f"{store.manifest_key} already exists ({existing.get('count')} items, last_id {existing.get('last_id')}).")
+    if args.dry_run:
+        return 0
+
+    try:
+        manifest = store.migrate_from_list(items, force=args.force)
+    except FileExistsError as e:
+        print(f"Refusing to migrate: {e}. Use --force to replace the news store.")
+        return 1
+    print(f"Migrated {manifest['count']} items into {store.prefix}/ ({len(manifest['segments'])} segments).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
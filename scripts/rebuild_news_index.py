@@ -0,0 +1,35 @@
+"""Recompute the news store's id counter and counts from the stored data.
+
+Usage:
+    python scripts/rebuild_news_index.py            # GCS (falls back to local_storage)
+    python scripts/rebuild_news_index.py --local    # local_storage only
+
+Run once after upgrading a store that was created without ``last_id``, or
+whenever the manifest is suspected to be out of sync with the segments.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_store import NewsStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import StorageBackend
+    store = NewsStore(StorageBackend(args.bucket, local_only=args.local))
+    before = store.load_manifest()
+    manifest = store.rebuild_counters()
+    print(f"last_id: {before.get('last_id')} -> {manifest['last_id']}")
+    print(f"count: {before.get('count')} -> {manifest['count']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
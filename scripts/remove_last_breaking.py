@@ -1,55 +1,79 @@
-import json
+"""Remove the latest breaking-news item from what clients read.
+
+Usage:
+    python scripts/remove_last_breaking.py              # GCS (falls back to local_storage)
+    python scripts/remove_last_breaking.py --local
+    python scripts/remove_last_breaking.py --id 123     # a specific item
+    python scripts/remove_last_breaking.py --dry-run    # only show the item
+
+The item is looked up through the search index (newest items mentioning
+突發; the head is scanned when the index is empty), so the archive is never
+downloaded.  It is taken out of news/head.json (the manifest count is
+updated), out of its feed page and region / category files, and its search
+postings are deleted.  Items already sealed into a segment cannot be removed.
+"""
+import argparse
+import os
 import sys
-from google.cloud import storage
 
-# Configuration
-KEY_PATH = r"C:\Users\felix\develop\flutter\projects\lahsing\lahsing-news-breaking\lahsing-480407-b9d3f83f4a49.json"
-BUCKET_NAME = "lahsing-news-contents"
-FILE_NAME = "news.json"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def main():
-    client = storage.Client.from_service_account_json(KEY_PATH)
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(FILE_NAME)
+from feed_materializer import FeedMaterializer  # noqa: E402
+from news_store import NewsStore  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
 
-    if not blob.exists():
-        print(f"{FILE_NAME} does not exist in bucket {BUCKET_NAME}.")
-        return 1
+BREAKING_PREFIX = '【突發】'
+CANDIDATES = 20
 
-    data_text = blob.download_as_text()
-    try:
-        data = json.loads(data_text)
-    except Exception as e:
-        print(f"Failed to parse {FILE_NAME}: {e}")
-        return 1
 
-    if not isinstance(data, list) or len(data) == 0:
-        print("news.json is empty or not a list; nothing to remove.")
-        return 0
+def find_breaking(items: list):
+    """Newest item whose title starts with 【突發】, else the newest mentioning 突發."""
+    titled = [it for it in items if isinstance(it, dict) and isinstance(it.get('title'), str)]
+    for item in titled:
+        if item['title'].startswith(BREAKING_PREFIX):
+            return item
+    for item in titled:
+        if '突發' in item['title']:
+            return item
+    return None
 
-    removed = None
 
-    # Prefer removing the most recent item (index 0) if it looks like a breaking news
-    first = data[0]
-    title = first.get('title', '') if isinstance(first, dict) else ''
-    if isinstance(title, str) and title.startswith('【突發】'):
-        removed = data.pop(0)
-    else:
-        # fallback: attempt to find an item with '突發' in the title
-        for i, item in enumerate(data):
-            t = item.get('title', '') if isinstance(item, dict) else ''
-            if isinstance(t, str) and '突發' in t:
-                removed = data.pop(i)
-                break
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--id', type=int, help='remove this item instead of the latest breaking one')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
 
-    if not removed:
-        print('No breaking-news item found to remove.')
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(args.bucket, local_only=args.local)
+    store = NewsStore(backend)
+    index = SearchIndex(backend)
+
+    if args.id is not None:
+        found = store.load_items([args.id])
+        item = found[0] if found else None
+    else:
+        # 由搜尋索引找出最新提及「突發」的新聞，只讀取相關的 shards 及 head
+        candidates = index.search_items('突發', store, limit=CANDIDATES) or store.load_head()
+        item = find_breaking(candidates)
+    if not item:
+        print('No matching breaking-news item found; nothing to remove.')
+        return 0
+    print(f"Removing {item.get('id')}: {item.get('title')}")
+    if args.dry_run:
         return 0
 
-    # upload modified list back to GCS
-    blob.upload_from_string(json.dumps(data, ensure_ascii=False, indent=2), content_type='application/json')
+    removed = store.remove(item['id'])
+    if not removed:
+        print(f"Item {item['id']} is no longer in the head (sealed or removed concurrently).")
+        return 1
+    FeedMaterializer(backend).remove(removed)
+    index.remove(removed)
     print(f"Removed breaking item: {removed.get('title')}")
     return 0
 
+
 if __name__ == '__main__':
     sys.exit(main())
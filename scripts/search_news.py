@@ -0,0 +1,57 @@
+"""Keyword search over the news archive through the search index.
+
+Usage:
+    python scripts/search_news.py 突發 雪梨            # GCS (falls back to local_storage)
+    python scripts/search_news.py --local --limit 5 "New South Wales"
+    python scripts/search_news.py --rebuild [--local]  # backfill / repair the index
+
+Only the index shards of the query's tokens and the segments holding the
+matches are downloaded.  Run ``--rebuild`` once after deploying the index;
+afterwards every publish updates it incrementally.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_store import NewsStore  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('query', nargs='*', help='keywords (all must match)')
+    parser.add_argument('--bucket', default=os.environ.get('GCS_BUCKET_NAME', 'lahsing-news-contents'))
+    parser.add_argument('--local', action='store_true', help='use local_storage instead of GCS')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--ids', action='store_true', help='print matching ids only (no item download)')
+    parser.add_argument('--rebuild', action='store_true', help='rebuild the index from the news store')
+    args = parser.parse_args(argv)
+    if not args.rebuild and not args.query:
+        parser.error('a query or --rebuild is required')
+
+    from breaking_monitor import StorageBackend
+    backend = StorageBackend(args.bucket, local_only=args.local)
+    index = SearchIndex(backend)
+    news_store = NewsStore(backend)
+
+    if args.rebuild:
+        result = index.rebuild(news_store.iter_items())
+        print(f"Indexed up to id {result['last_id']} in {result['last_block'] + 1} block(s)")
+        return 0
+
+    query = ' '.join(args.query)
+    if args.ids:
+        for item_id in index.search(query, limit=args.limit):
+            print(item_id)
+        return 0
+    results = index.search_items(query, news_store, limit=args.limit)
+    for item in results:
+        print(f"{item.get('id')}\t{item.get('date', '')}\t{item.get('title')}")
+    print(f"{len(results)} result(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
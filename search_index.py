@@ -0,0 +1,275 @@
+"""Keyword search over the news archive without downloading it.
+
+Text (``title``, ``summary``, ``articleDetail``) is tokenized into Chinese
+character bigrams (``"雪梨發生"`` -> ``雪梨 梨發 發生``) plus lower-cased
+Latin words and numbers.  Postings are stored in small shards::
+
+    search/index.json                  {"block_size", "shards", "last_block", "last_id"}
+    search/b000000/s07.json            {token: [id gaps...]} for ids 1..BLOCK_SIZE
+    search/b000001/s07.json            ids BLOCK_SIZE+1..2*BLOCK_SIZE, ...
+
+A token's shard is ``crc32(token) % shards``; its posting list holds the ids
+of the block in ascending order, delta-encoded from the block start.  Like
+feed pages, blocks are keyed by id, so a publish only rewrites shards of the
+newest block and an older block never changes again.
+
+A query reads only the shards of its own tokens, newest block first, and
+stops once it has enough matches.  Bigram postings can over-match a phrase
+(``雪梨`` and ``梨發`` in different sentences), so ``search_items``
+re-checks the loaded items.  A lone CJK character in a query only matches
+where it also stands alone in the text (queries need two characters).
+"""
+import re
+import unicodedata
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from news_format import MUTABLE_CACHE_CONTROL
+
+SEARCH_PREFIX = "search"
+BLOCK_SIZE = 200
+SHARDS = 16
+SEARCH_FIELDS = ("title", "summary", "articleDetail")
+WORKERS = 8
+
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    # NFKC 把全形英數字轉為半形
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def tokenize(text: str) -> list:
+    """Character bigrams for CJK runs, whole words for Latin letters / digits."""
+    tokens = []
+    for run in _TOKEN_RE.findall(normalize(text)):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def item_text(item: dict) -> str:
+    return "\n".join(str(item.get(field) or "") for field in SEARCH_FIELDS)
+
+
+def matches(item: dict, query: str) -> bool:
+    """True if every whitespace-separated term of ``query`` occurs in the item."""
+    text = normalize(item_text(item))
+    return all(term in text for term in normalize(query).split())
+
+
+def encode_postings(ids, base: int) -> list:
+    gaps, previous = [], base
+    for item_id in sorted(set(ids)):
+        gaps.append(item_id - previous)
+        previous = item_id
+    return gaps
+
+
+def decode_postings(gaps: list, base: int) -> list:
+    ids, current = [], base
+    for gap in gaps:
+        current += gap
+        ids.append(current)
+    return ids
+
+
+class SearchIndex:
+    """Sharded bigram inverted index kept next to the news store."""
+
+    def __init__(self, backend, prefix: str = SEARCH_PREFIX, block_size: int = BLOCK_SIZE,
+                 shards: int = SHARDS, workers: int = WORKERS):
+        self.backend = backend
+        self.prefix = prefix
+        self.block_size = block_size
+        self.shards = shards
+        self.workers = workers
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}/index.json"
+
+    def block_number(self, item_id: int) -> int:
+        return (int(item_id) - 1) // self.block_size
+
+    def block_base(self, block: int) -> int:
+        # ids of a block are > base, so the first gap is never 0
+        return block * self.block_size
+
+    def shard_number(self, token: str) -> int:
+        return zlib.crc32(token.encode('utf-8')) % self.shards
+
+    def shard_key(self, block: int, shard: int) -> str:
+        return f"{self.prefix}/b{block:06d}/s{shard:02d}.json"
+
+    def load_index(self) -> dict:
+        return self._normalize_index(self.backend.download_json(self.index_key))
+
+    def _normalize_index(self, data) -> dict:
+        index = data if isinstance(data, dict) else {}
+        index.setdefault("block_size", self.block_size)
+        index.setdefault("shards", self.shards)
+        index.setdefault("last_block", -1)
+        index.setdefault("last_id", 0)
+        return index
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+    def apply(self, item: dict):
+        """Index one published item (see ``apply_many``)."""
+        self.apply_many([item])
+
+    def apply_many(self, items: list):
+        """Add published items; each touched shard is updated once.
+
+        Re-applying an item is a no-op, so a retried publish is safe.
+        """
+        updates = self._postings(items)
+        if not updates:
+            return
+        last_id = max(item['id'] for item in items if isinstance(item, dict) and isinstance(item.get('id'), int))
+        self._update_shards(updates, remove=False)
+
+        def mutate_index(data):
+            index = self._normalize_index(data)
+            index["last_block"] = max(index["last_block"], self.block_number(last_id))
+            index["last_id"] = max(index["last_id"], last_id)
+            return index
+
+        self.backend.update_json(self.index_key, mutate_index, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+
+    def remove(self, item: dict):
+        """Drop the postings of a removed item (tokens left without ids are deleted)."""
+        updates = self._postings([item])
+        if updates:
+            self._update_shards(updates, remove=True)
+
+    def _postings(self, items: list) -> dict:
+        """``{(shard key, block): {token: [ids]}}`` for ``items``."""
+        updates = {}
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+                tracing.log("Search index skipped an item without an integer id.", severity="WARNING")
+                continue
+            block = self.block_number(item['id'])
+            for token in set(tokenize(item_text(item))):
+                key = self.shard_key(block, self.shard_number(token))
+                updates.setdefault((key, block), {}).setdefault(token, []).append(item['id'])
+        return updates
+
+    def _update_shards(self, updates: dict, remove: bool):
+        def update(entry):
+            (key, block), postings = entry
+            base = self.block_base(block)
+
+            def mutate(data):
+                shard = data if isinstance(data, dict) else {}
+                for token, ids in postings.items():
+                    current = decode_postings(shard.get(token, []), base)
+                    merged = [i for i in current if i not in ids] if remove else current + ids
+                    if merged:
+                        shard[token] = encode_postings(merged, base)
+                    else:
+                        shard.pop(token, None)
+                return shard
+
+            self.backend.update_json(key, mutate, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(updates))) as pool:
+            list(pool.map(tracing.propagate(update), updates.items()))
+
+    # ------------------------------------------------------------------
+    # Full rebuild
+    # ------------------------------------------------------------------
+    def rebuild(self, items) -> dict:
+        """Rewrite every shard and the index from ``items`` (backfill / repair)."""
+        shards = {}
+        index = self._normalize_index({})
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+                continue
+            block = self.block_number(item['id'])
+            index["last_block"] = max(index["last_block"], block)
+            index["last_id"] = max(index["last_id"], item['id'])
+            for token in set(tokenize(item_text(item))):
+                shard = shards.setdefault((block, self.shard_number(token)), {})
+                shard.setdefault(token, []).append(item['id'])
+
+        def upload(entry):
+            (block, shard), postings = entry
+            base = self.block_base(block)
+            data = {token: encode_postings(ids, base) for token, ids in postings.items()}
+            self.backend.upload_json(self.shard_key(block, shard), data, compact=True,
+                                     cache_control=MUTABLE_CACHE_CONTROL)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(tracing.propagate(upload), shards.items()))
+        self.backend.upload_json(self.index_key, index, compact=True, cache_control=MUTABLE_CACHE_CONTROL)
+        return index
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def search(self, query: str, limit: int = 20) -> list:
+        """Ids of items containing every token of ``query``, newest first."""
+        return list(self._candidates(query, limit))[:limit]
+
+    def search_items(self, query: str, news_store, limit: int = 20) -> list:
+        """Items that match ``query`` (verified against their text), newest first."""
+        results = []
+        pending = []
+        for item_id in self._candidates(query):
+            pending.append(item_id)
+            if len(pending) >= limit:
+                results.extend(it for it in news_store.load_items(pending) if matches(it, query))
+                pending = []
+                if len(results) >= limit:
+                    break
+        if pending and len(results) < limit:
+            results.extend(it for it in news_store.load_items(pending) if matches(it, query))
+        return results[:limit]
+
+    def _candidates(self, query: str, limit: int = None):
+        """Yield candidate ids block by block, newest first.
+
+        The newest block is read alone, then ``workers`` older blocks at a
+        time; with ``limit`` the scan stops once that many ids were found.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return
+        blocks = list(range(self.load_index()["last_block"], -1, -1))
+        found, start, size = 0, 0, 1
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while start < len(blocks):
+                window = blocks[start:start + size]
+                for ids in pool.map(tracing.propagate(lambda block: self._search_block(block, tokens)), window):
+                    yield from ids
+                    found += len(ids)
+                if limit and found >= limit:
+                    return
+                # 最新的 block 通常已經足夠；不夠時才同時讀取多個較舊的 block
+                start += size
+                size = self.workers
+
+    def _search_block(self, block: int, tokens: set) -> list:
+        base = self.block_base(block)
+        shards = {}
+        result = None
+        for token in tokens:
+            shard_no = self.shard_number(token)
+            if shard_no not in shards:
+                data = self.backend.download_json(self.shard_key(block, shard_no))
+                shards[shard_no] = data if isinstance(data, dict) else {}
+            ids = set(decode_postings(shards[shard_no].get(token, []), base))
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return sorted(result, reverse=True)
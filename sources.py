@@ -0,0 +1,288 @@
+"""Pluggable breaking-news sources.
+
+Each source is a small class describing where its top story lives:
+
+    homepage_url          page to poll
+    top_story_selector    CSS selector for the lead story anchor
+    body_selectors        paragraph selectors tried in order
+    extract_image()       image strategy (og:image, then lead <img> by default)
+
+Register a source with ``@register_source``; ``fetch_all_stories`` polls
+every enabled source concurrently under one deadline so a slow site cannot
+hold up the others.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from urllib.parse import urljoin
+
+import tracing
+from extractors import extract_article_links, extract_top_story
+
+DEFAULT_DEADLINE = 25  # seconds per run for all sources together
+ARTICLE_WORKERS = 4    # parallel article downloads per source in top-N mode
+
+SOURCES = {}
+
+
+def register_source(cls):
+    """Class decorator adding ``cls`` to the registry under ``cls.name``."""
+    SOURCES[cls.name] = cls
+    return cls
+
+
+class NewsSource:
+    """Base class: a homepage with a lead story link and an article page."""
+
+    name = ""
+    label = ""
+    homepage_url = ""
+    top_story_selector = ""
+    body_selectors = ['article p', 'p']
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    timeout = 10
+    enabled = True
+
+    # ------------------------------------------------------------------
+    # Homepage
+    # ------------------------------------------------------------------
+    def find_top_story(self, html: str):
+        """Return ``(href, title)`` for the lead story, or None."""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        top_story = soup.select_one(self.top_story_selector)
+        if not top_story:
+            return None
+        return top_story.get('href'), top_story.get_text(strip=True)
+
+    # ------------------------------------------------------------------
+    # Article page
+    # ------------------------------------------------------------------
+    def extract_content(self, article_soup) -> str:
+        paragraphs = []
+        for psel in self.body_selectors:
+            paragraphs = article_soup.select(psel)
+            if paragraphs:
+                break
+        return "\n\n".join([p.get_text(strip=True) for p in paragraphs])
+
+    def extract_image(self, article_soup, link: str) -> str:
+        meta_img = article_soup.select_one('meta[property="og:image"]') or article_soup.select_one('meta[name="og:image"]')
+        if meta_img and meta_img.get('content'):
+            return meta_img.get('content')
+        # Try to find main image in figure or img tags commonly used for lead images
+        main_img = article_soup.select_one('figure img') or article_soup.select_one('img')
+        if main_img and main_img.get('src'):
+            # If image_url is relative, make it absolute
+            return urljoin(link, main_img.get('src'))
+        return ""
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+    def fetch_story(self, fetcher, is_seen=None):
+        """Fetch the lead story through ``fetcher``; None if unchanged or missing.
+
+        ``is_seen(url, title)`` is checked before the article page is fetched;
+        a story already seen is returned with ``"duplicate": True`` and no
+        content.
+        """
+        stories = self.fetch_stories(fetcher, is_seen, limit=1)
+        return stories[0] if stories else None
+
+    def fetch_stories(self, fetcher, is_seen=None, limit: int = 1) -> list:
+        """Fetch the top ``limit`` distinct stories; article pages of unseen
+        stories are downloaded in parallel.  Empty if the homepage is
+        unchanged."""
+        url = self.homepage_url
+        try:
+            with tracing.span("homepage_fetch", source=self.name):
+                response = fetcher.fetch(url, headers=self.headers, timeout=self.timeout)
+            if response.skip:
+                # 304 或內容 hash 與上次相同：首頁沒有變化，不用解析
+                tracing.log(f"{self.label} homepage unchanged since last run.", severity="DEBUG",
+                            source=self.name, status=response.status_code)
+                return []
+            tracing.log(f"{self.label} homepage fetched.", severity="DEBUG", source=self.name,
+                        status=response.status_code, length=len(response.text))
+
+            with tracing.span("homepage_parse", source=self.name):
+                top_stories = self.find_top_stories(response.text, limit)
+            if not top_stories:
+                tracing.log(f"No top story found on the {self.label} homepage.", severity="WARNING",
+                            source=self.name)
+                return []
+        except Exception as e:
+            tracing.log(f"Scraping {self.label} failed: {e}", severity="ERROR", source=self.name)
+            return []
+
+        stories = []
+        for link, title in top_stories:
+            # Ensure the link is absolute
+            link = urljoin(url, link) if link else url
+            seen = bool(is_seen and is_seen(link, title))
+            tracing.log(f"{self.label} top story: {title}", severity="DEBUG", source=self.name,
+                        url=link, seen=seen)
+            if seen:
+                stories.append({"title": title or "", "url": link, "source": self.name,
+                                "homepageUrl": url, "duplicate": True})
+            else:
+                stories.append({"title": title or "", "url": link})
+
+        fresh = [story for story in stories if not story.get("duplicate")]
+        if len(fresh) > 1:
+            fetch = tracing.propagate(lambda story: self.fetch_article(fetcher, story["url"], story["title"]))
+            with ThreadPoolExecutor(max_workers=min(len(fresh), ARTICLE_WORKERS)) as pool:
+                articles = list(pool.map(fetch, fresh))
+        else:
+            articles = [self.fetch_article(fetcher, story["url"], story["title"]) for story in fresh]
+        for story, article in zip(fresh, articles):
+            story.clear()
+            story.update(article)
+        return stories
+
+    def find_top_stories(self, html: str, limit: int = 1) -> list:
+        """Return up to ``limit`` distinct ``(href, title)`` pairs."""
+        if limit <= 1:
+            top_story = self.find_top_story(html)
+            return [top_story] if top_story else []
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        links, seen = [], set()
+        for a in soup.select(self.top_story_selector):
+            href, title = a.get('href'), a.get_text(strip=True)
+            if href and title and href not in seen:
+                seen.add(href)
+                links.append((href, title))
+                if len(links) >= limit:
+                    break
+        return links
+
+    def fetch_article(self, fetcher, link: str, title: str) -> dict:
+        """Download one article page and build the story dict."""
+        url = self.homepage_url
+        # Fetch article content and image
+        article_soup = None
+        try:
+            with tracing.span("article_fetch", source=self.name):
+                article_response = fetcher.get(link, headers=self.headers, timeout=self.timeout)
+            from bs4 import BeautifulSoup
+            with tracing.span("article_parse", source=self.name):
+                article_soup = BeautifulSoup(article_response.text, 'html.parser')
+        except Exception as e:
+            tracing.log(f"{self.label} article fetch failed: {e}", severity="WARNING", source=self.name, url=link)
+
+        with tracing.span("article_extract", source=self.name):
+            full_content = self.extract_content(article_soup) if article_soup else ""
+            image_url = self.extract_image(article_soup, link) if article_soup else ""
+
+        tracing.log(f"{self.label} article extracted.", severity="DEBUG", source=self.name, url=link,
+                    length=len(full_content), image=image_url or None)
+        return {
+            "title": title or "",
+            "url": link or url,
+            "content": full_content,
+            "publishedAt": datetime.utcnow().isoformat() + "Z",
+            "imageUrl": image_url or "",
+            "source": self.name,
+            "homepageUrl": url,
+        }
+
+
+@register_source
+class GuardianSource(NewsSource):
+    name = "guardian"
+    label = "Guardian"
+    homepage_url = "https://www.theguardian.com/international"
+    top_story_selector = 'a[data-link-name="article"]'
+    body_selectors = ['.article-body-commercial-selector p', 'article p', 'p']
+
+    def find_top_story(self, html: str):
+        # Fast path: stream the page and stop at the first matching anchor.
+        # The full BeautifulSoup parse is kept as a fallback.
+        return extract_top_story(html) or super().find_top_story(html)
+
+    def find_top_stories(self, html: str, limit: int = 1) -> list:
+        if limit <= 1:
+            return super().find_top_stories(html, limit)
+        return extract_article_links(html, limit, distinct=True) or super().find_top_stories(html, limit)
+
+
+# The sources below use best-effort selectors and are disabled unless listed
+# in the BREAKING_SOURCES environment variable (e.g. "guardian,abc").
+
+@register_source
+class ABCSource(NewsSource):
+    name = "abc"
+    label = "ABC News"
+    homepage_url = "https://www.abc.net.au/news/justin"
+    top_story_selector = 'article a[href*="/news/"]'
+    body_selectors = ['[data-component="ArticleBody"] p', 'article p', 'p']
+    enabled = False
+
+
+@register_source
+class SMHSource(NewsSource):
+    name = "smh"
+    label = "SMH"
+    homepage_url = "https://www.smh.com.au/"
+    top_story_selector = 'h3 a[href^="/"]'
+    body_selectors = ['#bodyContent p', 'article p', 'p']
+    enabled = False
+
+
+@register_source
+class NineNewsSource(NewsSource):
+    name = "9news"
+    label = "9News"
+    homepage_url = "https://www.9news.com.au/"
+    top_story_selector = 'a.story__link'
+    body_selectors = ['.article__body-croppable p', 'article p', 'p']
+    enabled = False
+
+
+def get_sources(names=None) -> list:
+    """Instantiate the sources to poll, in registry order.
+
+    ``names`` (or the comma-separated BREAKING_SOURCES env var) overrides the
+    per-class ``enabled`` flag.
+    """
+    if names is None:
+        env = os.environ.get('BREAKING_SOURCES', '')
+        names = [n.strip() for n in env.split(',') if n.strip()] or None
+    if names is None:
+        return [cls() for cls in SOURCES.values() if cls.enabled]
+    return [SOURCES[n]() for n in names if n in SOURCES]
+
+
+def fetch_all_stories(fetcher, sources=None, deadline: float = DEFAULT_DEADLINE, is_seen=None,
+                      top_n: int = 1) -> list:
+    """Fetch the lead story (or the top ``top_n`` stories) of every source concurrently.
+
+    Returns the stories found within ``deadline`` seconds, in source order.
+    Sources that have not finished in time are skipped for this run.
+    """
+    if sources is None:
+        sources = get_sources()
+    if not sources:
+        return []
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    if top_n > 1:
+        futures = [executor.submit(tracing.propagate(source.fetch_stories), fetcher, is_seen, top_n)
+                   for source in sources]
+    else:
+        futures = [executor.submit(tracing.propagate(source.fetch_story), fetcher, is_seen) for source in sources]
+    done, not_done = wait(futures, timeout=deadline)
+    # Do not block on stragglers; their threads finish in the background.
+    executor.shutdown(wait=False)
+    for source, future in zip(sources, futures):
+        if future in not_done:
+            tracing.log(f"{source.label} did not finish within {deadline}s; skipped this run.",
+                        severity="WARNING", source=source.name)
+
+    stories = []
+    for future in futures:
+        if future in done and future.exception() is None and future.result():
+            result = future.result()
+            stories.extend(result if isinstance(result, list) else [result])
+    return stories
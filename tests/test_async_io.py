@@ -0,0 +1,41 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_io import AsyncStorage, get_loop, run_sync
+from breaking_monitor import StorageBackend
+
+
+def test_run_sync_shares_one_loop_across_threads():
+    async def loop_id(i):
+        await asyncio.sleep(0.01)
+        return i, id(asyncio.get_running_loop())
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda i: run_sync(loop_id(i)), range(8)))
+    assert [i for i, _ in results] == list(range(8))
+    assert {loop for _, loop in results} == {id(get_loop())}
+
+
+def test_run_sync_refuses_to_block_its_own_loop():
+    async def inner():
+        return 1
+
+    async def outer():
+        with pytest.raises(RuntimeError):
+            run_sync(inner())
+        return "ok"
+
+    assert run_sync(outer()) == "ok"
+
+
+def test_async_storage_overlaps_calls(tmp_path):
+    storage = AsyncStorage(StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True))
+
+    async def scenario():
+        await asyncio.gather(storage.upload_text("a.txt", "A"),
+                             storage.upload_json("b.json", [1], compact=True))
+        return await asyncio.gather(storage.download_text("a.txt"), storage.download_json("b.json"))
+
+    assert run_sync(scenario()) == ["A", [1]]
@@ -0,0 +1,24 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import bench_pipeline  # noqa: E402
+
+
+def test_pipeline_benchmark_runs_offline(capsys):
+    assert bench_pipeline.main(["--sizes", "200", "--repeat", "1", "--llm-latency", "0", "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    entry = report["200"]
+    assert set(entry["results"]) == {"process_breaking_news", "parse_json_safely[reply]",
+                                     "parse_json_safely[news.json]", "assign_incremental_id"}
+    assert {"openai", "publish", "homepage_parse"} <= set(entry["stages"])
+
+
+def test_regression_gate_fails_on_slowdown(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"200:assign_incremental_id": [0.0001, 0.0]}))
+    assert bench_pipeline.main(["--sizes", "200", "--repeat", "1", "--llm-latency", "0",
+                                "--baseline", str(baseline), "--tolerance", "0"]) == 1
+    assert "[REGRESSION] 200:assign_incremental_id" in capsys.readouterr().out
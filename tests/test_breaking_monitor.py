@@ -1,8 +1,9 @@
 import json
-import pytest
 
+import breaking_monitor
 from breaking_monitor import parse_json_safely, get_guardian_breaking_story
-from breaking_monitor import assign_incremental_id
+from breaking_monitor import assign_incremental_id, StorageBackend
+from fetcher import ConditionalFetcher, get_session
 
 
 def test_parse_json_safely_plain():
@@ -19,7 +20,7 @@ def test_parse_json_safely_with_noise():
     assert out[0]["b"] == 2
 
 
-def test_get_guardian_breaking_story(monkeypatch):
+def test_get_guardian_breaking_story(monkeypatch, tmp_path):
     homepage_html = '<html><body><a data-link-name="article" href="/world/2026/jan/03/breaking-title">Breaking Title</a></body></html>'
     article_html = '<html><head><meta property="og:image" content="https://example.com/img.jpg"/></head><body><article><p>Para1</p><p>Para2</p></article></body></html>'
 
@@ -33,7 +34,10 @@ def test_get_guardian_breaking_story(monkeypatch):
             return FakeResp(homepage_html)
         return FakeResp(article_html)
 
-    monkeypatch.setattr('breaking_monitor.requests.get', fake_get)
+    monkeypatch.setattr(get_session(), 'get', fake_get)
+    # 不可使用 get_fetcher() 的預設 StorageBackend(BUCKET_NAME)：有 GCP 憑證時會讀寫正式 bucket
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    monkeypatch.setattr(breaking_monitor, 'fetcher', ConditionalFetcher(backend))
 
     story = get_guardian_breaking_story()
     assert story is not None
@@ -58,3 +62,57 @@ def test_assign_incremental_id_empty_list():
     item = {"title": "First"}
     assign_incremental_id(item, [])
     assert item['id'] == 1
+
+
+def test_translate_breaking_stories_async_batches_one_completion(monkeypatch):
+    from openai import AsyncOpenAI
+
+    from async_io import run_sync
+    from fake_openai_server import FakeOpenAIServer
+
+    stories = [{"title": f"Story {n}", "content": f"Body {n}.", "url": f"https://example.com/{n}",
+                "publishedAt": "2026-01-03T00:00:00Z", "imageUrl": ""} for n in range(3)]
+    # 模型沒有保留輸入次序：以 citations 配對
+    reply = json.dumps([{"title": f"【突發】{n}", "citations": [f"https://example.com/{n}"]} for n in (2, 0, 1)])
+    monkeypatch.setattr(breaking_monitor, '_cached_translation', lambda story: (story['url'], None))
+    monkeypatch.setattr(breaking_monitor, '_store_translation', lambda key, result: None)
+    with FakeOpenAIServer([reply]) as server:
+        monkeypatch.setattr(breaking_monitor, 'async_client', AsyncOpenAI(api_key="test", base_url=server.base_url))
+        results = run_sync(breaking_monitor.translate_breaking_stories_async(stories))
+
+    assert len(server.requests) == 1
+    assert [r[0]["title"] for r in results] == ["【突發】0", "【突發】1", "【突發】2"]
+    assert results[1][0]["citations"] == ["https://example.com/1"]
+
+
+def test_large_batches_are_split_and_budgeted_by_size(monkeypatch):
+    import llm_stream
+    from async_io import run_sync
+
+    long_body = "word " * 1000  # ~1250 tokens: three of these exceed BATCH_MAX_TOKENS
+    stories = [{"title": f"Story {n}", "content": long_body if n < 4 else "Short.", "url": f"https://example.com/{n}",
+                "publishedAt": "2026-01-03T00:00:00Z", "imageUrl": ""} for n in range(7)]
+    calls = []
+
+    async def fake_complete(system_prompt, user_content, budget=None):
+        urls = [s["url"] for s in stories if f"- url: {s['url']}\n" in user_content + "\n"]
+        calls.append((urls, budget))
+        return [{"title": "【突發】", "citations": [url]} for url in urls]
+
+    async def fake_single(story):
+        calls.append(([story["url"]], None))
+        return [{"title": "【突發】", "citations": [story["url"]]}]
+
+    monkeypatch.setattr(breaking_monitor, 'BATCH_MAX_STORIES', 3)
+    monkeypatch.setattr(breaking_monitor, '_cached_translation', lambda story: (story['url'], None))
+    monkeypatch.setattr(breaking_monitor, '_store_translation', lambda key, result: None)
+    monkeypatch.setattr(breaking_monitor, '_complete_json_async', fake_complete)
+    monkeypatch.setattr(breaking_monitor, 'translate_breaking_story_async', fake_single)
+    results = run_sync(breaking_monitor.translate_breaking_stories_async(stories))
+
+    assert all(results)
+    batches = sorted((len(urls), budget) for urls, budget in calls if budget is not None)
+    assert [n for n, _ in batches] == [2, 2, 3]
+    for n, budget in batches:
+        assert budget >= llm_stream.DEFAULT_BUDGET
+    assert max(budget for _, budget in batches) > llm_stream.DEFAULT_BUDGET
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from chunked_translation import chunk_paragraphs, estimate_tokens, translate_chunked
+
+
+def test_chunk_paragraphs_respects_token_bound():
+    paragraphs = [f"Paragraph {i} " + "word " * 40 for i in range(10)]
+    chunks = chunk_paragraphs(paragraphs, max_tokens=120)
+    assert [p for c in chunks for p in c] == paragraphs
+    assert all(sum(estimate_tokens(p) for p in c) <= 120 for c in chunks if len(c) > 1)
+    assert len(chunks) > 1
+
+
+def test_translate_chunked_runs_in_parallel_and_keeps_order():
+    paragraphs = [f"P{i} " + "x " * 200 for i in range(6)]
+    data = {"title": "T", "content": "\n\n".join(paragraphs), "url": "u",
+            "publishedAt": "d", "imageUrl": ""}
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def track(delay):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delay)
+        with lock:
+            active[0] -= 1
+
+    def meta(d):
+        track(0.2)
+        return [{"title": "【突發】T", "articleDetail": "譯" + d["content"].split()[0]}]
+
+    def chunk(text):
+        track(0.2)
+        return "\n".join("譯" + p.split()[0] for p in text.split("\n\n"))
+
+    start = time.perf_counter()
+    items = translate_chunked(data, meta, chunk, max_tokens=120, max_workers=6)
+    elapsed = time.perf_counter() - start
+
+    assert items[0]["articleDetail"].split("\n") == [f"譯P{i}" for i in range(6)]
+    assert peak[0] > 1
+    assert elapsed < 0.2 * 6
+
+
+def test_translate_chunked_retries_then_fails_without_partial_result():
+    data = {"title": "T", "content": "\n\n".join("y " * 300 for _ in range(3)), "url": "u",
+            "publishedAt": "d", "imageUrl": ""}
+    assert translate_chunked(data, lambda d: [{"articleDetail": "lead"}], lambda t: None, max_tokens=100) is None
+
+    calls = []
+
+    def flaky(text):
+        calls.append(text)
+        if len(calls) == 1:
+            raise RuntimeError("timeout")
+        return "譯"
+
+    items = translate_chunked(data, lambda d: [{"articleDetail": "lead"}], flaky, max_tokens=100)
+    assert items[0]["articleDetail"] == "lead\n譯\n譯"
+    assert len(calls) == 3
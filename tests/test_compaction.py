@@ -0,0 +1,60 @@
+import pytest
+
+from breaking_monitor import StorageBackend
+from compaction import CompactionError, compact, month_of
+from news_store import NewsStore
+
+
+def make_store(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return NewsStore(backend, head_size=2, segment_size=2)
+
+
+def publish(store, n, start=0):
+    for i in range(start, start + n):
+        store.publish({"title": f"story {i}", "date": f"2025-{1 + i // 5:02d}-01T00:00:00Z"})
+
+
+def test_month_of():
+    assert month_of({"date": "2025-12-31T23:00:00Z"}) == "2025-12"
+    assert month_of({"date": ""}) == "undated" and month_of({}) == "undated"
+
+
+def test_compaction_keeps_every_item_and_merges_months(tmp_path):
+    store = make_store(tmp_path)
+    publish(store, 12)
+    before = store.load_all()
+
+    report = compact(store, keep_segments=1, dry_run=True, workers=2)
+    assert report["segments"] == 4 and report["items"] == 8 and report["archive_objects"] == 2
+    assert store.load_all() == before and not (tmp_path / "news" / "archive").exists()
+
+    compact(store, keep_segments=1, workers=2)
+    manifest = store.load_manifest()
+    assert [s["seq"] for s in manifest["segments"]] == [5]
+    assert [(a["month"], a["count"]) for a in manifest["archives"]] == [("2025-01", 5), ("2025-02", 3)]
+    assert store.load_all() == before
+    assert sorted(p.name for p in (tmp_path / "news" / "segments").iterdir()) == ["000005.json"]
+    assert [it["id"] for it in store.load_items([1, 11, 6])] == [1, 11, 6]
+
+    # 之後封存的 segment 不會重用已壓縮的序號；同一個月份會合併成新的 archive
+    publish(store, 4, start=12)
+    assert [s["seq"] for s in store.load_manifest()["segments"]] == [5, 6, 7]
+    compact(store, keep_segments=0, workers=2)
+    manifest = store.load_manifest()
+    assert manifest["segments"] == [] and manifest["count"] == 16
+    assert [(a["month"], a["count"]) for a in manifest["archives"]] == \
+        [("2025-01", 5), ("2025-02", 5), ("2025-03", 4)]
+    assert not (tmp_path / "news" / "archive" / "2025-02" / "000006-000008.json.gz").exists()
+    assert [it["id"] for it in store.load_all()] == list(range(16, 0, -1))
+
+
+def test_compaction_aborts_on_a_missing_segment(tmp_path):
+    store = make_store(tmp_path)
+    publish(store, 8)
+    store.backend.delete(store.segment_key(2))
+    manifest = store.load_manifest()
+
+    with pytest.raises(CompactionError):
+        compact(store, keep_segments=0, workers=1)
+    assert store.load_manifest() == manifest
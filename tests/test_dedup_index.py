@@ -0,0 +1,83 @@
+from breaking_monitor import StorageBackend
+from dedup_index import DedupIndex, normalize_url
+
+
+def test_normalize_url_drops_tracking_and_trailing_slash():
+    assert normalize_url("HTTPS://WWW.Example.com/world/story/?CMP=share#top") == "https://www.example.com/world/story"
+
+
+def test_dedup_index_url_and_title_persist(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    index = DedupIndex(backend)
+    index.add("https://example.com/a?x=1", "Breaking: Storm hits Sydney!")
+    index.save()
+
+    index = DedupIndex(backend)
+    assert index.contains("https://example.com/a")
+    assert index.contains("https://example.com/other", "breaking  storm hits sydney")
+    assert not index.contains("https://example.com/b", "Something else")
+
+
+def test_dedup_index_ttl_and_size_cap():
+    index = DedupIndex(ttl=100, max_entries=2)
+    index.entries = {}
+    index.add("https://example.com/old", now=0)
+    assert not index.contains("https://example.com/old")
+
+    for i in range(3):
+        index.add(f"https://example.com/{i}", now=1000 + i)
+    index.evict(now=1010)
+    assert len(index.entries) == 2
+
+
+def test_claim_is_exclusive_across_instances(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    first, second = DedupIndex(backend), DedupIndex(backend)
+    first.load()
+    second.load()
+
+    assert first.claim("https://example.com/a", "Title A")
+    assert not second.claim("https://example.com/a?utm=x", "Other title")
+
+    first.release("https://example.com/a", "Title A")
+    assert DedupIndex(backend).claim("https://example.com/a", "Title A")
+
+
+def test_concurrent_claims_on_a_shared_instance(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    index = DedupIndex(backend)
+    index.load()
+
+    def claim_many(worker):
+        return [index.claim(f"https://example.com/{worker}/{i}", f"Story {worker} {i}") for i in range(15)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [ok for batch in pool.map(claim_many, range(4)) for ok in batch]
+
+    assert results == [True] * 60
+    stored = DedupIndex(backend)
+    assert all(stored.contains(f"https://example.com/{w}/{i}") for w in range(4) for i in range(15))
+
+
+def test_claim_is_a_lease_until_confirmed(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    crashed = DedupIndex(backend, lease_ttl=60)
+    assert crashed.claim("https://example.com/a", "Title A")
+    assert not DedupIndex(backend).claim("https://example.com/a", "Title A")
+
+    # the run died without confirm/release: the lease expires, the story is not suppressed for the TTL
+    data = backend.download_json("dedup_index.json")
+    assert data["entries"] == {}
+    for lease in data["leases"].values():
+        assert lease["owner"] == crashed.owner
+        lease["expires"] = 0
+    backend.upload_json("dedup_index.json", data)
+
+    retry = DedupIndex(backend)
+    assert retry.claim("https://example.com/a", "Title A")
+    retry.confirm("https://example.com/a", "Title A")
+    data = backend.download_json("dedup_index.json")
+    assert data["leases"] == {} and len(data["entries"]) == 2
+    assert not DedupIndex(backend).claim("https://example.com/a", "Title A")
@@ -0,0 +1,30 @@
+import os
+
+from bs4 import BeautifulSoup
+
+from extractors import extract_article_links, extract_top_story
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def test_extract_top_story_matches_bs4_on_fixture():
+    with open(os.path.join(FIXTURES, 'guardian_international.html'), encoding='utf-8') as fh:
+        html = fh.read()
+    a = BeautifulSoup(html, 'html.parser').select_one('a[data-link-name="article"]')
+    assert extract_top_story(html) == (a.get('href'), a.get_text(strip=True))
+
+
+def test_extract_article_links_limit_and_missing():
+    html = ('<a data-link-name="nav" href="/nav">Nav</a>'
+            '<a data-link-name="article" href="/one"><span>One</span> &amp; more</a>'
+            '<a data-link-name="article" href="/two">Two</a>')
+    assert extract_article_links(html, limit=2) == [("/one", "One& more"), ("/two", "Two")]
+    assert extract_top_story('<p>no links</p>') is None
+
+
+def test_extract_article_links_distinct():
+    html = ('<a data-link-name="article" href="/one"><img src="x.jpg"></a>'
+            '<a data-link-name="article" href="/one">One</a>'
+            '<a data-link-name="article" href="/one">One again</a>'
+            '<a data-link-name="article" href="/two">Two</a>')
+    assert extract_article_links(html, limit=2, distinct=True) == [("/one", "One"), ("/two", "Two")]
@@ -0,0 +1,54 @@
+from breaking_monitor import StorageBackend
+from feed_materializer import FeedMaterializer
+
+
+def make_feed(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return FeedMaterializer(backend, page_size=3, facet_size=2)
+
+
+def item(i, region="雪梨", category="突發"):
+    return {"id": i, "title": f"t{i}", "region": region, "category": category}
+
+
+def test_apply_touches_only_the_latest_page(tmp_path):
+    feed = make_feed(tmp_path)
+    for i in range(1, 5):
+        feed.apply(item(i, region="雪梨" if i % 2 else "墨爾本"))
+    page1 = tmp_path / "feed" / "page-0001.json"
+    mtime = page1.stat().st_mtime_ns
+
+    feed.apply(item(5))
+    assert page1.stat().st_mtime_ns == mtime
+    assert [it["id"] for it in feed.backend.download_json("feed/page-0002.json")] == [5, 4]
+
+    index = feed.backend.download_json(feed.index_key)
+    assert index["latest_page"] == 2 and index["count"] == 5
+    assert index["regions"] == {"雪梨": 3, "墨爾本": 2}
+    assert [it["id"] for it in feed.backend.download_json(feed.facet_key("region", "雪梨"))] == [5, 3]
+
+
+def test_rebuild_matches_incremental(tmp_path):
+    items = [item(i, category="突發" if i < 4 else "體育") for i in range(7, 0, -1)]
+    rebuilt = make_feed(tmp_path / "a")
+    rebuilt.rebuild(items + [{"title": "legacy without id"}])
+    incremental = make_feed(tmp_path / "b")
+    for it in reversed(items):
+        incremental.apply(it)
+
+    for key in ["feed/index.json", "feed/page-0001.json", "feed/page-0003.json",
+                "feed/category/體育.json", "feed/region/雪梨.json"]:
+        assert rebuilt.backend.download_json(key) == incremental.backend.download_json(key)
+
+
+def test_remove_takes_an_item_out_of_page_facets_and_index(tmp_path):
+    feed = make_feed(tmp_path)
+    for i in range(1, 4):
+        feed.apply(item(i, region="雪梨" if i < 3 else "墨爾本"))
+
+    feed.remove(item(3, region="墨爾本"))
+    assert [it["id"] for it in feed.backend.download_json(feed.page_key(1))] == [2, 1]
+    assert feed.backend.download_json(feed.facet_key("region", "墨爾本")) == []
+    index = feed.backend.download_json(feed.index_key)
+    assert index["count"] == 2
+    assert index["regions"] == {"雪梨": 2} and index["categories"] == {"突發": 2}
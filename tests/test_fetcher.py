@@ -0,0 +1,51 @@
+from breaking_monitor import StorageBackend
+from fetcher import ConditionalFetcher, get_session
+
+
+class FakeResp:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = headers or {}
+
+
+def test_conditional_fetch_uses_committed_validators(monkeypatch, tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    seen_headers = []
+
+    def fake_get(url, headers=None, timeout=None):
+        seen_headers.append(dict(headers or {}))
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return FakeResp(304)
+        return FakeResp(200, "<html>home</html>", {'ETag': '"v1"'})
+
+    monkeypatch.setattr(get_session(), 'get', fake_get)
+
+    fetcher = ConditionalFetcher(backend)
+    first = fetcher.fetch("https://example.com/")
+    assert first.status_code == 200 and not first.skip
+
+    # Not committed yet: the next fetch is still unconditional.
+    fetcher.discard()
+    assert not fetcher.fetch("https://example.com/").skip
+    fetcher.commit()
+
+    # A fresh fetcher reloads the persisted validators.
+    fetcher = ConditionalFetcher(backend)
+    second = fetcher.fetch("https://example.com/")
+    assert second.not_modified and second.skip
+    assert seen_headers[-1]['If-None-Match'] == '"v1"'
+    assert fetcher.stats["bytes_saved"] == len("<html>home</html>")
+
+
+def test_conditional_fetch_detects_identical_body(monkeypatch, tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    monkeypatch.setattr(get_session(), 'get', lambda url, headers=None, timeout=None: FakeResp(200, "same"))
+
+    fetcher = ConditionalFetcher(backend)
+    assert not fetcher.fetch("https://example.com/").skip
+    fetcher.commit()
+    assert fetcher.fetch("https://example.com/").unchanged
+    assert fetcher.stats["bytes_parse_skipped"] == len("same")
+    assert fetcher.stats["bytes_saved"] == 0
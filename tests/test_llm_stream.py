@@ -0,0 +1,48 @@
+from openai import OpenAI
+
+from fake_openai_server import FakeOpenAIServer
+from llm_stream import JsonArrayValidator, translate_streaming
+
+GOOD = '[{"title": "【突發】測試", "articleDetail": "第一段\\n第二段 [更新]"}]'
+
+
+def make_client(server):
+    return OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+
+
+def test_validator_accepts_array_and_rejects_prose_early():
+    v = JsonArrayValidator()
+    v.feed('  [{"a": "x]}"},')
+    assert not v.invalid and not v.complete
+    v.feed(' [1, 2]]')
+    assert v.complete
+
+    v = JsonArrayValidator()
+    v.feed('```json')
+    assert v.invalid
+
+
+def test_translate_streaming_against_fake_server():
+    with FakeOpenAIServer([GOOD]) as server:
+        result = translate_streaming(make_client(server), "sys", "user", budget=10)
+    assert result.ok
+    assert result.text == GOOD
+    assert result.metrics["attempts"] == 1
+    assert result.metrics["ttft"] is not None and result.metrics["total"] >= result.metrics["ttft"]
+
+
+def test_translate_streaming_retries_with_tighter_instruction():
+    bad = "Sure! Here is the JSON you asked for: " + GOOD
+    with FakeOpenAIServer([bad, GOOD]) as server:
+        result = translate_streaming(make_client(server), "sys", "user", budget=10)
+        second_request = server.requests[1]
+    assert result.ok
+    assert result.metrics["attempts"] == 2
+    assert len(second_request["messages"]) == 3
+
+
+def test_translate_streaming_respects_time_budget():
+    with FakeOpenAIServer([GOOD], chunk_delay=0.2, chunk_size=2) as server:
+        result = translate_streaming(make_client(server), "sys", "user", budget=0.5)
+    assert not result.ok
+    assert result.metrics["total"] < 2
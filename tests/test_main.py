@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from flask import Flask, request
+from google.api_core.exceptions import PreconditionFailed
+
+import main
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        with self.bucket.lock:
+            if if_generation_match == 0 and self.name in self.bucket.objects:
+                raise PreconditionFailed("exists")
+            self.bucket.objects[self.name] = data
+
+    def make_public(self):
+        pass
+
+
+class FakeBucket:
+    name = "test-bucket"
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    fake = FakeBucket()
+    monkeypatch.setattr(main, '_get_bucket', lambda name: fake)
+    monkeypatch.delenv('UPLOADER_SECRET', raising=False)
+    return fake
+
+
+def call(handler, payload, headers=None):
+    app = Flask(__name__)
+    with app.test_request_context(method='POST', json=payload, headers=headers or {}):
+        resp, status = handler(request)
+        return resp.get_json(), status
+
+
+def test_permalink_handler_skips_existing(bucket):
+    body, status = call(main.permalink_handler, {"id": 7, "title": "x"})
+    assert status == 200 and 'skipped' not in body
+    body, status = call(main.permalink_handler, {"id": 7, "title": "x"})
+    assert status == 200 and body['skipped'] is True
+
+
+def test_permalink_batch_handler(bucket):
+    bucket.objects["permalinks/2.json"] = "{}"
+    snapshots = [{"id": i} for i in range(1, 6)] + [{"no_id": True}]
+    body, status = call(main.permalink_batch_handler, snapshots)
+
+    assert status == 200
+    assert body['status'] == 'partial'
+    assert [r['status'] for r in body['results']] == ['ok', 'skipped', 'ok', 'ok', 'ok', 'error']
+    assert body['summary']['uploaded'] == 4 and body['summary']['skipped'] == 1
+    assert set(bucket.objects) == {f"permalinks/{i}.json" for i in range(1, 6)}
+
+
+def test_permalink_batch_handler_requires_auth(bucket, monkeypatch):
+    monkeypatch.setenv('UPLOADER_SECRET', 's3cret')
+    _, status = call(main.permalink_batch_handler, [{"id": 1}])
+    assert status == 401
+    _, status = call(main.permalink_batch_handler, [{"id": 1}], {'Authorization': 'Bearer s3cret'})
+    assert status == 200
+
+
+def test_search_handler(tmp_path, monkeypatch):
+    from breaking_monitor import StorageBackend
+    from news_store import NewsStore
+    from search_index import SearchIndex
+
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    store, index = NewsStore(backend), SearchIndex(backend)
+    for title in ("【突發】雪梨山火", "墨爾本暴雨", "【突發】墨爾本山火"):
+        index.apply(store.publish({"title": title}))
+    monkeypatch.setattr(main, '_search', (index, store))
+
+    app = Flask(__name__)
+    with app.test_request_context('/search?q=突發 山火&limit=1'):
+        resp, status = main.search_handler(request)
+    assert status == 200
+    assert [r['title'] for r in resp.get_json()['results']] == ["【突發】墨爾本山火"]
+    with app.test_request_context('/search'):
+        _, status = main.search_handler(request)
+    assert status == 400
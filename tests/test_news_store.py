@@ -0,0 +1,172 @@
+import threading
+
+import pytest
+
+from breaking_monitor import StorageBackend
+from news_store import NewsStore
+
+
+def make_store(tmp_path, head_size=3, segment_size=2):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return NewsStore(backend, head_size=head_size, segment_size=segment_size)
+
+
+def test_publish_seals_segments_and_keeps_head_bounded(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(1, 11):
+        store.publish({"id": i})
+
+    head = store.load_head()
+    manifest = store.load_manifest()
+    assert 3 <= len(head) < 5
+    assert head[0]["id"] == 10
+    assert manifest["count"] == 10
+    assert [s["seq"] for s in manifest["segments"]] == [1, 2, 3]
+    assert store.load_segment(1) == [{"id": 2}, {"id": 1}]
+    assert [it["id"] for it in store.load_all()] == list(range(10, 0, -1))
+
+
+def test_migrate_from_list_round_trips(tmp_path):
+    store = make_store(tmp_path)
+    legacy = [{"id": i} for i in range(9, 0, -1)]
+    manifest = store.migrate_from_list(legacy)
+
+    assert manifest["count"] == 9
+    assert len(store.load_head()) == 3
+    assert store.load_segment(1) == [{"id": 2}, {"id": 1}]
+    assert store.load_all() == legacy
+
+    # Publishing after a migration continues the same layout.
+    store.publish({"id": 10})
+    assert store.load_all()[0] == {"id": 10}
+    assert len(store.load_all()) == 10
+
+
+def test_migrate_refuses_to_overwrite_an_existing_store(tmp_path):
+    store = make_store(tmp_path)
+    store.migrate_from_list([{"id": 2}, {"id": 1}])
+    store.publish({"title": "published after the migration"})
+
+    with pytest.raises(FileExistsError):
+        store.migrate_from_list([{"id": 2}, {"id": 1}])
+    assert store.load_head()[0]["id"] == 3
+
+    store.migrate_from_list([{"id": 2}, {"id": 1}], force=True)
+    assert store.load_all() == [{"id": 2}, {"id": 1}]
+
+
+def test_first_publish_migrates_legacy_news_json(tmp_path):
+    # Deployed before scripts/migrate_news_store.py ran: only news.json exists.
+    store = make_store(tmp_path)
+    legacy = [{"id": i} for i in range(9, 0, -1)]
+    store.backend.upload_json("news.json", legacy)
+
+    item = store.publish({"title": "first story after the deploy"})
+    assert item["id"] == 10
+    assert store.load_all() == [item] + legacy
+    assert store.load_manifest()["count"] == 10
+
+    # The script now finds the store and leaves it alone.
+    with pytest.raises(FileExistsError):
+        store.migrate_from_list(legacy)
+    assert store.publish({})["id"] == 11
+
+
+def test_remove_takes_an_item_out_of_the_head(tmp_path):
+    store = make_store(tmp_path, head_size=3, segment_size=2)
+    for i in range(1, 6):
+        store.publish({"id": i})
+
+    assert store.remove(5) == {"id": 5}
+    assert store.remove(5) is None
+    assert store.remove(1) is None  # sealed in a segment
+    assert [it["id"] for it in store.load_all()] == [4, 3, 2, 1]
+    assert store.load_manifest()["count"] == 4
+
+
+def test_publish_assigns_ids_from_persisted_counter(tmp_path):
+    store = make_store(tmp_path)
+    store.migrate_from_list([{"id": 7}, {"id": "3"}, {"title": "no id"}])
+    assert store.load_manifest()["last_id"] == 7
+
+    item = store.publish({"title": "new"})
+    assert item["id"] == 8
+    assert store.load_manifest()["last_id"] == 8
+
+
+def test_rebuild_counters_recomputes_from_segments(tmp_path):
+    store = make_store(tmp_path)
+    for _ in range(8):
+        store.publish({})
+    manifest = store.load_manifest()
+    manifest.pop("last_id")
+    manifest["count"] = 0
+    store.backend.upload_json(store.manifest_key, manifest)
+
+    rebuilt = store.rebuild_counters()
+    assert rebuilt["last_id"] == 8
+    assert rebuilt["count"] == 8
+
+
+def test_concurrent_publishers_do_not_lose_stories(tmp_path):
+    store = make_store(tmp_path, head_size=5, segment_size=4)
+
+    def worker(n):
+        for i in range(n):
+            store.publish({"title": f"{threading.current_thread().name}-{i}"})
+
+    threads = [threading.Thread(target=worker, args=(6,), name=f"t{t}") for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    items = store.load_all()
+    assert len(items) == 24
+    assert sorted(it["id"] for it in items) == list(range(1, 25))
+    manifest = store.load_manifest()
+    assert manifest["count"] == 24 and manifest["last_id"] == 24
+
+
+def test_emit_msgpack_head(tmp_path):
+    pytest.importorskip("msgpack")
+    from news_format import decode_msgpack
+
+    store = make_store(tmp_path)
+    store.emit_msgpack = True
+    store.publish({"title": "一"})
+    store.publish({"title": "二"})
+    with open(tmp_path / "news" / "head.msgpack", "rb") as fh:
+        assert decode_msgpack(fh.read()) == store.load_head()
+
+
+def test_publish_with_stale_snapshot_retries(tmp_path):
+    store = make_store(tmp_path)
+    store.publish({"title": "first"})
+    snapshot = store.snapshot()
+    store.publish({"title": "second"})
+
+    item = store.publish({"title": "third"}, snapshot=snapshot)
+    assert item["id"] == 3
+    assert [it["title"] for it in store.load_all()] == ["third", "second", "first"]
+
+
+def test_publish_many_single_head_write(tmp_path):
+    store = make_store(tmp_path, head_size=3, segment_size=2)
+    store.publish({"title": "old"})
+    writes = []
+    upload = store._upload
+
+    def recording_upload(key, *args, **kwargs):
+        writes.append(key)
+        return upload(key, *args, **kwargs)
+
+    store._upload = recording_upload
+
+    items = store.publish_many([{"title": f"top{i}"} for i in range(6)])
+    assert [it["id"] for it in items] == [7, 6, 5, 4, 3, 2]
+    assert writes.count(store.head_key) == 1
+    assert [it["title"] for it in store.load_all()] == [f"top{i}" for i in range(6)] + ["old"]
+    manifest = store.load_manifest()
+    assert manifest["count"] == 7 and manifest["last_id"] == 7
+    assert [s["seq"] for s in manifest["segments"]] == [1, 2]
@@ -0,0 +1,64 @@
+from breaking_monitor import StorageBackend
+from news_store import NewsStore
+from search_index import SearchIndex, decode_postings, encode_postings, tokenize
+
+
+def make_index(tmp_path, block_size=3):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return SearchIndex(backend, block_size=block_size, shards=4), NewsStore(backend, head_size=2, segment_size=2)
+
+
+ITEMS = [
+    {"title": "【突發】雪梨發生山火", "summary": "消防處理", "articleDetail": "New South Wales 山火"},
+    {"title": "墨爾本暴雨", "summary": "水浸", "articleDetail": "Victoria 水浸"},
+    {"title": "【突發】墨爾本山火", "summary": "", "articleDetail": "雪梨亦受影響"},
+    {"title": "國際新聞", "summary": "日本地震", "articleDetail": "Ｔｏｋｙｏ tsunami"},
+    {"title": "【突發】悉尼發生槍擊", "summary": "", "articleDetail": ""},
+]
+
+
+def test_tokenize_bigrams_and_words():
+    assert tokenize("【突發】雪梨ＡＢＣ News 2026") == ["突發", "雪梨", "abc", "news", "2026"]
+    assert tokenize("山火") == ["山火"] and tokenize("火") == ["火"]
+
+
+def test_postings_roundtrip():
+    gaps = encode_postings([9, 7, 8, 7], base=6)
+    assert gaps == [1, 1, 1]
+    assert decode_postings(gaps, base=6) == [7, 8, 9]
+
+
+def test_incremental_index_matches_rebuild_and_search(tmp_path):
+    index, store = make_index(tmp_path)
+    for item in ITEMS:
+        store.publish(dict(item))
+        index.apply(store.load_head()[0])
+    index.apply(store.load_items([1])[0])  # re-applying is a no-op
+
+    assert index.search("突發") == [5, 3, 1]
+    assert index.search("突發", limit=2) == [5, 3]
+    assert index.search("山火 雪梨") == [3, 1]
+    assert index.search("tokyo") == [4]
+    assert index.search("不存在") == []
+    # 「雪梨發生」 的 bigram 亦出現在 3 號以外；內容檢查後只剩 1 號
+    assert [it["id"] for it in index.search_items("雪梨發生", store)] == [1]
+
+    rebuilt_index, _ = make_index(tmp_path / "rebuilt")
+    assert rebuilt_index.rebuild(store.iter_items()) == index.load_index()
+    for block in (0, 1):
+        for shard in range(4):
+            key = index.shard_key(block, shard)
+            assert rebuilt_index.backend.download_json(key) == index.backend.download_json(key)
+
+
+def test_remove_drops_postings_of_an_item(tmp_path):
+    index, store = make_index(tmp_path)
+    for item in ITEMS:
+        store.publish(dict(item))
+    index.rebuild(store.iter_items())
+
+    index.remove(store.load_items([5])[0])
+    assert index.search("突發") == [3, 1]
+    assert index.search("槍擊") == []
+    shard = index.backend.download_json(index.shard_key(1, index.shard_number("槍擊")))
+    assert "槍擊" not in shard
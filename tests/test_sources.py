@@ -0,0 +1,30 @@
+import time
+
+from sources import NewsSource, fetch_all_stories, get_sources
+
+
+class FakeSource(NewsSource):
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.label = name
+        self.delay = delay
+
+    def fetch_story(self, fetcher, is_seen=None):
+        time.sleep(self.delay)
+        return {"title": self.name, "url": f"https://example.com/{self.name}", "source": self.name}
+
+
+def test_get_sources_defaults_and_env(monkeypatch):
+    monkeypatch.delenv('BREAKING_SOURCES', raising=False)
+    assert [s.name for s in get_sources()] == ["guardian"]
+    monkeypatch.setenv('BREAKING_SOURCES', 'abc, 9news, unknown')
+    assert [s.name for s in get_sources()] == ["abc", "9news"]
+
+
+def test_fetch_all_stories_runs_concurrently_under_deadline():
+    sources = [FakeSource("a", 0.2), FakeSource("b", 0.2), FakeSource("slow", 2.0)]
+    start = time.perf_counter()
+    stories = fetch_all_stories(fetcher=None, sources=sources, deadline=0.5)
+    elapsed = time.perf_counter() - start
+    assert [s["source"] for s in stories] == ["a", "b"]
+    assert elapsed < 1.0
@@ -0,0 +1,56 @@
+"""Cold-start guard: entry modules must not pull in heavy clients at import time.
+
+Runs ``python -X importtime`` in a fresh interpreter.  Set
+``STARTUP_IMPORT_BUDGET_MS`` to tighten the cumulative import budget.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import breaking_monitor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("openai", "bs4", "google.cloud.storage", "requests")
+BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+
+def import_times(module: str) -> dict:
+    """Return ``{module: cumulative microseconds}`` for ``import module``."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:  # header line
+            continue
+    return times
+
+
+@pytest.mark.parametrize("module", ["main", "breaking_monitor", "cloud_function"])
+def test_entry_module_imports_are_light(module):
+    times = import_times(module)
+    loaded = [m for m in HEAVY_MODULES if m in times]
+    assert not loaded, f"{module} imports {loaded} at import time"
+    total_ms = times[module] / 1000
+    print(f"[INFO] import {module}: {total_ms:.1f} ms")
+    assert total_ms < BUDGET_MS
+
+
+def test_singletons_are_created_once(monkeypatch, tmp_path):
+    backend = breaking_monitor.StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    monkeypatch.setattr(breaking_monitor, "storage_backend", backend)
+    for name in ("news_store", "fetcher", "dedup_index", "translation_cache", "feed_materializer"):
+        monkeypatch.setattr(breaking_monitor, name, None)
+
+    store = breaking_monitor.get_news_store()
+    assert store.backend is backend
+    assert breaking_monitor.get_news_store() is store
+    assert breaking_monitor.get_fetcher() is breaking_monitor.get_fetcher()
+    assert breaking_monitor.get_dedup_index().backend is backend
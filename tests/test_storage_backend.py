@@ -0,0 +1,181 @@
+import pytest
+from google.api_core.exceptions import PreconditionFailed
+
+from breaking_monitor import StorageBackend
+
+
+def test_local_compare_and_swap(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    assert backend.download_json_with_generation("a.json") == ([], 0)
+
+    backend.upload_json("a.json", [1], if_generation_match=0)
+    with pytest.raises(PreconditionFailed):
+        backend.upload_json("a.json", [2], if_generation_match=0)
+
+    data, generation = backend.download_json_with_generation("a.json")
+    assert data == [1]
+    backend.upload_json("a.json", [1, 2], if_generation_match=generation)
+    with pytest.raises(PreconditionFailed):
+        backend.upload_text("a.json", "stale", if_generation_match=generation)
+    assert backend.download_json("a.json") == [1, 2]
+
+
+def test_update_json_retries_on_conflict(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.upload_json("n.json", {"n": 0})
+    calls = []
+
+    def mutate(data):
+        calls.append(dict(data))
+        if len(calls) == 1:
+            # Simulate another writer landing between our read and write.
+            backend.upload_json("n.json", {"n": 10})
+        return {"n": data["n"] + 1}
+
+    assert backend.update_json("n.json", mutate) == {"n": 11}
+    assert len(calls) == 2
+
+
+def test_stale_local_lock_is_broken(tmp_path):
+    import json
+    import os
+    import socket
+    import time
+
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.upload_json("n.json", {"n": 0})
+    lock_path = str(tmp_path / "n.json.lock")
+
+    # left behind by a killed process on this host
+    dead = os.fork()
+    if dead == 0:
+        os._exit(0)
+    os.waitpid(dead, 0)
+    with open(lock_path, "w") as fh:
+        json.dump({"pid": dead, "host": socket.gethostname(), "time": time.time()}, fh)
+    assert backend.update_json("n.json", lambda data: {"n": data["n"] + 1}) == {"n": 1}
+    assert not os.path.exists(lock_path)
+
+    # an old lock from another host (or an empty legacy lock file)
+    with open(lock_path, "w") as fh:
+        json.dump({"pid": 1, "host": "elsewhere", "time": time.time() - 3600}, fh)
+    assert backend.update_json("n.json", lambda data: {"n": data["n"] + 1}) == {"n": 2}
+    open(lock_path, "w").close()
+    os.utime(lock_path, (time.time() - 3600,) * 2)
+    assert backend.update_json("n.json", lambda data: {"n": data["n"] + 1}) == {"n": 3}
+
+    # a live holder is waited for, not broken
+    with open(lock_path, "w") as fh:
+        json.dump({"pid": os.getpid(), "host": socket.gethostname(), "time": time.time()}, fh)
+    assert not StorageBackend._break_stale_lock(lock_path)
+    assert os.path.exists(lock_path)
+
+
+def test_compact_json_is_minified(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.upload_json("c.json", [{"title": "突發 新聞"}], compact=True, cache_control="public, max-age=60")
+    raw = (tmp_path / "c.json").read_text(encoding='utf-8')
+    assert raw == '[{"title":"突發 新聞"}]'
+    assert backend.download_json("c.json") == [{"title": "突發 新聞"}]
+
+
+def test_read_through_cache_revalidates_by_generation(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    other = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.upload_json("h.json", [1, 2], compact=True)
+
+    assert backend.download_json("h.json") == [1, 2]  # written through
+    assert backend.download_json("h.json") == [1, 2]
+    assert backend.cache.stats["hits"] == 2 and backend.cache.stats["bytes_avoided"] == 10
+
+    other.upload_json("h.json", [3])  # another process changes the object
+    assert backend.download_json("h.json") == [3]
+    assert backend.cache.stats["misses"] == 1
+    other.delete("h.json")
+    assert backend.download_json_with_generation("h.json") == ([], 0)
+
+
+def test_object_cache_evicts_least_recently_used():
+    from object_cache import ObjectCache
+
+    cache = ObjectCache(max_bytes=10, max_entry_bytes=6)
+    cache.put("a", 1, "aaaa")
+    cache.put("b", 1, "bbbb")
+    cache.get("a")
+    cache.put("c", 1, "cccc")
+    cache.put("too-big", 1, "x" * 7)
+    assert cache.get("b") is None and cache.get("too-big") is None
+    assert cache.get("a").text == "aaaa" and cache.size == 8
+    assert cache.stats["evictions"] == 1
+
+
+def test_local_writes_are_atomic(tmp_path, monkeypatch):
+    import os
+
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True, cache_bytes=0)
+    backend.upload_json("news.json", [{"id": 1}])
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", crash)
+    with pytest.raises(OSError):
+        backend.upload_json("news.json", [{"id": 2}] * 1000)
+    assert backend.download_json("news.json") == [{"id": 1}]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["news.json"]
+
+
+class FakeGcsBlob:
+    def __init__(self, bucket, name):
+        self.bucket, self.name = bucket, name
+        self.generation = None
+        self.cache_control = None
+        self.content_encoding = None
+
+    def download_as_text(self, if_generation_not_match=None):
+        from google.api_core.exceptions import NotFound, NotModified
+
+        self.bucket.requests += 1
+        if self.name not in self.bucket.objects:
+            raise NotFound(self.name)
+        text, generation = self.bucket.objects[self.name]
+        if generation == if_generation_not_match:
+            raise NotModified(self.name)
+        self.generation = generation
+        return text
+
+    def upload_from_string(self, payload, content_type=None, if_generation_match=None):
+        import gzip
+
+        if isinstance(payload, bytes):
+            payload = (gzip.decompress(payload) if self.content_encoding else payload).decode('utf-8')
+        self.bucket.generation += 1
+        self.generation = self.bucket.generation
+        self.bucket.objects[self.name] = (payload, self.generation)
+
+
+class FakeGcsBucket:
+    def __init__(self):
+        self.objects = {}
+        self.generation = 100
+        self.requests = 0
+
+    def blob(self, name):
+        return FakeGcsBlob(self, name)
+
+
+def test_gcs_download_is_one_conditional_request(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.use_local = False
+    backend.bucket = FakeGcsBucket()
+
+    assert backend.download_text("missing.txt") == "" and backend.bucket.requests == 1
+    backend.bucket.objects["m.json"] = ('{"a":1}', 7)
+    assert backend.download_json_with_generation("m.json") == ({"a": 1}, 7)
+    assert backend.download_json("m.json") == {"a": 1}  # 304 Not Modified
+    assert backend.bucket.requests == 3
+    assert backend.cache.stats == {"hits": 1, "misses": 1, "evictions": 0, "bytes_avoided": 7}
+
+    backend.upload_json("m.json", {"a": 2}, compact=True)
+    assert backend.download_json("m.json") == {"a": 2}
+    assert backend.cache.stats["hits"] == 2
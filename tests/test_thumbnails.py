@@ -0,0 +1,80 @@
+import io
+
+from PIL import Image
+
+from breaking_monitor import StorageBackend
+from thumbnails import ThumbnailStore
+
+
+class FakeImageResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.payload), size):
+            yield self.payload[i:i + size]
+
+
+class FakeSession:
+    def __init__(self, images):
+        self.images = images
+        self.calls = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.calls.append(url)
+        return FakeImageResponse(self.images[url])
+
+
+def make_jpeg(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def make_store(tmp_path, images):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return ThumbnailStore(backend, base_url="https://cdn.example", session=FakeSession(images))
+
+
+def test_apply_writes_thumbnails_and_rewrites_image_url(tmp_path):
+    jpeg = make_jpeg(1600, 900)
+    store = make_store(tmp_path, {"https://img.example/a.jpg": jpeg})
+
+    item = store.apply({"imageUrl": "https://img.example/a.jpg"})
+    assert set(item["thumbnails"]) == {"320", "640", "1080"}
+    assert item["imageUrl"] == item["thumbnails"]["1080"]["jpeg"]
+    assert item["imageUrl"].startswith("https://cdn.example/images/") and item["imageUrl"].endswith("/1080.jpg")
+
+    key = item["thumbnails"]["320"]["webp"][len("https://cdn.example/"):]
+    with Image.open(tmp_path / key) as thumb:
+        assert thumb.format == "WEBP" and thumb.size == (320, 180)
+
+
+def test_repeated_image_is_deduplicated_by_content_hash(tmp_path):
+    jpeg = make_jpeg(800, 600)
+    store = make_store(tmp_path, {"https://img.example/a.jpg": jpeg, "https://other.example/copy.jpg": jpeg})
+
+    first = store.process("https://img.example/a.jpg")
+    assert set(first["thumbnails"]) == {"320", "640"}  # no upscaling past 800px
+    uploads = sorted(p.name for p in tmp_path.rglob("*.*"))
+
+    second = store.process("https://other.example/copy.jpg")
+    assert second["thumbnails"] == first["thumbnails"]
+    assert sorted(p.name for p in tmp_path.rglob("*.*")) == uploads
+
+
+def test_disabled_stage_leaves_item_untouched(tmp_path, monkeypatch):
+    monkeypatch.setenv("THUMBNAILS", "0")
+    store = make_store(tmp_path, {})
+    item = {"imageUrl": "https://img.example/a.jpg"}
+    assert store.apply(item) == {"imageUrl": "https://img.example/a.jpg"}
+    assert store.session.calls == []
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import tracing
+from breaking_monitor import StorageBackend
+
+
+def test_span_records_stage_and_logs_json(capsys):
+    tracer = tracing.Tracer()
+    with tracer.span("homepage_fetch", source="guardian"):
+        pass
+    with pytest.raises(ValueError):
+        with tracer.span("homepage_fetch"):
+            raise ValueError("boom")
+    tracer.incr("http_bytes_downloaded", 1200)
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records[0]["stage"] == "homepage_fetch" and records[0]["source"] == "guardian"
+    assert records[0]["severity"] == "INFO" and records[0]["run_id"] == tracer.run_id
+    assert records[1]["severity"] == "ERROR" and records[1]["error"] == "ValueError"
+
+    summary = tracer.summary()
+    assert summary["stages"]["homepage_fetch"]["count"] == 2
+    assert summary["stages"]["homepage_fetch"]["errors"] == 1
+    assert summary["counters"] == {"http_bytes_downloaded": 1200}
+
+
+def test_storage_calls_are_counted(tmp_path):
+    tracer = tracing.start_run()
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    backend.upload_json("a.json", [1, 2, 3], compact=True)
+    assert backend.download_json("a.json") == [1, 2, 3]  # served from the write-through cache
+    reader = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    assert reader.download_json("a.json") == [1, 2, 3]
+
+    summary = tracer.summary()
+    assert summary["counters"]["storage_bytes_uploaded"] == len("[1,2,3]")
+    assert summary["counters"]["storage_bytes_downloaded"] == len("[1,2,3]")
+    assert summary["counters"]["storage_cache_bytes_avoided"] == len("[1,2,3]")
+    assert summary["stages"]["storage_upload"]["count"] == 1
+
+
+def test_persisted_summaries_give_percentiles(tmp_path):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    for i in range(1, 21):
+        summary = {"run_id": f"r{i}", "started_at": "2026-10-17T00:00:00Z", "duration_ms": i * 100,
+                   "stages": {"openai": {"count": 1, "total_ms": i * 10, "max_ms": i * 10, "errors": 0}},
+                   "counters": {}}
+        tracing.persist_summary(backend, summary, keep=10)
+
+    runs = backend.download_json("metrics/recent.json")
+    assert [r["run_id"] for r in runs] == [f"r{i}" for i in range(11, 21)]
+    assert (tmp_path / "metrics" / "runs" / "2026-10-17" / "r1.json").exists()
+
+    report = tracing.latency_report(runs)
+    assert report["run"]["p50_ms"] == 1500 and report["run"]["p95_ms"] == 2000
+    assert report["openai"] == {"runs": 10, "p50_ms": 150, "p95_ms": 200}
+
+
+def test_concurrent_runs_keep_separate_tracers():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    async def run(n):
+        tracer = tracing.start_run()
+        for _ in range(n):
+            await asyncio.sleep(0)
+            tracing.incr("calls")
+            await asyncio.to_thread(tracing.incr, "thread_calls")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(tracing.propagate(lambda _: tracing.incr("pool_calls")), range(n)))
+        return tracer.summary()["counters"]
+
+    async def main():
+        return await asyncio.gather(run(3), run(5))
+
+    default = tracing.current()
+    first, second = asyncio.run(main())
+    assert first == {"calls": 3, "thread_calls": 3, "pool_calls": 3}
+    assert second == {"calls": 5, "thread_calls": 5, "pool_calls": 5}
+    assert tracing.current() is default
+
+
+def test_log_level_filters_records(capsys, monkeypatch):
+    monkeypatch.setattr(tracing, "LOG_LEVEL", "INFO")
+    tracing.log("noise", severity="DEBUG")
+    tracing.log("kept", severity="WARNING", source="abc")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["message"], r["severity"], r["source"]) for r in records] == [("kept", "WARNING", "abc")]
@@ -0,0 +1,86 @@
+import breaking_monitor
+from breaking_monitor import StorageBackend
+from translation_cache import TranslationCache, cache_key
+
+
+def make_cache(tmp_path, max_entries=10):
+    backend = StorageBackend("test-bucket", local_dir=str(tmp_path), local_only=True)
+    return TranslationCache(backend, max_entries=max_entries)
+
+
+def test_cache_key_ignores_whitespace_and_case_but_not_prompt_version():
+    a = cache_key("Storm Hits", "Para 1\n\nPara 2", "v1")
+    assert a == cache_key("storm  hits", "Para 1 Para 2", "v1")
+    assert a != cache_key("storm hits", "Para 1 Para 2", "v2")
+
+
+def test_cache_hit_miss_and_lru_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", [{"title": "A"}])
+    cache.put("b", [{"title": "B"}])
+    assert cache.get("a") == [{"title": "A"}]
+    cache.put("c", [{"title": "C"}])
+
+    cache = TranslationCache(cache.backend, max_entries=2)
+    assert cache.get("b") is None
+    assert cache.get("c") == [{"title": "C"}]
+    assert cache.stats["hits"] == 2
+    assert cache.stats["evictions"] == 1
+
+
+def test_translate_breaking_story_uses_cache(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_translate(data):
+        calls.append(data['url'])
+        return [{"title": "【突發】測試", "citations": [data['url']]}]
+
+    monkeypatch.setattr(breaking_monitor, 'translation_cache', make_cache(tmp_path))
+    monkeypatch.setattr(breaking_monitor, '_translate_with_openai', fake_translate)
+
+    story = {"title": "T", "content": "Body", "publishedAt": "2026-01-01T00:00:00Z",
+             "url": "https://example.com/a", "imageUrl": ""}
+    breaking_monitor.translate_breaking_story(story)
+    moved = dict(story, url="https://example.com/a-live")
+    out = breaking_monitor.translate_breaking_story(moved)
+
+    assert calls == ["https://example.com/a"]
+    assert out[0]["citations"] == ["https://example.com/a-live"]
+
+
+def test_instances_merge_their_index_updates(tmp_path):
+    first = make_cache(tmp_path, max_entries=3)
+    second = TranslationCache(first.backend, max_entries=3)
+    first.get("x")
+    second.get("x")  # both instances hold a (stale) copy of the index
+
+    first.put("a", [{"title": "A"}])
+    second.put("b", [{"title": "B"}])
+    first.put("c", [{"title": "C"}])
+    second.put("d", [{"title": "D"}])
+
+    index = first.backend.download_json(first.index_key)
+    assert sorted(index["entries"]) == ["b", "c", "d"]
+    assert index["stats"]["evictions"] == 1
+    assert first.backend.download_json(first.entry_key("a")) == []
+    assert first.get("b") == [{"title": "B"}]
+
+
+def test_hits_are_batched_into_one_index_write(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("a", [{"title": "A"}])
+    writes = []
+    upload_json = cache.backend.upload_json
+    cache.backend.upload_json = lambda name, *args, **kwargs: (writes.append(name), upload_json(name, *args, **kwargs))[1]
+
+    for _ in range(5):
+        assert cache.get("a") == [{"title": "A"}]
+    assert cache.get("missing") is None
+    assert writes == []
+    assert cache.stats["hits"] == 5
+
+    cache.flush()
+    assert writes == [cache.index_key]
+    stored = cache.backend.download_json(cache.index_key)["stats"]
+    assert (stored["hits"], stored["misses"]) == (5, 1)
@@ -0,0 +1,70 @@
+import os
+import random
+import signal
+import threading
+import time
+
+from watcher import AdaptiveInterval, Watcher
+
+
+def test_interval_backs_off_and_resets_on_change():
+    interval = AdaptiveInterval(min_interval=5, max_interval=40, backoff=2, jitter=0.2, rng=random.Random(1))
+    assert [interval.update(False) for _ in range(4)] == [10, 20, 40, 40]
+    assert interval.update(True) == 5
+    sleeps = [interval.next_sleep() for _ in range(50)]
+    assert all(4 <= s <= 6 for s in sleeps) and len(set(sleeps)) > 1
+
+
+def test_watcher_survives_errors_and_adapts():
+    results = iter([{"counters": {"http_changed": 1, "stories_published": 1}}, RuntimeError("boom"),
+                    {"counters": {}}])
+
+    def run_once():
+        r = next(results)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    interval = AdaptiveInterval(min_interval=0.01, max_interval=0.04, backoff=2, jitter=0)
+    watcher = Watcher(run_once, interval, max_runs=3)
+    watcher.run()
+    assert watcher.runs == 3 and watcher.errors == 1
+    assert interval.current == 0.02  # changed -> min, then one quiet (failed) run
+    assert watcher.last_run["ok"] is True
+
+
+def test_failing_runs_back_off_although_the_homepage_changed():
+    # OpenAI / GCS keep failing: the homepage is never committed and looks changed on every poll
+    results = iter([{"counters": {"http_changed": 1, "stories_failed": 1}, "stages": {"translate": {"errors": 0}}},
+                    {"counters": {"http_changed": 1}, "stages": {"publish": {"count": 1, "errors": 1}}},
+                    {"counters": {"http_changed": 1, "stories_published": 1}, "stages": {"feed": {"errors": 1}}},
+                    {"counters": {"http_changed": 1}, "stages": {}},
+                    {"counters": {"http_changed": 1}}])
+    interval = AdaptiveInterval(min_interval=0.01, max_interval=1, backoff=2, jitter=0)
+    seen = []
+
+    def run_once():
+        seen.append(interval.current)
+        return next(results)
+
+    watcher = Watcher(run_once, interval, max_runs=5)
+    watcher.run()
+    assert seen == [0.01, 0.02, 0.04, 0.08, 0.16]
+    assert watcher.errors == 3
+    assert watcher.last_run["ok"] is True and watcher.last_run["changed"] is False
+
+
+def test_sigterm_stops_after_current_run():
+    calls = []
+    watcher = Watcher(lambda: calls.append(1) or {}, AdaptiveInterval(min_interval=30, max_interval=60))
+    previous = signal.getsignal(signal.SIGTERM)
+    watcher.install_signal_handlers()
+    try:
+        threading.Timer(0.2, os.kill, args=(os.getpid(), signal.SIGTERM)).start()
+        start = time.monotonic()
+        watcher.run()
+        assert time.monotonic() - start < 5
+        assert len(calls) == 1 and watcher.stopping.is_set()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
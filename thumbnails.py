@@ -0,0 +1,161 @@
+"""Optional lead-image thumbnails served from our own bucket.
+
+The article's ``og:image`` (or first ``<img>``) is downloaded once, streamed
+into a spooled temporary file while its SHA-256 is computed, and resized to
+a few fixed widths in WebP and JPEG.  Objects are content addressed::
+
+    images/<hash>/320.webp   images/<hash>/320.jpg   ...
+    images/<hash>/manifest.json   {"source", "width", "height", "thumbnails"}
+
+The manifest is written last, so an existing manifest means the image was
+already processed: a repeated image (same bytes under any URL) costs one
+download and no resizing or uploads.
+
+Memory stays bounded: the download spills to disk beyond ``SPOOL_MAX``
+bytes, downloads larger than ``max_bytes`` are rejected, and JPEGs are
+decoded with ``Image.draft`` at a reduced scale close to the largest
+requested width.  Requires ``Pillow`` (in requirements.txt); with
+``THUMBNAILS=0``, or where Pillow is not installed, the stage is skipped and
+``imageUrl`` is left alone.
+"""
+import hashlib
+import importlib.util
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+import tracing
+from news_format import IMMUTABLE_CACHE_CONTROL
+
+IMAGE_PREFIX = "images"
+THUMBNAIL_WIDTHS = (320, 640, 1080)
+FORMATS = (("webp", "WEBP", "image/webp"), ("jpeg", "JPEG", "image/jpeg"))
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+QUALITY = 80
+MAX_DOWNLOAD_BYTES = 15 * 2 ** 20
+MAX_PIXELS = 40_000_000
+SPOOL_MAX = 2 ** 20
+
+
+def pillow_available() -> bool:
+    # Pillow itself is only imported when an image is rendered (cold start)
+    return importlib.util.find_spec("PIL") is not None
+
+
+def thumbnails_enabled() -> bool:
+    return pillow_available() and os.environ.get("THUMBNAILS", "1") != "0"
+
+
+def apply_manifest(item: dict, manifest: dict) -> dict:
+    """Rewrite ``imageUrl`` to the largest JPEG and add the ``thumbnails`` map."""
+    if manifest and manifest.get("thumbnails"):
+        item['thumbnails'] = manifest["thumbnails"]
+        largest = max(manifest["thumbnails"], key=int)
+        item['imageUrl'] = manifest["thumbnails"][largest]["jpeg"]
+    return item
+
+
+class ThumbnailStore:
+    """Downloads, resizes and stores lead images under content-hash keys."""
+
+    def __init__(self, backend, prefix: str = IMAGE_PREFIX, widths=THUMBNAIL_WIDTHS,
+                 base_url: str = None, max_bytes: int = MAX_DOWNLOAD_BYTES, session=None):
+        self.backend = backend
+        self.prefix = prefix
+        self.widths = tuple(sorted(widths))
+        self.base_url = (base_url or os.environ.get("IMAGE_BASE_URL")
+                         or f"https://storage.googleapis.com/{backend.bucket_name}").rstrip('/')
+        self.max_bytes = max_bytes
+        self.session = session
+
+    def key(self, digest: str, name: str) -> str:
+        return f"{self.prefix}/{digest}/{name}"
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    # ------------------------------------------------------------------
+    # Pipeline stage
+    # ------------------------------------------------------------------
+    def apply(self, item: dict, image_url: str = None) -> dict:
+        """Point ``item['imageUrl']`` at our largest JPEG and add ``item['thumbnails']``.
+
+        Any failure leaves the item unchanged (the original URL is kept).
+        """
+        source = image_url or item.get('imageUrl')
+        if not source or not thumbnails_enabled():
+            return item
+        try:
+            manifest = self.process(source)
+        except Exception as e:
+            tracing.log(f"Thumbnail generation failed: {e}", severity="WARNING", url=source)
+            return item
+        return apply_manifest(item, manifest)
+
+    def process(self, image_url: str) -> dict:
+        """Return the manifest for ``image_url``, creating thumbnails if needed."""
+        with self._download(image_url) as (spool, digest):
+            manifest_key = self.key(digest, "manifest.json")
+            existing = self.backend.download_json(manifest_key)
+            if isinstance(existing, dict) and existing.get("thumbnails"):
+                tracing.incr("thumbnail_dedup_hits")
+                return existing
+            with tracing.span("thumbnails_render", log=False):
+                manifest = self._render(spool, digest, image_url)
+        self.backend.upload_json(manifest_key, manifest, compact=True, cache_control=IMMUTABLE_CACHE_CONTROL)
+        return manifest
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _download(self, image_url: str):
+        """Stream ``image_url`` into a spooled temp file; yields ``(file, sha256 hex[:24])``."""
+        session = self.session
+        if session is None:
+            from fetcher import get_session
+            session = get_session()
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX) as spool:
+            sha = hashlib.sha256()
+            size = 0
+            with session.get(image_url, stream=True, timeout=15) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError(f"image larger than {self.max_bytes} bytes")
+                    sha.update(chunk)
+                    spool.write(chunk)
+            tracing.incr("image_bytes_downloaded", size)
+            spool.seek(0)
+            yield spool, sha.hexdigest()[:24]
+
+    def _render(self, spool, digest: str, image_url: str) -> dict:
+        from PIL import Image, ImageOps
+
+        with Image.open(spool) as img:
+            if img.width * img.height > MAX_PIXELS:
+                raise ValueError(f"image too large ({img.width}x{img.height})")
+            width, height = img.size
+            widths = [w for w in self.widths if w < width] or [width]
+            # JPEG: decode at the smallest power-of-two scale still >= the largest width
+            img.draft('RGB', (max(widths), max(1, height * max(widths) // width)))
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            thumbnails = {}
+            for w in sorted(widths, reverse=True):
+                h = max(1, round(img.height * w / img.width))
+                resized = img if (w, h) == img.size else img.resize((w, h), Image.LANCZOS)
+                urls = {}
+                for name, pil_format, content_type in FORMATS:
+                    buf = io.BytesIO()
+                    resized.save(buf, pil_format, quality=QUALITY, optimize=True)
+                    key = self.key(digest, f"{w}.{EXTENSIONS[name]}")
+                    self.backend.upload_bytes(key, buf.getvalue(), content_type=content_type,
+                                              cache_control=IMMUTABLE_CACHE_CONTROL)
+                    urls[name] = self.url(key)
+                thumbnails[str(w)] = urls
+                img = resized  # next (smaller) width resizes from this one
+        return {"source": image_url, "width": width, "height": height, "thumbnails": thumbnails}
@@ -0,0 +1,242 @@
+"""Lightweight per-run tracing: stage spans, counters and JSON log records.
+
+``span("homepage_fetch")`` times one stage of a run and writes a structured
+JSON line to stdout.  Cloud Logging parses such lines into ``jsonPayload``,
+with ``severity`` and ``message`` mapped to the log entry.  Spans opened with
+``log=False`` (e.g. every storage call) are only aggregated.  ``incr`` keeps
+counters such as bytes downloaded or uploaded and LLM tokens.
+
+At the end of a run ``summary()`` gives per-stage count / total / max
+milliseconds plus the counters.  ``persist_summary`` stores it through
+``StorageBackend``::
+
+    metrics/runs/<YYYY-MM-DD>/<run_id>.json   one object per run
+    metrics/recent.json                       last RECENT_RUNS summaries
+
+``metrics/recent.json`` is what ``scripts/latency_report.py`` reads to
+compute p50 / p95 per stage.  Set ``TRACE_LOG=0`` to silence span records
+and ``TRACE_LOG_LEVEL`` (e.g. ``INFO``) to drop records of lower severity.
+
+``log(message, severity=...)`` writes every other pipeline message (source
+debug output, storage writes, translation / feed / search / publish
+failures, watch mode, ...) in the same format, so they carry the run id and
+can be filtered by severity next to the span records.
+
+The current tracer lives in a ``contextvars.ContextVar``: ``start_run()``
+gives one run its own tracer, and asyncio tasks and ``asyncio.to_thread``
+inherit it, so concurrent runs in one process (Cloud Run concurrency > 1)
+keep their spans and counters apart.  Plain thread pools do not copy the
+context; wrap their work with ``propagate``.  Outside a run everything goes
+to a process-wide default tracer.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+METRICS_PREFIX = "metrics"
+RECENT_RUNS = 500
+LOG_SPANS = os.environ.get("TRACE_LOG", "1") != "0"
+# Cloud Logging severities; records below TRACE_LOG_LEVEL are dropped
+SEVERITIES = ("DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL")
+LOG_LEVEL = os.environ.get("TRACE_LOG_LEVEL", "DEBUG").upper()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _rank(severity: str) -> int:
+    return SEVERITIES.index(severity) if severity in SEVERITIES else SEVERITIES.index("INFO")
+
+
+class Tracer:
+    """Collects stage timings and counters for one run."""
+
+    def __init__(self, component: str = "breaking_monitor"):
+        self.component = component
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, run_id: str = None):
+        with self._lock:
+            self.run_id = run_id or uuid.uuid4().hex[:12]
+            self.started_at = _now_iso()
+            self._start = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+
+    def log(self, message: str, severity: str = "INFO", **fields):
+        """Write one structured log record (a JSON line) to stdout."""
+        if _rank(severity) < _rank(LOG_LEVEL):
+            return
+        record = {"severity": severity, "message": message, "component": self.component,
+                  "run_id": self.run_id, "time": _now_iso()}
+        record.update({k: v for k, v in fields.items() if v is not None})
+        print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+    @contextmanager
+    def span(self, stage: str, log: bool = True, **fields):
+        """Time the enclosed block as ``stage``; exceptions are recorded and re-raised."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(stage, elapsed_ms, error)
+            if log and LOG_SPANS:
+                self.log(f"{stage} {elapsed_ms:.1f}ms", severity="ERROR" if error else "INFO",
+                         stage=stage, duration_ms=round(elapsed_ms, 2), error=error, **fields)
+
+    def timed(self, stage: str, log: bool = False):
+        """Decorator form of ``span`` (aggregated only by default)."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, log=log):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, stage: str, elapsed_ms: float, error: str = None):
+        with self._lock:
+            s = self.stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+            s["count"] += 1
+            s["total_ms"] += elapsed_ms
+            s["max_ms"] = max(s["max_ms"], elapsed_ms)
+            if error:
+                s["errors"] += 1
+
+    def incr(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def summary(self) -> dict:
+        with self._lock:
+            stages = {name: {"count": s["count"], "total_ms": round(s["total_ms"], 2),
+                             "max_ms": round(s["max_ms"], 2), "errors": s["errors"]}
+                      for name, s in self.stages.items()}
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "duration_ms": round((time.perf_counter() - self._start) * 1000, 2),
+                "stages": stages,
+                "counters": dict(self.counters),
+            }
+
+
+_current = contextvars.ContextVar("tracer", default=Tracer())
+
+
+def current() -> Tracer:
+    """The tracer of the run in progress (the process default outside a run)."""
+    return _current.get()
+
+
+def start_run(run_id: str = None) -> Tracer:
+    """Give the calling context, and the tasks and threads it starts, a fresh tracer."""
+    tracer = Tracer()
+    tracer.reset(run_id)
+    _current.set(tracer)
+    return tracer
+
+
+def propagate(func):
+    """Bind ``func`` to the current tracer for use in a thread pool."""
+    tracer = current()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(tracer)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+def span(stage: str, log: bool = True, **fields):
+    return current().span(stage, log=log, **fields)
+
+
+def timed(stage: str, log: bool = False):
+    """Decorator form of ``span``; the tracer is looked up at call time."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, log=log):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(counter: str, n: int = 1):
+    current().incr(counter, n)
+
+
+def log(message: str, severity: str = "INFO", **fields):
+    current().log(message, severity=severity, **fields)
+
+
+def record_llm_usage(usage=None, prompt_text: str = "", completion_text: str = ""):
+    """Add LLM token counts, estimating them when the API returned no usage
+    (e.g. a stream closed before its final usage chunk)."""
+    if usage is not None and getattr(usage, 'prompt_tokens', None) is not None:
+        incr("llm_prompt_tokens", int(usage.prompt_tokens))
+        incr("llm_completion_tokens", int(usage.completion_tokens or 0))
+        return
+    from chunked_translation import estimate_tokens
+    incr("llm_prompt_tokens", estimate_tokens(prompt_text or ""))
+    incr("llm_completion_tokens", estimate_tokens(completion_text or ""))
+    incr("llm_usage_estimated")
+
+
+def persist_summary(backend, summary: dict, prefix: str = METRICS_PREFIX, keep: int = RECENT_RUNS):
+    """Store one run summary and append it to the rolling ``recent.json``."""
+    day = summary.get("started_at", _now_iso())[:10]
+    backend.upload_json(f"{prefix}/runs/{day}/{summary['run_id']}.json", summary, compact=True)
+
+    def mutate(data):
+        runs = [r for r in (data if isinstance(data, list) else [])
+                if isinstance(r, dict) and r.get("run_id") != summary["run_id"]]
+        runs.append(summary)
+        return runs[-keep:]
+
+    backend.update_json(f"{prefix}/recent.json", mutate, compact=True)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))  # ceil
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_report(summaries: list, pcts=(50, 95)) -> dict:
+    """``{stage: {"runs": n, "p50_ms": .., "p95_ms": ..}}`` over run summaries.
+
+    A stage's value per run is its total time in that run; ``"run"`` is the
+    whole run's ``duration_ms``.
+    """
+    per_stage = {"run": [s["duration_ms"] for s in summaries if "duration_ms" in s]}
+    for s in summaries:
+        for stage, stats in (s.get("stages") or {}).items():
+            per_stage.setdefault(stage, []).append(stats["total_ms"])
+    report = {}
+    for stage, values in per_stage.items():
+        row = {"runs": len(values)}
+        for pct in pcts:
+            row[f"p{pct}_ms"] = round(percentile(values, pct), 2)
+        report[stage] = row
+    return report
@@ -0,0 +1,158 @@
+"""Content-addressed cache of translation results.
+
+A story whose URL changes but whose text does not (live-blog re-slugs,
+tracking parameters) maps to the same key, so it can be published without
+another OpenAI round trip.  Keys are SHA-256 digests of the normalized
+title, the normalized content and the prompt version.
+
+Layout in ``StorageBackend``::
+
+    translation_cache/<key>.json    parse_json_safely() output for one story
+    translation_cache/index.json    {"entries": {key: last_used_ts}, "stats": {...}}
+
+The index drives LRU eviction once more than ``max_entries`` are stored.
+It is shared by every instance, so it is only changed with
+``backend.update_json`` (compare-and-swap) and each write merges this
+instance's changes into the stored copy.  ``put`` writes the index at once;
+the last-used times and counters of hits and misses are batched and written
+at most every ``flush_interval`` seconds (or by ``flush``).
+"""
+import copy
+import hashlib
+import threading
+import time
+
+from dedup_index import normalize_title
+
+CACHE_PREFIX = "translation_cache"
+DEFAULT_MAX_ENTRIES = 500
+FLUSH_INTERVAL = 60
+
+
+def cache_key(title: str, content: str, prompt_version: str) -> str:
+    norm_content = " ".join((content or "").split())
+    payload = "\x1f".join([prompt_version, normalize_title(title), norm_content])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _normalize_index(data) -> dict:
+    index = data if isinstance(data, dict) else {}
+    index.setdefault("entries", {})
+    index.setdefault("stats", {})
+    for stat in ("hits", "misses", "evictions"):
+        index["stats"].setdefault(stat, 0)
+    return index
+
+
+class TranslationCache:
+    """LRU, size-capped cache of translated items stored via a StorageBackend."""
+
+    def __init__(self, backend, prefix: str = CACHE_PREFIX, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.backend = backend
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._index = None
+        # 尚未寫入 index 的變更：命中的 key -> last used、物件已不存在的 key -> index 內的時間，以及計數
+        self._touched = {}
+        self._missing = {}
+        self._stats = {"hits": 0, "misses": 0}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}/index.json"
+
+    def entry_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json"
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            self._index = _normalize_index(self.backend.download_json(self.index_key))
+        return self._index
+
+    @property
+    def stats(self) -> dict:
+        """Stored counters plus the ones not flushed yet."""
+        with self._lock:
+            stats = dict(self._load_index()["stats"])
+            for stat, n in self._stats.items():
+                stats[stat] += n
+            return stats
+
+    def get(self, key: str):
+        """Return a copy of the cached result for ``key`` or None.
+
+        The entry object is read even if the local copy of the index does
+        not list it: another instance may have stored it since.
+        """
+        value = self.backend.download_json(self.entry_key(key))
+        with self._lock:
+            if not value:
+                self._stats["misses"] += 1
+                listed = self._load_index()["entries"].get(key)
+                if listed is not None:
+                    self._missing[key] = listed
+            else:
+                self._stats["hits"] += 1
+                self._touched[key] = time.time()
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return copy.deepcopy(value) if value else None
+
+    def put(self, key: str, value):
+        self.backend.upload_json(self.entry_key(key), value)
+        with self._lock:
+            self._touched[key] = time.time()
+        self.flush()
+
+    def flush(self):
+        """Merge pending last-used times and counters into the stored index,
+        then delete the entries evicted by that write."""
+        with self._lock:
+            touched, missing, stats = dict(self._touched), dict(self._missing), dict(self._stats)
+            self._touched.clear()
+            self._missing.clear()
+            self._stats = {"hits": 0, "misses": 0}
+            self._last_flush = time.monotonic()
+        if not touched and not missing and not any(stats.values()):
+            return
+        evicted = []
+
+        def mutate(data):
+            index = _normalize_index(data)
+            entries = index["entries"]
+            for key, ts in touched.items():
+                entries[key] = max(entries.get(key, 0), ts)
+            for key, listed in missing.items():
+                # 其他 instance 在此之後重新寫入的 entry 要保留
+                if key not in touched and entries.get(key, 0) <= listed:
+                    entries.pop(key, None)
+            for stat, n in stats.items():
+                index["stats"][stat] += n
+            overflow = len(entries) - self.max_entries
+            evicted[:] = [key for key, _ in sorted(entries.items(), key=lambda kv: kv[1])[:max(0, overflow)]]
+            for key in evicted:
+                del entries[key]
+            index["stats"]["evictions"] += len(evicted)
+            return index
+
+        try:
+            index = self.backend.update_json(self.index_key, mutate)
+        except Exception:
+            # 寫入失敗時保留變更，下次再合併
+            with self._lock:
+                for key, ts in touched.items():
+                    self._touched.setdefault(key, ts)
+                for key, listed in missing.items():
+                    self._missing.setdefault(key, listed)
+                for stat, n in stats.items():
+                    self._stats[stat] += n
+            raise
+        with self._lock:
+            self._index = index
+        for key in evicted:
+            self.backend.delete(self.entry_key(key))
@@ -0,0 +1,182 @@
+"""Long-running watch mode for the Cloud Run container.
+
+    python -m watcher watch      # poll until SIGTERM / Ctrl-C
+    python -m watcher run        # one pass, like the scheduled function
+
+Instead of one cold start per Cloud Scheduler tick, ``watch`` keeps the
+process (and its GCS / OpenAI clients and HTTP connection pool) warm and
+runs ``process_breaking_news`` on an adaptive interval:
+
+* a run that published a story drops the interval to ``min_interval``,
+* every quiet run, and every run with failed stages (see ``failed_stages``),
+  multiplies it by ``backoff`` up to ``max_interval``,
+* each sleep is jittered by +/- ``jitter`` so parallel instances do not
+  poll in lock step.
+
+SIGTERM / SIGINT stop the loop after the current run; Cloud Run allows
+10 seconds between SIGTERM and SIGKILL.  When ``PORT`` is set a small HTTP
+endpoint reports the last run so the container passes Cloud Run's startup
+and liveness checks.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tracing
+
+MIN_INTERVAL = float(os.environ.get('WATCH_MIN_INTERVAL', '5'))
+MAX_INTERVAL = float(os.environ.get('WATCH_MAX_INTERVAL', '120'))
+BACKOFF = 1.5
+JITTER = 0.2
+
+
+class AdaptiveInterval:
+    """Polling interval that speeds up on change and backs off when quiet."""
+
+    def __init__(self, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL,
+                 backoff: float = BACKOFF, jitter: float = JITTER, rng: random.Random = None):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.current = min_interval
+
+    def update(self, changed: bool) -> float:
+        if changed:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        return self.current
+
+    def next_sleep(self) -> float:
+        return self.current * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class Watcher:
+    """Runs ``run_once`` until ``stop()`` (or SIGTERM) on an adaptive interval."""
+
+    def __init__(self, run_once, interval: AdaptiveInterval = None, max_runs: int = None):
+        self.run_once = run_once
+        self.interval = interval or AdaptiveInterval()
+        self.max_runs = max_runs
+        self.stopping = threading.Event()
+        self.runs = 0
+        self.errors = 0
+        self.last_run = {}
+
+    def stop(self, signum=None, frame=None):
+        if not self.stopping.is_set():
+            tracing.log(f"Watch mode stopping (signal {signum}); finishing the current run.")
+        self.stopping.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run(self):
+        tracing.log(f"Watch mode started (interval {self.interval.min_interval:g}-{self.interval.max_interval:g}s).")
+        while not self.stopping.is_set():
+            started = time.time()
+            try:
+                summary = self.run_once() or {}
+                failed = failed_stages(summary)
+                # 只有真正發布了新聞才算有變化；翻譯或發布失敗時首頁不會被記錄，
+                # 下次仍會被視為「有變化」，若不退避便會每次輪詢都呼叫 OpenAI
+                changed = bool(summary.get("counters", {}).get("stories_published")) and not failed
+                self.last_run = {"ok": not failed, "changed": changed, "run_id": summary.get("run_id"),
+                                 "duration_ms": summary.get("duration_ms")}
+                if failed:
+                    self.errors += 1
+                    self.last_run["failed_stages"] = failed
+                    tracing.log("Watch run had failed stages; backing off.", severity="WARNING",
+                                run_id=summary.get("run_id"), failed_stages=failed)
+            except Exception as e:
+                # 單次失敗不結束 watch；當作沒有變化並退避
+                self.errors += 1
+                changed = False
+                self.last_run = {"ok": False, "error": str(e)}
+                tracing.log(f"Watch run failed: {e}", severity="ERROR")
+            self.runs += 1
+            self.last_run["finished_at"] = time.time()
+            self.last_run["started_at"] = started
+            if self.max_runs and self.runs >= self.max_runs:
+                break
+            self.interval.update(changed)
+            sleep = self.interval.next_sleep()
+            tracing.log(f"Next poll in {sleep:.1f}s.", severity="DEBUG", changed=changed, sleep=round(sleep, 2))
+            self.stopping.wait(sleep)
+        tracing.log(f"Watch mode stopped after {self.runs} runs ({self.errors} failed).")
+
+    def status(self) -> dict:
+        return {"runs": self.runs, "errors": self.errors, "interval": self.interval.current,
+                "stopping": self.stopping.is_set(), "last_run": self.last_run}
+
+
+def failed_stages(summary: dict) -> list:
+    """Stages of a run summary that recorded errors (plus ``translate`` when
+    stories were dropped because their translation failed)."""
+    failed = sorted(name for name, stage in summary.get("stages", {}).items() if stage.get("errors"))
+    if summary.get("counters", {}).get("stories_failed") and "translate" not in failed:
+        failed.append("translate")
+    return failed
+
+
+def serve_status(watcher: Watcher, port: int) -> ThreadingHTTPServer:
+    """Answer GET requests with the watcher status (Cloud Run health checks)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            payload = json.dumps(watcher.status()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m watcher",
+                                     description="Breaking news monitor")
+    parser.add_argument('mode', nargs='?', choices=['run', 'watch'], default='run')
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL)
+    parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL)
+    parser.add_argument('--max-runs', type=int, default=None, help='stop after N runs (testing)')
+    parser.add_argument('--port', type=int, default=int(os.environ['PORT']) if os.environ.get('PORT') else None,
+                        help='serve the watch status on this port (default: $PORT)')
+    args = parser.parse_args(argv)
+
+    from breaking_monitor import process_breaking_news
+
+    if args.mode == 'run':
+        process_breaking_news()
+        return 0
+
+    watcher = Watcher(lambda: process_breaking_news(persist_idle_metrics=False),
+                      AdaptiveInterval(args.min_interval, args.max_interval), max_runs=args.max_runs)
+    watcher.install_signal_handlers()
+    server = serve_status(watcher, args.port) if args.port else None
+    try:
+        watcher.run()
+    finally:
+        if server:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())